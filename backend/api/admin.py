@@ -3,8 +3,9 @@ from .models import (
     Customer, Branch, Staff, WorksAt, MenuItem, Order, OrderDetail, Bill,
     BillComputation, Discount, Applies, Reservation, ReservationCustomer,
     Feedback, FeedbackOrder, Supplier, FoodChallenge, ChallengeParticipation,
-    Inventory, OrderCustomer, OrderStaff
+    Inventory, OrderCustomer, OrderStaff, EmailOutbox, Table
 )
+from django.utils import timezone
 
 # Register your models here.
 
@@ -80,9 +81,9 @@ class AppliesAdmin(admin.ModelAdmin):
 
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
-    list_display = ('ReservationID', 'ReservationDateTime', 'NumPeople', 'TableNumber', 'Status', 'Confirmed')
+    list_display = ('ReservationID', 'ReservationDateTime', 'NumPeople', 'BranchID', 'TableNumber', 'Status', 'Confirmed')
     search_fields = ('ReservationID', 'TableNumber')
-    list_filter = ('Status', 'Confirmed', 'ReservationDateTime')
+    list_filter = ('Status', 'Confirmed', 'BranchID', 'ReservationDateTime')
 
 
 @admin.register(ReservationCustomer)
@@ -135,4 +136,23 @@ class OrderCustomerAdmin(admin.ModelAdmin):
 
 @admin.register(OrderStaff)
 class OrderStaffAdmin(admin.ModelAdmin):
-    list_display = ('OrderID', 'StaffID')
\ No newline at end of file
+    list_display = ('OrderID', 'StaffID')
+
+@admin.register(Table)
+class TableAdmin(admin.ModelAdmin):
+    list_display = ('TableID', 'BranchID', 'TableNumber', 'Seats', 'Combinable')
+    list_filter = ('BranchID', 'Combinable')
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('EmailID', 'Recipient', 'Subject', 'Status', 'Attempts', 'NextAttemptAt', 'SentAt')
+    search_fields = ('Recipient', 'Subject')
+    list_filter = ('Status',)
+    actions = ['retry_emails']
+
+    @admin.action(description='Retry selected emails')
+    def retry_emails(self, request, queryset):
+        queryset.exclude(Status=EmailOutbox.STATUS_SENT).update(
+            Status=EmailOutbox.STATUS_PENDING, Attempts=0, NextAttemptAt=timezone.now()
+        )
@@ -2,12 +2,17 @@
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from .models import Customer
+from .authentication import revoke_token
 from .serializers import CustomerSerializer
+from .tokens import loyalty_tier, request_customer_id
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -45,8 +50,9 @@ def register_customer(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Check if email exists
-        if User.objects.filter(email=email).exists():
+        # Check if email exists, including customers with no login
+        if (User.objects.filter(email=email).exists()
+                or Customer.objects.filter(Email=email).exists()):
             return Response(
                 {'error': 'Email already registered'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -103,15 +109,20 @@ def get_current_user(request):
     """
     if request.user.is_authenticated:
         try:
-            # Try to get customer profile
-            customer = Customer.objects.get(Email=request.user.email)
+            # The customer comes from the token claims; only the
+            # points are read, by primary key
+            customer_id = request_customer_id(request)
+            loyalty_points = Customer.objects.filter(pk=customer_id).values_list(
+                'LoyaltyPoints', flat=True
+            ).get()
             return Response({
                 'username': request.user.username,
                 'email': request.user.email,
                 'firstName': request.user.first_name,
                 'lastName': request.user.last_name,
-                'customerId': customer.CustomerID,
-                'loyaltyPoints': customer.LoyaltyPoints
+                'customerId': customer_id,
+                'loyaltyPoints': loyalty_points,
+                'loyaltyTier': loyalty_tier(loyalty_points)
             })
         except Customer.DoesNotExist:
             return Response({
@@ -124,4 +135,32 @@ def get_current_user(request):
         return Response(
             {'error': 'Not authenticated'},
             status=status.HTTP_401_UNAUTHORIZED
-        )
\ No newline at end of file
+        )
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout(request):
+    """
+    Revoke the access token used for this request and, if given, the
+    refresh token in the body
+    """
+    try:
+        with transaction.atomic():
+            revoke_token(request.auth)
+            refresh = request.data.get('refresh')
+            if refresh:
+                revoke_token(RefreshToken(refresh))
+        return Response({
+            'success': True,
+            'message': 'Logged out'
+        })
+    except TokenError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
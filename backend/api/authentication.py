@@ -0,0 +1,123 @@
+# backend/api/authentication.py
+"""
+JWT authentication with an optional stateless mode.
+
+SimpleJWT's JWTAuthentication loads the User row on every request. Views
+named in JWT_STATELESS_VIEWS get a ClaimsUser built from the token claims
+instead; it only reads the User row if the view touches a field the
+claims do not carry. Every view still gets the revocation check, which
+reads a cached set of revoked token ids rather than querying.
+
+The set is only dropped from the cache of the process that handled the
+revocation, and the cache is per process (LocMem), so other workers keep
+their copy for up to REVOKED_TOKENS_CACHE_SECONDS. That bounds how long a
+revoked token is still accepted.
+"""
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication as SimpleJWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .models import RevokedToken
+
+REVOKED_TOKENS_KEY = 'jwt:revoked'
+
+
+def revoked_token_ids():
+    """
+    The jti of every revoked, unexpired token, cached as one frozenset.
+    """
+    revoked = cache.get(REVOKED_TOKENS_KEY)
+    if revoked is None:
+        revoked = frozenset(
+            RevokedToken.objects.filter(ExpiresAt__gt=timezone.now())
+            .values_list('JTI', flat=True)
+        )
+        cache.set(REVOKED_TOKENS_KEY, revoked, timeout=settings.REVOKED_TOKENS_CACHE_SECONDS)
+    return revoked
+
+
+def revoke_token(token):
+    """
+    Revoke a validated token until it expires.
+    """
+    jti = token.get(api_settings.JTI_CLAIM)
+    if jti is None:
+        return
+    expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    RevokedToken.objects.filter(ExpiresAt__lte=timezone.now()).delete()
+    RevokedToken.objects.get_or_create(JTI=jti, defaults={'ExpiresAt': expires_at})
+    transaction.on_commit(lambda: cache.delete(REVOKED_TOKENS_KEY))
+
+
+class ClaimsUser(TokenUser):
+    """
+    A user built from the access token claims. Anything the claims do not
+    carry (email, first_name, ...) comes from the User row, loaded once on
+    first access.
+    """
+
+    @cached_property
+    def _user(self):
+        try:
+            return get_user_model().objects.get(**{api_settings.USER_ID_FIELD: self.id})
+        except get_user_model().DoesNotExist as e:
+            raise AuthenticationFailed('User not found', code='user_not_found') from e
+
+    @cached_property
+    def username(self):
+        return self.token['username'] if 'username' in self.token else self._user.get_username()
+
+    @cached_property
+    def is_staff(self):
+        return self.token['is_staff'] if 'is_staff' in self.token else self._user.is_staff
+
+    @cached_property
+    def is_superuser(self):
+        return self.token['is_superuser'] if 'is_superuser' in self.token else self._user.is_superuser
+
+    def __getattr__(self, attr):
+        if attr in self.token:
+            return self.token[attr]
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self._user, attr)
+
+
+def view_name(view):
+    return f'{view.__module__}.{type(view).__name__}'
+
+
+class JWTAuthentication(SimpleJWTAuthentication):
+    """
+    SimpleJWT authentication plus the revocation check, stateless for the
+    views listed in JWT_STATELESS_VIEWS (dotted paths such as
+    'api.reservation_views.get_my_reservations').
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if validated_token.get(api_settings.JTI_CLAIM) in revoked_token_ids():
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+
+        if self.is_stateless(request):
+            return ClaimsUser(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def is_stateless(self, request):
+        view = request.parser_context.get('view') if request.parser_context else None
+        return view is not None and view_name(view) in settings.JWT_STATELESS_VIEWS
@@ -0,0 +1,285 @@
+# backend/api/availability.py
+"""
+Table availability.
+
+A table is taken at a time if it has an active reservation within
+RESERVATION_WINDOW either side of it, matching the overlap rule in
+create_reservation.
+
+Active reservations are kept in a per-branch, per-date index in the
+cache: {TableNumber: [(timestamp, ReservationID), ...]} sorted by time, so a
+check only ever looks at one branch's bookings. A date is
+loaded from the database on first use and afterwards patched in place when
+reservations are saved or deleted (see api/signals.py). Every date has a
+version counter; a writer bumps it and patches only a bucket built at the
+previous version, and readers rebuild any bucket that is not current.
+
+The cache is per process, so only the worker that handled a write patches
+its copy; other workers' buckets can be behind until they expire after
+AVAILABILITY_INDEX_TTL. Availability answers may be that stale. Bookings
+are not decided by the index: the slot claims are (see api/booking.py).
+
+For the day view each table's occupancy is an int bitmask with one bit per
+slot, so a reservation marks its whole window with one OR.
+"""
+import time as clock
+from bisect import bisect_left, insort
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .metrics import CACHE_LOOKUPS
+from .models import Reservation
+from .tables import best_fit, branch_layout, tables_for_party
+
+OPENING_TIME = time(11, 0)
+LAST_SLOT_TIME = time(22, 0)
+SLOT_MINUTES = 30
+RESERVATION_WINDOW = timedelta(hours=2)
+ACTIVE_STATUSES = ['Confirmed', 'Pending']
+
+WINDOW_MINUTES = int(RESERVATION_WINDOW.total_seconds() // 60)
+WINDOW_SECONDS = RESERVATION_WINDOW.total_seconds()
+
+
+def time_slots():
+    """
+    Slot start times for a day as "HH:MM" strings.
+    """
+    slots = []
+    minutes = OPENING_TIME.hour * 60 + OPENING_TIME.minute
+    last = LAST_SLOT_TIME.hour * 60 + LAST_SLOT_TIME.minute
+    while minutes <= last:
+        slots.append(f"{minutes // 60:02d}:{minutes % 60:02d}")
+        minutes += SLOT_MINUTES
+    return slots
+
+
+def _day_opening(day):
+    return timezone.make_aware(datetime.combine(day, OPENING_TIME))
+
+
+def slot_mask(reservation_dt, opening, slot_count):
+    """
+    Bitmask of the slots a reservation at `reservation_dt` blocks.
+    """
+    offset = (reservation_dt - opening).total_seconds() / 60
+    first = max(0, -int((WINDOW_MINUTES - offset) // SLOT_MINUTES))
+    last = min(slot_count - 1, int((offset + WINDOW_MINUTES) // SLOT_MINUTES))
+    if first > last:
+        return 0
+    return ((1 << (last - first + 1)) - 1) << first
+
+
+def as_aware(value):
+    """
+    Parse a ReservationDateTime (string or datetime) into an aware datetime.
+    """
+    value = Reservation._meta.get_field('ReservationDateTime').to_python(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _index_keys(branch_id, day):
+    key = f'availability:{branch_id}:{day.isoformat()}'
+    return key, f'{key}:version'
+
+
+def _build_day_index(branch_id, day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    rows = Reservation.objects.filter(
+        BranchID=branch_id,
+        ReservationDateTime__gte=start,
+        ReservationDateTime__lt=start + timedelta(days=1),
+        Status__in=ACTIVE_STATUSES
+    ).values_list('TableNumber', 'MergedTables', 'ReservationDateTime', 'ReservationID')
+
+    tables = {}
+    for table_number, merged_tables, reservation_dt, reservation_id in rows:
+        for number in [table_number, *merged_tables]:
+            tables.setdefault(number, []).append((reservation_dt.timestamp(), reservation_id))
+    for entries in tables.values():
+        entries.sort()
+    return tables
+
+
+def get_day_index(branch_id, day):
+    """
+    {TableNumber: sorted [(timestamp, ReservationID)]} for the branch's
+    reservations on `day`, built from the database only if the cached copy
+    is not current.
+    """
+    bucket_key, version_key = _index_keys(branch_id, day)
+    cached = cache.get_many([bucket_key, version_key])
+    version = cached.get(version_key)
+    if version is None:
+        # Seed from the clock so a lost counter can never match an old bucket
+        cache.add(version_key, int(clock.time() * 1000), timeout=None)
+        version = cache.get(version_key)
+
+    bucket = cached.get(bucket_key)
+    if bucket is not None and bucket['version'] == version:
+        CACHE_LOOKUPS.inc(cache='availability', result='hit')
+        return bucket['tables']
+
+    CACHE_LOOKUPS.inc(cache='availability', result='miss')
+    tables = _build_day_index(branch_id, day)
+    cache.set(bucket_key, {'version': version, 'tables': tables}, settings.AVAILABILITY_INDEX_TTL)
+    return tables
+
+
+def _patch_day_index(branch_id, day, change):
+    if branch_id is None:
+        return
+    bucket_key, version_key = _index_keys(branch_id, day)
+    try:
+        version = cache.incr(version_key)
+    except ValueError:
+        return  # never built, so nothing to patch
+    bucket = cache.get(bucket_key)
+    if bucket is None or bucket['version'] != version - 1:
+        return  # missed an update; the next read rebuilds it
+    tables = bucket['tables']
+    change(tables)
+    cache.set(bucket_key, {'version': version, 'tables': tables}, settings.AVAILABILITY_INDEX_TTL)
+
+
+def _remove_entry(tables, reservation_id):
+    for table_number in list(tables):
+        entries = [entry for entry in tables[table_number] if entry[1] != reservation_id]
+        if entries:
+            tables[table_number] = entries
+        else:
+            del tables[table_number]
+
+
+def index_remove(branch_id, reservation_id, reservation_dt):
+    day = timezone.localtime(as_aware(reservation_dt)).date()
+    _patch_day_index(branch_id, day, lambda tables: _remove_entry(tables, reservation_id))
+
+
+def index_save(branch_id, reservation_id, table_numbers, reservation_dt, status):
+    """
+    Record a reservation's current state (on all of its tables) in the index.
+    """
+    reservation_dt = as_aware(reservation_dt)
+    day = timezone.localtime(reservation_dt).date()
+
+    def change(tables):
+        _remove_entry(tables, reservation_id)
+        if status in ACTIVE_STATUSES:
+            for number in table_numbers:
+                insort(tables.setdefault(int(number), []), (reservation_dt.timestamp(), reservation_id))
+
+    _patch_day_index(branch_id, day, change)
+
+
+def invalidate_day_index(branch_id, day):
+    """
+    Force the next read of the branch's `day` to rebuild from the database.
+    """
+    bucket_key, version_key = _index_keys(branch_id, day)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        pass
+    cache.delete(bucket_key)
+
+
+def _window_buckets(branch_id, start, end):
+    """
+    The branch's index buckets for every date in [start, end].
+    """
+    day = timezone.localtime(start).date()
+    last = timezone.localtime(end).date()
+    buckets = []
+    while day <= last:
+        buckets.append(get_day_index(branch_id, day))
+        day += timedelta(days=1)
+    return buckets
+
+
+def _has_entry_between(entries, low, high):
+    position = bisect_left(entries, (low,))
+    return position < len(entries) and entries[position][0] <= high
+
+
+def occupied_tables(branch_id, reservation_dt):
+    """
+    The branch's tables with an active reservation within
+    RESERVATION_WINDOW of the time.
+    """
+    reservation_dt = as_aware(reservation_dt)
+    ts = reservation_dt.timestamp()
+    low, high = ts - WINDOW_SECONDS, ts + WINDOW_SECONDS
+    occupied = set()
+    for bucket in _window_buckets(branch_id, reservation_dt - RESERVATION_WINDOW, reservation_dt + RESERVATION_WINDOW):
+        for table_number, entries in bucket.items():
+            if table_number not in occupied and _has_entry_between(entries, low, high):
+                occupied.add(table_number)
+    return sorted(occupied)
+
+
+def is_table_free(branch_id, table_number, reservation_dt):
+    return int(table_number) not in occupied_tables(branch_id, reservation_dt)
+
+
+def choose_tables(branch_id, reservation_dt, party_size):
+    """
+    Best-fit tables at the branch for a party at `reservation_dt`, or None.
+    Uses only the cached layout and the in-memory index.
+    """
+    layout = branch_layout(branch_id)
+    occupied = set(occupied_tables(branch_id, reservation_dt))
+    free = {table.number for table in layout if table.number not in occupied}
+    return best_fit(layout, free, party_size)
+
+
+def load_day_occupancy(branch_id, day, slot_count):
+    """
+    {TableNumber: bitmask} for `day`, from the availability index.
+    """
+    opening = _day_opening(day)
+    closing = opening + timedelta(minutes=(slot_count - 1) * SLOT_MINUTES)
+    window_start = (opening - RESERVATION_WINDOW).timestamp()
+    window_end = (closing + RESERVATION_WINDOW).timestamp()
+    occupancy = {}
+    for bucket in _window_buckets(branch_id, opening - RESERVATION_WINDOW, closing + RESERVATION_WINDOW):
+        for table_number, entries in bucket.items():
+            mask = occupancy.get(table_number, 0)
+            for ts, _ in entries:
+                if window_start <= ts <= window_end:
+                    mask |= slot_mask(datetime.fromtimestamp(ts, tz=opening.tzinfo), opening, slot_count)
+            if mask:
+                occupancy[table_number] = mask
+    return occupancy
+
+
+def day_availability(branch_id, day, party_size=None):
+    """
+    Free tables seating `party_size` for every slot of `day` at the branch,
+    and whether a booking for the party could be placed automatically
+    (possibly on merged tables).
+    """
+    layout = branch_layout(branch_id)
+    tables = tables_for_party(branch_id, party_size)
+    slots = time_slots()
+    occupancy = load_day_occupancy(branch_id, day, len(slots))
+
+    result = []
+    for index, slot in enumerate(slots):
+        bit = 1 << index
+        free = [t for t in tables if not occupancy.get(t, 0) & bit]
+        if free or party_size is None:
+            bookable = bool(free)
+        else:
+            free_all = {t.number for t in layout if not occupancy.get(t.number, 0) & bit}
+            bookable = best_fit(layout, free_all, party_size) is not None
+        result.append({
+            'time': slot,
+            'available_tables': free,
+            'available_count': len(free),
+            'bookable': bookable,
+        })
+    return result
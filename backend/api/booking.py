@@ -0,0 +1,189 @@
+# backend/api/booking.py
+"""
+Contention-safe table booking.
+
+An active reservation at time T holds TableSlotClaim rows for every
+SLOT_MINUTES slot touching [T - W/2, T + W/2], where W is
+RESERVATION_WINDOW. Reservations start on the SLOT_MINUTES grid, so two
+on the same table share a slot exactly when they are within W of each
+other, and the (BranchID, TableNumber, SlotStart) key turns the overlap
+rule into an insert conflict. The database serialises
+competing inserts on that key, which removes the race between the overlap
+check and the insert without any global lock, on SQLite and PostgreSQL
+alike.
+
+Claims are kept in step with Reservation by signals (api/signals.py);
+writes must run inside transaction.atomic() so a conflict rolls back the
+reservation as well.
+"""
+from datetime import datetime, timezone as dt_timezone
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from .availability import (
+    ACTIVE_STATUSES, RESERVATION_WINDOW, SLOT_MINUTES, as_aware, choose_tables, is_table_free,
+    invalidate_day_index
+)
+from .models import Reservation, TableSlotClaim
+from .tables import get_table
+
+SLOT_SECONDS = SLOT_MINUTES * 60
+HALF_WINDOW_SECONDS = RESERVATION_WINDOW.total_seconds() / 2
+
+
+class SlotConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'This table is not available at the selected time. Please choose another time or table.'
+    default_code = 'slot_conflict'
+
+
+class InvalidTable(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'This table does not exist at the selected branch.'
+    default_code = 'invalid_table'
+
+
+class InvalidTime(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = f'Reservations start on the hour or every {SLOT_MINUTES} minutes after it.'
+    default_code = 'invalid_time'
+
+
+def check_slot_grid(reservation_dt):
+    """
+    Raise InvalidTime unless `reservation_dt` starts a slot. An off-grid
+    time would claim slots it only partly overlaps and clash with
+    bookings more than RESERVATION_WINDOW away.
+    """
+    if as_aware(reservation_dt).timestamp() % SLOT_SECONDS:
+        raise InvalidTime()
+
+
+def claim_slot_starts(reservation_dt):
+    """
+    Slot start times a reservation at `reservation_dt` holds.
+    """
+    ts = as_aware(reservation_dt).timestamp()
+    first = int((ts - HALF_WINDOW_SECONDS) // SLOT_SECONDS)
+    last = int((ts + HALF_WINDOW_SECONDS) // SLOT_SECONDS)
+    return [
+        datetime.fromtimestamp(slot * SLOT_SECONDS, tz=dt_timezone.utc)
+        for slot in range(first, last + 1)
+    ]
+
+
+def build_claims(reservation):
+    if reservation.Status not in ACTIVE_STATUSES or reservation.BranchID_id is None:
+        return []
+    return [
+        TableSlotClaim(
+            BranchID_id=reservation.BranchID_id, TableNumber=int(table_number),
+            SlotStart=slot_start, ReservationID=reservation
+        )
+        for table_number in [reservation.TableNumber, *reservation.MergedTables]
+        for slot_start in claim_slot_starts(reservation.ReservationDateTime)
+    ]
+
+
+def sync_claims(reservations):
+    """
+    Replace the claims of `reservations` with ones matching their current
+    table, time and status. Raises IntegrityError on a clash.
+    """
+    TableSlotClaim.objects.filter(ReservationID__in=[r.pk for r in reservations]).delete()
+    claims = [claim for reservation in reservations for claim in build_claims(reservation)]
+    if claims:
+        TableSlotClaim.objects.bulk_create(claims)
+
+
+def invalidate_around(branch_id, reservation_dt):
+    """
+    Drop this worker's index buckets a booking at `reservation_dt` reads.
+    """
+    for moment in (reservation_dt - RESERVATION_WINDOW, reservation_dt + RESERVATION_WINDOW):
+        invalidate_day_index(branch_id, timezone.localtime(moment).date())
+
+
+def is_claimed(branch_id, table_number, reservation_dt):
+    """
+    Whether another active reservation holds a slot a booking at
+    `reservation_dt` would claim; the database's answer.
+    """
+    return TableSlotClaim.objects.filter(
+        BranchID_id=branch_id, TableNumber=int(table_number),
+        SlotStart__in=claim_slot_starts(reservation_dt)
+    ).exists()
+
+
+def book_reservation(branch_id, reservation_dt, num_people, table_number, use_index=True):
+    """
+    Create a Confirmed reservation, or raise SlotConflict if the table is
+    taken. The index may be stale (another worker's write), so it is only
+    a hint: a table it shows as taken is checked against the slot claims
+    before being refused, and the claim insert settles everything else.
+    """
+    reservation_dt = as_aware(reservation_dt)
+    check_slot_grid(reservation_dt)
+    table = get_table(branch_id, int(table_number))
+    if table is None:
+        raise InvalidTable()
+    if table.seats < int(num_people):
+        raise InvalidTable(f'Table {table.number} seats at most {table.seats} people.')
+    if use_index and not is_table_free(branch_id, table_number, reservation_dt):
+        if is_claimed(branch_id, table_number, reservation_dt):
+            raise SlotConflict()
+        invalidate_around(branch_id, reservation_dt)
+    try:
+        with transaction.atomic():
+            # post_save claims the slots (api/signals.py)
+            return Reservation.objects.create(
+                BranchID_id=branch_id,
+                ReservationDateTime=reservation_dt,
+                NumPeople=num_people,
+                TableNumber=table_number,
+                Status='Confirmed',
+                Confirmed=True
+            )
+    except IntegrityError:
+        if use_index:
+            invalidate_around(branch_id, reservation_dt)
+        raise SlotConflict()
+
+
+def book_best_fit(branch_id, reservation_dt, num_people, attempts=3):
+    """
+    Create a Confirmed reservation on the best-fit table(s) for the party,
+    or raise SlotConflict if nothing fits. If a concurrent booking takes
+    the chosen tables first, the day's index is reloaded and the choice
+    made again. A "nothing fits" from the index is likewise rechecked
+    against a reloaded index, since this worker's copy may be stale.
+    """
+    reservation_dt = as_aware(reservation_dt)
+    check_slot_grid(reservation_dt)
+    num_people = int(num_people)
+    reloaded = False
+    for attempt in range(attempts):
+        tables = choose_tables(branch_id, reservation_dt, num_people)
+        if tables is None and not reloaded:
+            invalidate_around(branch_id, reservation_dt)
+            reloaded = True
+            tables = choose_tables(branch_id, reservation_dt, num_people)
+        if tables is None:
+            raise SlotConflict(f'No table for {num_people} people is free at the selected time.')
+        try:
+            with transaction.atomic():
+                return Reservation.objects.create(
+                    BranchID_id=branch_id,
+                    ReservationDateTime=reservation_dt,
+                    NumPeople=num_people,
+                    TableNumber=tables[0],
+                    MergedTables=tables[1:],
+                    Status='Confirmed',
+                    Confirmed=True
+                )
+        except IntegrityError:
+            # The index missed the competing booking; reload around it
+            invalidate_around(branch_id, reservation_dt)
+            reloaded = True
+    raise SlotConflict()
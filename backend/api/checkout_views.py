@@ -0,0 +1,128 @@
+# backend/api/checkout_views.py
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from .models import (
+    Customer, Order, OrderDetail, OrderCustomer, Bill, BillComputation, Applies
+)
+from .serializers import OrderSerializer, BillSerializer, QuoteSerializer
+from .pricing import PricingError, parse_cart, get_active_discounts, quote_cart
+from .tokens import request_customer_id
+
+
+def _discount_ids(data):
+    """
+    Accept either a single DiscountID or a DiscountIDs list.
+    """
+    discount_ids = data.get('DiscountIDs') or []
+    # A single value is one id, not a string of digits
+    discount_ids = list(discount_ids) if isinstance(discount_ids, list) else [discount_ids]
+    if data.get('DiscountID'):
+        discount_ids.append(data.get('DiscountID'))
+    return discount_ids
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def quote(request):
+    """
+    Price a cart on the server without placing an order
+    """
+    try:
+        quantities = parse_cart(request.data.get('items'))
+        discounts = get_active_discounts(_discount_ids(request.data))
+        result = quote_cart(quantities, discounts)
+        return Response({
+            'success': True,
+            'quote': QuoteSerializer(result).data
+        })
+
+    except PricingError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def checkout(request):
+    """
+    Place an order from the cart in one request.
+
+    Creates the Order, its OrderDetail rows, the OrderCustomer link, the Bill,
+    its BillComputation and any Applies rows inside a single
+    transaction. The number of queries does not depend on the cart size.
+    """
+    try:
+        payment_method = request.data.get('PaymentMethod')
+        if not payment_method:
+            return Response(
+                {'error': 'PaymentMethod is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        quantities = parse_cart(request.data.get('items'))
+        discounts = get_active_discounts(_discount_ids(request.data))
+        customer_id = request_customer_id(request)
+
+        # Prices for the whole cart are loaded with a single query
+        totals = quote_cart(quantities, discounts)
+
+        now = timezone.now()
+        with transaction.atomic():
+            order = Order.objects.create(OrderDate=now, Status='Pending')
+
+            OrderDetail.objects.bulk_create([
+                OrderDetail(OrderID=order, MenuItemID_id=i, Quantity=qty)
+                for i, qty in quantities.items()
+            ])
+
+            OrderCustomer.objects.create(OrderID=order, CustomerID_id=customer_id)
+
+            bill = Bill.objects.create(
+                OrderID=order,
+                TotalBeforeDiscount=totals['TotalBeforeDiscount'],
+                DiscountAmount=totals['DiscountAmount'],
+                TaxAmount=totals['TaxAmount'],
+                PaymentMethod=payment_method,
+                PaymentDate=now
+            )
+
+            BillComputation.objects.create(BillID=bill, TotalAmount=totals['TotalAmount'])
+
+            Applies.objects.bulk_create([
+                Applies(BillID=bill, DiscountID=discount) for discount in discounts
+            ])
+
+        return Response({
+            'success': True,
+            'message': 'Order placed successfully!',
+            'order': OrderSerializer(order).data,
+            'bill': BillSerializer(bill).data,
+            'total': str(totals['TotalAmount'])
+        }, status=status.HTTP_201_CREATED)
+
+    except PricingError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Customer.DoesNotExist:
+        return Response(
+            {'error': 'Customer profile not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
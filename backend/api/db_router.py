@@ -0,0 +1,124 @@
+# backend/api/db_router.py
+"""
+Read replicas.
+
+Reads are sent to a replica only when the view opts in: the actions in a
+view class's replica_actions (list and retrieve on the router viewsets,
+see BaseModelViewSet) or function views wrapped in replica_reads() such as
+the staff dashboard. Everything else, and every write, uses 'default'.
+
+Read-your-writes is tracked per request: once a request writes, its
+remaining reads go to the primary too. A client that sent an unsafe
+request (POST, PUT, ...) also stays on the primary for
+REPLICA_PIN_SECONDS, long enough for the replicas to catch up, keyed by
+its Authorization header or, without one, its address.
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Routing state of the current request; a dict so that changes made in
+# another thread or context (sync_to_async) are seen by the whole request
+_routing = ContextVar('db_routing', default=None)
+
+
+def replica_reads(view):
+    """
+    Let a function view (@api_view) read from a replica.
+    """
+    view.cls.replica_actions = ('get',)
+    return view
+
+
+def _pin_key(request):
+    client = request.META.get('HTTP_AUTHORIZATION') or request.META.get('REMOTE_ADDR', '')
+    return 'replica:pin:' + hashlib.sha1(client.encode()).hexdigest()
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state and state['replica'] and not state['wrote']:
+            return state['replica']
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sets up the routing state for each request and pins clients to the
+    primary after they write.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state, token = self.start(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _routing.reset(token)
+            self.finish(request, state)
+
+    async def __acall__(self, request):
+        state, token = self.start(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _routing.reset(token)
+            self.finish(request, state)
+
+    def start(self, request):
+        state = {'replica': None, 'wrote': False}
+        return state, _routing.set(state)
+
+    def finish(self, request, state):
+        if state['wrote'] or request.method not in SAFE_METHODS:
+            cache.set(_pin_key(request), 1, timeout=settings.REPLICA_PIN_SECONDS)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _routing.get()
+        if state is None or not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return None
+        # Viewsets map methods to actions; function views use the method
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        view_class = getattr(view_func, 'cls', None)
+        if action not in getattr(view_class, 'replica_actions', ()):
+            return None
+        if cache.get(_pin_key(request)):
+            return None
+        state['replica'] = random.choice(settings.DATABASE_REPLICAS)
+        return None
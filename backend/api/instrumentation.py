@@ -0,0 +1,242 @@
+# backend/api/instrumentation.py
+"""
+Per-request metrics: SQL query count and time, serializer time, total time
+and response size, kept per route (method and URL name).
+
+RequestMetricsMiddleware measures each request, sends the figures back in
+a Server-Timing header (visible in the browser's network panel) and adds
+them to the shared histograms behind GET /metrics (see api/metrics.py):
+
+    Server-Timing: db;dur=4.1;desc="7 queries", serialize;dur=2.3, total;dur=9.8
+
+Total time and response size are always recorded. Queries and serializer
+time are recorded for a REQUEST_METRICS_SAMPLE_RATE fraction of requests,
+and for every request when DEBUG is on. Every connection carries one
+execute wrapper (installed when it connects, see api/signals.py) that
+returns straight away unless the current request is sampled. With DEBUG,
+the wrapper also counts repeated statements: the same SQL run again with
+other parameters, which is what an N+1 pattern looks like.
+
+Serializer time is spent inside the outermost .data of a serializer with
+TimedSerializerMixin (the app's serializers, see api/serializers.py), minus
+the queries it triggers. Those queries are counted in db.
+
+The Server-Timing header is only sent with REQUEST_METRICS_SERVER_TIMING,
+which defaults to DEBUG: it tells clients how the server spends its time.
+"""
+import random
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.serializers import ListSerializer
+from .metrics import Counter, Histogram, collect, histogram_series, observe_many
+
+REQUESTS = Counter('http_requests_total', 'Requests served by method, route and status')
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time to build the response',
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size',
+    (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+)
+# The histograms below only cover sampled requests
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL queries per sampled request',
+    (0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+DB_DURATION = Histogram(
+    'http_request_db_duration_seconds', 'SQL time per sampled request',
+    (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+SERIALIZE_DURATION = Histogram(
+    'http_request_serialize_duration_seconds', 'Serializer time per sampled request, without SQL',
+    (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+ROUTE_HISTOGRAMS = (REQUEST_DURATION, RESPONSE_SIZE, DB_QUERIES, DB_DURATION, SERIALIZE_DURATION)
+
+# Measurements of the current request, or None outside a request
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    What one request has measured so far. A mutable object, so queries run
+    in another thread (sync_to_async) add to the same request.
+    """
+
+    def __init__(self, sampled, full):
+        self.sampled = sampled
+        self.full = full
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.serializing = False
+        self.statements = {} if full else None
+
+    @property
+    def repeated_queries(self):
+        return sum(count - 1 for count in self.statements.values()) if self.full else 0
+
+
+def _bucket_quantile(buckets, count, fraction):
+    """
+    Upper bound of the bucket holding the given fraction of observations
+    (None for the overflow bucket).
+    """
+    for le, cumulative in buckets:
+        if cumulative >= fraction * count:
+            return None if le == '+Inf' else float(le)
+    return None
+
+
+def request_metrics():
+    """
+    Summary of the route histograms across all processes: observation
+    count, mean and p50/p95 bucket bounds per metric.
+    """
+    samples = collect()
+    routes = {}
+    for histogram in ROUTE_HISTOGRAMS:
+        for labels, (buckets, count, total) in histogram_series(histogram, samples).items():
+            if not count:
+                continue
+            labels = dict(labels)
+            summary = routes.setdefault(f"{labels['method']} {labels['route']}", {})
+            summary[histogram.name] = {
+                'count': int(count),
+                'mean': round(total / count, 6),
+                'p50': _bucket_quantile(buckets, count, 0.5),
+                'p95': _bucket_quantile(buckets, count, 0.95),
+            }
+    return dict(sorted(routes.items()))
+
+
+def instrument_query(execute, sql, params, many, context):
+    """
+    Execute wrapper on every connection; see api/signals.py.
+    """
+    metrics = _current.get()
+    if metrics is None or not metrics.sampled:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.queries += 1
+        if metrics.full:
+            metrics.statements[sql] = metrics.statements.get(sql, 0) + 1
+
+
+def _timed_data(data):
+    metrics = _current.get()
+    if metrics is None or not metrics.sampled or metrics.serializing:
+        return data()
+    metrics.serializing = True
+    db_time = metrics.db_time
+    started = time.perf_counter()
+    try:
+        return data()
+    finally:
+        metrics.serialize_time += time.perf_counter() - started - (metrics.db_time - db_time)
+        metrics.serializing = False
+
+
+class TimedListSerializer(ListSerializer):
+
+    @property
+    def data(self):
+        return _timed_data(lambda: super(TimedListSerializer, self).data)
+
+
+class TimedSerializerMixin:
+    """
+    Adds the time spent in the outermost .data to the current request's
+    serializer time, for one object or (with many=True) a list.
+    """
+
+    @property
+    def data(self):
+        return _timed_data(lambda: super(TimedSerializerMixin, self).data)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        serializer = super().many_init(*args, **kwargs)
+        # Meta.list_serializer_class is not inherited, so the plain list
+        # class is swapped here rather than declared on every serializer
+        if type(serializer) is ListSerializer:
+            serializer.__class__ = TimedListSerializer
+        return serializer
+
+
+def server_timing(metrics, total):
+    entries = []
+    if metrics.sampled:
+        queries = f'{metrics.queries} queries'
+        if metrics.full:
+            queries += f', {metrics.repeated_queries} repeated'
+        entries.append(f'db;dur={metrics.db_time * 1000:.1f};desc="{queries}"')
+        entries.append(f'serialize;dur={metrics.serialize_time * 1000:.1f}')
+    entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures each request; see the module docstring.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    def start(self):
+        full = settings.DEBUG
+        metrics = RequestMetrics(full or random.random() < settings.REQUEST_METRICS_SAMPLE_RATE, full)
+        return metrics, _current.set(metrics), time.perf_counter()
+
+    def finish(self, request, response, metrics, started):
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        route = match.view_name if match else '<unresolved>'
+
+        labels = {'method': request.method, 'route': route}
+        observations = [(REQUEST_DURATION, total, labels)]
+        if not response.streaming:
+            observations.append((RESPONSE_SIZE, len(response.content), labels))
+        if metrics.sampled:
+            observations += [
+                (DB_QUERIES, metrics.queries, labels),
+                (DB_DURATION, metrics.db_time, labels),
+                (SERIALIZE_DURATION, metrics.serialize_time, labels),
+            ]
+        observe_many(observations)
+        REQUESTS.inc(status=str(response.status_code), **labels)
+
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(metrics, total)
+        return response
@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.utils import timezone
+from api.availability import ACTIVE_STATUSES, RESERVATION_WINDOW
+from api.booking import SlotConflict, book_reservation
+from api.models import Branch, Reservation, Table
+
+
+def find_double_bookings(reservations):
+    """
+    Pairs of active reservations on the same table within the window.
+    """
+    by_table = {}
+    for reservation in reservations:
+        for table_number in [reservation.TableNumber, *reservation.MergedTables]:
+            by_table.setdefault(table_number, []).append(reservation.ReservationDateTime)
+    clashes = []
+    for table_number, times in by_table.items():
+        times.sort()
+        for earlier, later in zip(times, times[1:]):
+            if later - earlier <= RESERVATION_WINDOW:
+                clashes.append((table_number, earlier, later))
+    return clashes
+
+
+def create_bench_branch(tables, seats=4):
+    branch = Branch.objects.create(Name='Booking benchmark', Location='-', Contact='-')
+    Table.objects.bulk_create([
+        Table(BranchID=branch, TableNumber=number, Seats=seats) for number in range(1, tables + 1)
+    ])
+    return branch
+
+
+def run_booking_stress(branch_id, day, threads, attempts, tables, use_index=True, seed=0):
+    """
+    Book random (table, slot) pairs on `day` from several threads at once.
+    Returns (booked, conflicts, busy, seconds).
+    """
+    opening = timezone.make_aware(datetime.combine(day, datetime.min.time())) + timedelta(hours=11)
+    counts = {'booked': 0, 'conflicts': 0, 'busy': 0}
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(threads)
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        outcome = {'booked': 0, 'conflicts': 0, 'busy': 0}
+        start_barrier.wait()
+        try:
+            for _ in range(attempts):
+                reservation_dt = opening + timedelta(minutes=30 * rng.randrange(24))
+                try:
+                    book_reservation(branch_id, reservation_dt, 2, rng.randint(1, tables), use_index=use_index)
+                    outcome['booked'] += 1
+                except SlotConflict:
+                    outcome['conflicts'] += 1
+                except OperationalError:
+                    # SQLite gave up waiting for the write lock
+                    outcome['busy'] += 1
+        finally:
+            connection.close()
+        with lock:
+            for key, value in outcome.items():
+                counts[key] += value
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return counts['booked'], counts['conflicts'], counts['busy'], elapsed
+
+
+class Command(BaseCommand):
+    help = 'Stress concurrent reservation booking and check for double bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=200, help='Booking attempts per thread')
+        parser.add_argument('--tables', type=int, default=20)
+        parser.add_argument('--date', default='2099-01-01', help='Day to book on')
+        parser.add_argument(
+            '--no-index', action='store_true',
+            help='Skip the cache pre-check so every conflict is settled by the slot claims'
+        )
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark branch and its bookings')
+
+    def handle(self, *args, **options):
+        day = datetime.strptime(options['date'], '%Y-%m-%d').date()
+        # A throwaway branch keeps the bookings apart from real ones
+        branch = create_bench_branch(options['tables'])
+        booked, conflicts, busy, elapsed = run_booking_stress(
+            branch.pk, day, options['threads'], options['attempts'], options['tables'],
+            use_index=not options['no_index']
+        )
+        clashes = find_double_bookings(
+            Reservation.objects.filter(BranchID=branch, Status__in=ACTIVE_STATUSES)
+        )
+        attempts = options['threads'] * options['attempts']
+
+        self.stdout.write(
+            f'{attempts} attempts on {options["threads"]} threads in {elapsed:.2f}s: '
+            f'{booked} booked, {conflicts} conflicts, {busy} lock timeouts'
+        )
+        self.stdout.write(f'{attempts / elapsed:.0f} attempts/sec, {booked / elapsed:.0f} bookings/sec')
+
+        if not options['keep']:
+            branch.delete()
+
+        if clashes:
+            self.stderr.write(self.style.ERROR(f'{len(clashes)} double bookings: {clashes[:5]}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No double bookings'))
@@ -0,0 +1,146 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, connections
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from api.checkout_views import checkout
+from api.models import Customer, EmailOutbox, MenuItem, Order
+from api.reservation_views import create_reservation
+from .bench_booking import create_bench_branch
+
+# The settings before DB_PROFILE: a new connection per request, rollback
+# journal, deferred transactions
+PLAIN_SQLITE = {
+    'CONN_MAX_AGE': 0,
+    'CONN_HEALTH_CHECKS': False,
+    'OPTIONS': {'init_command': 'PRAGMA journal_mode=DELETE'},
+}
+
+
+def percentile(latencies, fraction):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Measure concurrent reservation and checkout writes under the database profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=100, help='Requests per thread and path')
+        parser.add_argument('--date', default='2099-01-02', help='First day to book on')
+        parser.add_argument(
+            '--plain', action='store_true',
+            help='Also run SQLite with the plain settings for comparison'
+        )
+
+    def handle(self, *args, **options):
+        self.day = datetime.strptime(options['date'], '%Y-%m-%d')
+        self.factory = APIRequestFactory()
+        self.branch = create_bench_branch(tables=40)
+        self.user = User.objects.create_user(username='write-bench', email='write-bench@example.com')
+        self.customer = Customer.objects.create(
+            FirstName='Write', LastName='Bench', Contact='-', Email='write-bench@example.com'
+        )
+        self.menu_items = [
+            MenuItem.objects.create(Name=f'Bench dish {n}', Price=5 + n, Category='Bench').pk
+            for n in range(5)
+        ]
+        profiles = [('configured', {})]
+        if options['plain']:
+            if connection.vendor != 'sqlite':
+                raise CommandError('--plain compares SQLite settings only')
+            profiles.insert(0, ('plain', PLAIN_SQLITE))
+
+        saved = dict(connections.settings[DEFAULT_DB_ALIAS])
+        try:
+            # Throttling is not what is measured here
+            with override_settings(THROTTLE_BUCKETS={}):
+                for name, overrides in profiles:
+                    self.use_settings(dict(saved, **overrides))
+                    for path, request in (('reservation', self.reservation_request),
+                                          ('checkout', self.checkout_request)):
+                        self.report(name, path, *self.run(request, options), options)
+        finally:
+            self.use_settings(saved)
+            Order.objects.filter(ordercustomer__CustomerID=self.customer).delete()
+            EmailOutbox.objects.filter(Recipient=self.customer.Email).delete()
+            MenuItem.objects.filter(pk__in=self.menu_items).delete()
+            self.branch.delete()
+            self.customer.delete()
+            self.user.delete()
+
+    def use_settings(self, settings_dict):
+        # New connections are built from this dict
+        connections.close_all()
+        connections.settings[DEFAULT_DB_ALIAS].clear()
+        connections.settings[DEFAULT_DB_ALIAS].update(settings_dict)
+        connection.ensure_connection()
+
+    def reservation_request(self, rng):
+        # Spread over two months so most requests book rather than clash
+        when = self.day + timedelta(
+            days=rng.randint(0, 59), hours=rng.randint(11, 21), minutes=rng.choice((0, 30))
+        )
+        request = self.factory.post('/api/reservations/create/', {
+            'ReservationDateTime': when.isoformat(),
+            'NumPeople': rng.randint(1, 4),
+            'CustomerID': self.customer.pk,
+            'BranchID': self.branch.pk,
+        }, format='json')
+        force_authenticate(request, user=self.user)
+        return create_reservation(request)
+
+    def checkout_request(self, rng):
+        request = self.factory.post('/api/checkout/', {
+            'PaymentMethod': 'Card',
+            'items': [
+                {'MenuItemID': menu_item, 'Quantity': rng.randint(1, 3)}
+                for menu_item in rng.sample(self.menu_items, 3)
+            ],
+        }, format='json')
+        force_authenticate(request, user=self.user)
+        return checkout(request)
+
+    def run(self, send, options):
+        """
+        Send requests from several threads at once. Returns (seconds,
+        latencies, status counts).
+        """
+        latencies, statuses = [], {}
+        lock = threading.Lock()
+        start = threading.Barrier(options['threads'])
+
+        def worker(seed):
+            rng = random.Random(seed)
+            start.wait()
+            for _ in range(options['requests']):
+                # What request_started/request_finished do around a request
+                close_old_connections()
+                started = time.perf_counter()
+                response = send(rng)
+                elapsed = time.perf_counter() - started
+                close_old_connections()
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            connection.close()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, latencies, statuses
+
+    def report(self, profile, path, elapsed, latencies, statuses, options):
+        self.stdout.write(
+            f'{profile} {path}: {len(latencies) / elapsed:.0f} req/s on {options["threads"]} threads, '
+            f'p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms, '
+            f'statuses {dict(sorted(statuses.items()))}'
+        )
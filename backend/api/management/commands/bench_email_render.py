@@ -0,0 +1,41 @@
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.email_utils import EMAIL_KINDS, render_email
+from api.models import Customer, Reservation
+
+
+class Command(BaseCommand):
+    help = 'Time rendering of the reservation emails for a bulk send'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help='Messages per email kind')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        start = timezone.make_aware(datetime(2099, 1, 1, 11, 0))
+        # Unsaved instances: this measures rendering only, not the database
+        pairs = [
+            (
+                Reservation(
+                    ReservationID=n, ReservationDateTime=start + timedelta(minutes=30 * (n % 24)),
+                    NumPeople=2 + n % 6, TableNumber=1 + n % 20, Status='Confirmed'
+                ),
+                Customer(CustomerID=n, FirstName=f'Guest{n}', LastName='Smith', Email=f'guest{n}@example.com')
+            )
+            for n in range(count)
+        ]
+
+        for kind in EMAIL_KINDS:
+            render_email(kind, *pairs[0])  # load templates and layout
+            started = time.perf_counter()
+            size = 0
+            for reservation, customer in pairs:
+                subject, text, html = render_email(kind, reservation, customer)
+                size += len(text) + len(html)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{kind}: {count} messages in {elapsed:.2f}s, '
+                f'{elapsed / count * 1e6:.0f} us/message, {size / count / 1024:.1f} KiB/message'
+            )
@@ -0,0 +1,88 @@
+import random
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.availability import choose_tables, time_slots
+from api.booking import SlotConflict, book_best_fit
+from api.models import Branch, Reservation, Table
+from api.tables import branch_layout
+from .bench_booking import find_double_bookings
+
+# Seats per table, in floor order; neighbours can be pushed together
+SATURDAY_LAYOUT = [2] * 8 + [4] * 12 + [6] * 6 + [8] * 2
+# Party sizes and how often they book
+PARTY_SIZES = [1, 2, 3, 4, 5, 6, 7, 8, 10, 12, 16]
+PARTY_WEIGHTS = [4, 30, 12, 24, 8, 8, 3, 4, 3, 2, 1]
+
+
+def saturday_requests(day, count, seed=0):
+    """
+    (datetime, party size) booking requests, busiest around 19:00-20:30.
+    """
+    rng = random.Random(seed)
+    slots = time_slots()
+    weights = [6 if '18:30' <= slot <= '20:30' else 3 if '12:00' <= slot <= '14:00' else 1 for slot in slots]
+    requests = []
+    for _ in range(count):
+        hour, minute = map(int, rng.choices(slots, weights)[0].split(':'))
+        when = timezone.make_aware(datetime.combine(day, datetime.min.time())) + timedelta(hours=hour, minutes=minute)
+        requests.append((when, rng.choices(PARTY_SIZES, PARTY_WEIGHTS)[0]))
+    return requests
+
+
+class Command(BaseCommand):
+    help = 'Book a busy simulated Saturday through the automatic table assignment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400, help='Booking requests over the day')
+        parser.add_argument('--date', default='2099-01-03', help='The Saturday to simulate')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark branch and its bookings')
+
+    def handle(self, *args, **options):
+        day = datetime.strptime(options['date'], '%Y-%m-%d').date()
+        branch = Branch.objects.create(Name='Saturday benchmark', Location='-', Contact='-')
+        Table.objects.bulk_create([
+            Table(BranchID=branch, TableNumber=number, Seats=seats)
+            for number, seats in enumerate(SATURDAY_LAYOUT, start=1)
+        ])
+
+        requests = saturday_requests(day, options['requests'])
+        branch_layout(branch.pk)  # warm the layout cache
+
+        booked = rejected = merged = 0
+        guests = 0
+        choose_seconds = 0.0
+        started = time.perf_counter()
+        for when, party_size in requests:
+            tick = time.perf_counter()
+            choose_tables(branch.pk, when, party_size)
+            choose_seconds += time.perf_counter() - tick
+            try:
+                reservation = book_best_fit(branch.pk, when, party_size)
+            except SlotConflict:
+                rejected += 1
+                continue
+            booked += 1
+            guests += party_size
+            merged += bool(reservation.MergedTables)
+        elapsed = time.perf_counter() - started
+
+        clashes = find_double_bookings(Reservation.objects.filter(BranchID=branch))
+        count = len(requests)
+        self.stdout.write(
+            f'{count} requests for {sum(SATURDAY_LAYOUT)} seats on {len(SATURDAY_LAYOUT)} tables: '
+            f'{booked} booked ({merged} on merged tables), {rejected} full, {guests} guests seated'
+        )
+        self.stdout.write(
+            f'assignment {choose_seconds / count * 1e6:.1f} us/booking, '
+            f'end to end {elapsed / count * 1e3:.2f} ms/booking'
+        )
+
+        if not options['keep']:
+            branch.delete()
+
+        if clashes:
+            self.stderr.write(self.style.ERROR(f'{len(clashes)} double bookings: {clashes[:5]}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No double bookings'))
@@ -0,0 +1,63 @@
+import time
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory
+from api.reservation_views import get_available_time_slots
+from api.throttling import TokenBucketThrottle, parse_rate, take_token
+
+PATH = '/api/reservations/time-slots/'
+
+
+class Command(BaseCommand):
+    help = 'Measure the latency token-bucket throttling adds to a public endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--clients', type=int, default=200, help='Distinct client IPs')
+
+    def time_requests(self, requests):
+        started = time.perf_counter()
+        for request in requests:
+            response = get_available_time_slots(request)
+            assert response.status_code == 200, response.status_code
+        return (time.perf_counter() - started) / len(requests)
+
+    def handle(self, *args, **options):
+        count, clients = options['requests'], options['clients']
+        factory = APIRequestFactory()
+        match = resolve(PATH)
+
+        def build():
+            requests = []
+            for n in range(count):
+                request = factory.get(PATH, {'date': '2099-01-01'}, REMOTE_ADDR=f'10.0.{n % clients // 256}.{n % 256}')
+                request.resolver_match = match
+                requests.append(request)
+            return requests
+
+        interval = parse_rate('1000/s')
+        started = time.perf_counter()
+        for n in range(count):
+            take_token(f'throttle:bench:{n % clients}', interval, count)
+        bucket_us = (time.perf_counter() - started) / count * 1e6
+        self.stdout.write(f'take_token: {bucket_us:.1f} us/call')
+
+        # Buckets large enough that nothing is rejected: this measures cost only
+        with override_settings(THROTTLE_BUCKETS={'availability': ('1000/s', count)}):
+            view_class = get_available_time_slots.cls
+            throttles = view_class.throttle_classes
+            self.time_requests(build()[:100])  # warm up
+            try:
+                view_class.throttle_classes = []
+                plain = self.time_requests(build())
+            finally:
+                view_class.throttle_classes = throttles
+            assert throttles == [TokenBucketThrottle]
+            throttled = self.time_requests(build())
+
+        self.stdout.write(
+            f'{count} requests from {clients} clients: '
+            f'{plain * 1e6:.0f} us unthrottled, {throttled * 1e6:.0f} us throttled '
+            f'(+{(throttled - plain) * 1e6:.0f} us, {(throttled / plain - 1) * 100:.1f}%)'
+        )
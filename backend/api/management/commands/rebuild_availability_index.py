@@ -0,0 +1,35 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.availability import get_day_index, invalidate_day_index
+from api.models import Branch
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the cached reservation availability index for a range of days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='First day to rebuild (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--branch', type=int, help='Only this branch (default: all branches)')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            first = date.fromisoformat(options['date'])
+        else:
+            first = timezone.localdate()
+
+        if options['branch']:
+            branch_ids = [options['branch']]
+        else:
+            branch_ids = list(Branch.objects.values_list('pk', flat=True))
+
+        for branch_id in branch_ids:
+            for offset in range(options['days']):
+                day = first + timedelta(days=offset)
+                invalidate_day_index(branch_id, day)
+                get_day_index(branch_id, day)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt availability index for {len(branch_ids)} branches, {options['days']} days from {first}"
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from api.models import Bill
+from api.pricing import recompute_bills
+
+
+class Command(BaseCommand):
+    help = 'Recompute Bill amounts and BillComputation totals from order lines and discounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--since', help='Only bills paid on or after this date (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        bills = Bill.objects.all()
+        if options['since']:
+            bills = bills.filter(PaymentDate__date__gte=options['since'])
+
+        updated = recompute_bills(bills, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {updated} bills'))
@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from api.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Defaults to EMAIL_OUTBOX_BATCH_SIZE')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the outbox is empty')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, retried, dead = drain_outbox(batch_size=options['batch_size'])
+            if sent or retried or dead or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Sent {sent} emails, {retried} to retry, {dead} dead-lettered'
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.reminders import send_reminders
+
+
+class Command(BaseCommand):
+    help = "Email reminders for tomorrow's confirmed reservations"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Reservation day (YYYY-MM-DD), defaults to tomorrow')
+        parser.add_argument('--batch-size', type=int, default=500, help='Messages per send and checkpoint')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            day = date.fromisoformat(options['date'])
+        else:
+            day = timezone.localdate() + timedelta(days=1)
+
+        started = time.perf_counter()
+        sent = send_reminders(day, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {sent} reminders for {day} in {elapsed:.2f}s'
+        ))
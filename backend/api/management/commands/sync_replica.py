@@ -0,0 +1,47 @@
+import sqlite3
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def copy_database(source_alias, replica_alias):
+    """
+    Copy the primary SQLite database into the replica file with SQLite's
+    online backup API. Readers of the replica wait on busy_timeout while
+    the pages are written.
+    """
+    source = connections[source_alias]
+    source.ensure_connection()
+    target = sqlite3.connect(connections[replica_alias].settings_dict['NAME'], timeout=30)
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
+
+
+class Command(BaseCommand):
+    help = 'Refresh the local SQLite read replicas from the primary database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep copying every INTERVAL seconds instead of once'
+        )
+
+    def handle(self, *args, **options):
+        replicas = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if connections[alias].vendor == 'sqlite'
+        ]
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite' or not replicas:
+            raise CommandError('Set SQLITE_REPLICA_PATH with the sqlite DB_PROFILE to use a local replica')
+
+        while True:
+            started = time.perf_counter()
+            for alias in replicas:
+                copy_database(DEFAULT_DB_ALIAS, alias)
+            self.stdout.write(f'Copied to {", ".join(replicas)} in {time.perf_counter() - started:.2f}s')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
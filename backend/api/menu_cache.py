@@ -0,0 +1,80 @@
+# backend/api/menu_cache.py
+"""
+Versioned cache for the public menu reads.
+
+Rendered JSON bodies are stored under the current menu version, which is
+bumped whenever a MenuItem is saved or deleted (see api/signals.py). A bump
+makes every older body unreachable, so nothing has to be deleted, and the
+version doubles as the ETag so clients can revalidate with 304s.
+
+The default cache is per process and a bump only reaches the worker that
+saved the item, so the version itself expires after MENU_VERSION_TTL and
+every worker picks up edits within that time.
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .metrics import CACHE_LOOKUPS
+
+MENU_VERSION_KEY = 'menu:version'
+MENU_MODIFIED_KEY = 'menu:modified'
+
+
+def get_menu_version():
+    version = cache.get(MENU_VERSION_KEY)
+    if version is None:
+        # Start from the clock rather than 1 so a lost version key can
+        # never line up with bodies cached under an earlier version.
+        now = time.time()
+        if cache.add(MENU_VERSION_KEY, int(now * 1000), settings.MENU_VERSION_TTL):
+            cache.set(MENU_MODIFIED_KEY, now, settings.MENU_VERSION_TTL)
+        version = cache.get(MENU_VERSION_KEY)
+    return version
+
+
+def bump_menu_version():
+    try:
+        cache.incr(MENU_VERSION_KEY)
+    except ValueError:
+        get_menu_version()
+    cache.set(MENU_MODIFIED_KEY, time.time(), settings.MENU_VERSION_TTL)
+
+
+def get_menu_modified():
+    modified = cache.get(MENU_MODIFIED_KEY)
+    if modified is None:
+        get_menu_version()
+        modified = cache.get(MENU_MODIFIED_KEY, time.time())
+    return int(modified)
+
+
+def cached_menu_response(request, variant, render):
+    """
+    Serve the menu body for `variant` (e.g. the request path and query),
+    calling render() to build the JSON bytes only on a cache miss.
+    Answers 304 Not Modified to a matching If-None-Match/If-Modified-Since.
+    """
+    version = get_menu_version()
+    modified = get_menu_modified()
+    digest = hashlib.md5(variant.encode()).hexdigest()[:12]
+    etag = f'"menu-{version}-{digest}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=modified)
+    if response is None:
+        key = f'menu:{version}:{digest}'
+        body = cache.get(key)
+        CACHE_LOOKUPS.inc(cache='menu', result='miss' if body is None else 'hit')
+        if body is None:
+            body = render()
+            cache.set(key, body, settings.MENU_CACHE_TTL)
+        response = HttpResponse(body, content_type='application/json')
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modified)
+    # Clients may keep the body but must revalidate before reusing it
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,310 @@
+# backend/api/metrics.py
+"""
+Counters and histograms shared by all worker processes, and their
+Prometheus text exposition for GET /metrics.
+
+With METRICS_DIR set, each process writes its values to its own
+memory-mapped file in that directory (<pid>.db), so updates never wait on
+another process: a write is a struct update under the process's own
+thread lock. A scrape reads every file in the directory and adds them up.
+Files of exited workers are kept, so their counts stay in the totals and
+counters never go backwards. Clear the directory when the whole server is
+restarted, as for prometheus_client's multiprocess mode.
+
+Without METRICS_DIR (runserver, tests) the values live in process memory.
+
+Each value is stored under a JSON key [name, {labels}]. Histogram buckets
+are stored per bucket and made cumulative when they are rendered.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+from django.conf import settings
+
+# File layout: an 8-byte used-size header, then entries of
+# (4-byte key length, key padded to 8 bytes, 8-byte double)
+_HEADER = struct.Struct('q')
+_LENGTH = struct.Struct('i')
+_VALUE = struct.Struct('d')
+INITIAL_FILE_SIZE = 1024 * 1024
+
+_registry = {}
+
+
+class MemoryStore:
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, increments):
+        with self._lock:
+            for key, amount in increments:
+                self._values[key] = self._values.get(key, 0) + amount
+
+    def read(self):
+        with self._lock:
+            return dict(self._values)
+
+
+class FileStore:
+    """
+    This process's values in a memory-mapped file; see read_directory()
+    for the other side.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._offsets = {}
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.truncate(INITIAL_FILE_SIZE)
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        # A restarted process with the same pid continues the old file
+        for key, _, offset in _entries(self._map, self._used):
+            self._offsets[key] = offset
+
+    def inc(self, increments):
+        with self._lock:
+            for key, amount in increments:
+                offset = self._offsets.get(key)
+                if offset is None:
+                    offset = self._add(key)
+                _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def _add(self, key):
+        encoded = key.encode()
+        padded = len(encoded) + (-(_LENGTH.size + len(encoded)) % 8)
+        size = _LENGTH.size + padded + _VALUE.size
+        if self._used + size > len(self._map):
+            self._grow(self._used + size)
+        _LENGTH.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + _LENGTH.size:self._used + _LENGTH.size + len(encoded)] = encoded
+        offset = self._used + _LENGTH.size + padded
+        _VALUE.pack_into(self._map, offset, 0.0)
+        # Publish the entry only once it is complete
+        self._used += size
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+    def _grow(self, needed):
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def read(self):
+        return read_directory(os.path.dirname(self.path))
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _entries(data, used):
+    position = _HEADER.size
+    while position < used:
+        length = _LENGTH.unpack_from(data, position)[0]
+        key = bytes(data[position + _LENGTH.size:position + _LENGTH.size + length]).decode()
+        offset = position + _LENGTH.size + length + (-(_LENGTH.size + length) % 8)
+        yield key, _VALUE.unpack_from(data, offset)[0], offset
+        position = offset + _VALUE.size
+
+
+def read_directory(directory):
+    """
+    Sum of the values in every process's file under `directory`.
+    """
+    totals = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.db'):
+            continue
+        with open(os.path.join(directory, name), 'rb') as f:
+            data = f.read()
+        if len(data) < _HEADER.size:
+            continue
+        for key, value, _ in _entries(data, _HEADER.unpack_from(data, 0)[0]):
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    The store of the current process. Reopened after a fork, so workers
+    forked from a preloaded master get their own file.
+    """
+    global _store
+    store = _store
+    if store is not None and store.pid == os.getpid():
+        return store
+    with _store_lock:
+        if _store is None or _store.pid != os.getpid():
+            if settings.METRICS_DIR:
+                os.makedirs(settings.METRICS_DIR, exist_ok=True)
+                _store = FileStore(os.path.join(settings.METRICS_DIR, f'{os.getpid()}.db'))
+            else:
+                _store = MemoryStore()
+            _store.pid = os.getpid()
+        return _store
+
+
+def reset_store():
+    """
+    Forget the current store, e.g. when METRICS_DIR changes (see
+    api/signals.py). Values in memory are dropped; files are left alone.
+    """
+    global _store
+    with _store_lock:
+        if isinstance(_store, FileStore):
+            _store.close()
+        _store = None
+
+
+@lru_cache(maxsize=4096)
+def _key(name, labels):
+    # `labels` is a sorted tuple of pairs, so the key is built once
+    return json.dumps([name, dict(labels)], separators=(',', ':'))
+
+
+def collect():
+    """
+    {(name, ((label, value), ...)): value} across all processes.
+    """
+    samples = {}
+    for key, value in get_store().read().items():
+        name, labels = json.loads(key)
+        samples[(name, tuple(sorted(labels.items())))] = value
+    return samples
+
+
+class Counter:
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        _registry[name] = self
+
+    def inc(self, amount=1, **labels):
+        get_store().inc([(_key(self.name, tuple(sorted(labels.items()))), amount)])
+
+
+class Histogram:
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(float(bound) for bound in buckets)
+        _registry[name] = self
+
+    def increments(self, value, labels):
+        labels = tuple(sorted(labels.items()))
+        bucket_keys, count_key, sum_key = self._keys(labels)
+        return [
+            (bucket_keys[bisect_left(self.buckets, value)], 1),
+            (count_key, 1),
+            (sum_key, value),
+        ]
+
+    @lru_cache(maxsize=1024)
+    def _keys(self, labels):
+        bucket_keys = [
+            _key(f'{self.name}_bucket', tuple(sorted(labels + (('le', le),))))
+            for le in [repr(bound) for bound in self.buckets] + ['+Inf']
+        ]
+        return bucket_keys, _key(f'{self.name}_count', labels), _key(f'{self.name}_sum', labels)
+
+    def observe(self, value, **labels):
+        get_store().inc(self.increments(value, labels))
+
+
+CACHE_LOOKUPS = Counter('cache_lookups_total', 'Cache reads by cache and result (hit or miss)')
+
+
+def observe_many(observations):
+    """
+    Record several (histogram, value, labels) at once, taking the store's
+    lock once.
+    """
+    increments = []
+    for histogram, value, labels in observations:
+        increments += histogram.increments(value, labels)
+    get_store().inc(increments)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _sample(name, labels, value):
+    if labels:
+        name += '{' + ','.join(f'{label}="{_escape(v)}"' for label, v in labels) + '}'
+    return f'{name} {value}'
+
+
+def histogram_series(histogram, samples):
+    """
+    {labels: ([(le, cumulative count), ...], count, sum)} for `histogram`.
+    """
+    bounds = [repr(bound) for bound in histogram.buckets] + ['+Inf']
+    series = {}
+    for (name, labels), value in samples.items():
+        if name == f'{histogram.name}_bucket':
+            labels = dict(labels)
+            le = labels.pop('le')
+            entry = series.setdefault(tuple(sorted(labels.items())), [dict.fromkeys(bounds, 0), 0, 0])
+            entry[0][le] = value
+        elif name in (f'{histogram.name}_count', f'{histogram.name}_sum'):
+            entry = series.setdefault(labels, [dict.fromkeys(bounds, 0), 0, 0])
+            entry[1 if name.endswith('_count') else 2] = value
+
+    result = {}
+    for labels, (counts, count, total) in series.items():
+        cumulative, running = [], 0
+        for le in bounds:
+            running += counts[le]
+            cumulative.append((le, running))
+        result[labels] = (cumulative, count, total)
+    return result
+
+
+def render(gauges=(), samples=None):
+    """
+    The text exposition of every registered metric plus `gauges`, a list of
+    (name, documentation, {labels tuple: value}) computed by the caller.
+    """
+    samples = collect() if samples is None else samples
+    lines = []
+    for name, metric in sorted(_registry.items()):
+        lines += [f'# HELP {name} {metric.documentation}']
+        if isinstance(metric, Counter):
+            lines.append(f'# TYPE {name} counter')
+            for (sample_name, labels), value in sorted(samples.items()):
+                if sample_name == name:
+                    lines.append(_sample(name, labels, int(value)))
+        else:
+            lines.append(f'# TYPE {name} histogram')
+            for labels, (buckets, count, total) in sorted(histogram_series(metric, samples).items()):
+                for le, value in buckets:
+                    lines.append(_sample(f'{name}_bucket', labels + (('le', le),), int(value)))
+                lines.append(_sample(f'{name}_count', labels, int(count)))
+                lines.append(_sample(f'{name}_sum', labels, float(total)))
+
+    for name, documentation, values in gauges:
+        lines += [f'# HELP {name} {documentation}', f'# TYPE {name} gauge']
+        for labels, value in sorted(values.items()):
+            lines.append(_sample(name, labels, value))
+    return '\n'.join(lines) + '\n'
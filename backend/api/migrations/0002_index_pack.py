@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:29
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_unique_customer_emails(apps, schema_editor):
+    # Fail with the offending rows rather than a bare IntegrityError, so they
+    # can be merged by hand before the unique index goes on
+    Customer = apps.get_model("api", "Customer")
+    duplicates = (
+        Customer.objects.values("Email")
+        .annotate(count=Count("pk"))
+        .filter(count__gt=1)
+        .order_by("Email")
+    )
+    rows = [
+        f"{row['Email']!r}: CustomerID "
+        + ", ".join(
+            str(pk)
+            for pk in Customer.objects.filter(Email=row["Email"])
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        for row in duplicates
+    ]
+    if rows:
+        raise RuntimeError(
+            "Customer.Email must be unique; merge these customers first:\n  "
+            + "\n  ".join(rows)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_unique_customer_emails, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="customer",
+            name="Email",
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name="bill",
+            index=models.Index(fields=["PaymentDate"], name="bill_payment_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["OrderDate"], name="order_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["Status", "OrderDate"], name="order_status_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["TableNumber", "ReservationDateTime"],
+                name="reservation_table_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["ReservationDateTime", "Status"],
+                name="reservation_time_status_idx",
+            ),
+        ),
+    ]
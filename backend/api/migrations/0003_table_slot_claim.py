@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:34
+
+import django.db.models.deletion
+from datetime import datetime, timezone as dt_timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copy of api.booking.claim_slot_starts as of this migration, so that
+# later changes to the app code cannot change what it backfills: every
+# 30-minute slot touching one hour either side of the reservation
+SLOT_SECONDS = 30 * 60
+HALF_WINDOW_SECONDS = 60 * 60
+
+
+def claim_slot_starts(reservation_dt):
+    if timezone.is_naive(reservation_dt):
+        reservation_dt = timezone.make_aware(reservation_dt)
+    ts = reservation_dt.timestamp()
+    first = int((ts - HALF_WINDOW_SECONDS) // SLOT_SECONDS)
+    last = int((ts + HALF_WINDOW_SECONDS) // SLOT_SECONDS)
+    return [
+        datetime.fromtimestamp(slot * SLOT_SECONDS, tz=dt_timezone.utc)
+        for slot in range(first, last + 1)
+    ]
+
+
+def backfill_claims(apps, schema_editor):
+    # Existing double bookings cannot be claimed twice; the first one wins
+    Reservation = apps.get_model("api", "Reservation")
+    TableSlotClaim = apps.get_model("api", "TableSlotClaim")
+    active = Reservation.objects.filter(Status__in=["Confirmed", "Pending"]).order_by(
+        "pk"
+    )
+    claims = [
+        TableSlotClaim(
+            TableNumber=reservation.TableNumber,
+            SlotStart=slot_start,
+            ReservationID_id=reservation.pk,
+        )
+        for reservation in active.iterator()
+        for slot_start in claim_slot_starts(reservation.ReservationDateTime)
+    ]
+    TableSlotClaim.objects.bulk_create(claims, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_index_pack"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TableSlotClaim",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("TableNumber", models.IntegerField()),
+                ("SlotStart", models.DateTimeField()),
+                (
+                    "ReservationID",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="api.reservation",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("TableNumber", "SlotStart")},
+            },
+        ),
+        migrations.RunPython(backfill_claims, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_table_slot_claim"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailOutbox",
+            fields=[
+                ("EmailID", models.AutoField(primary_key=True, serialize=False)),
+                ("Recipient", models.CharField(max_length=100)),
+                ("Subject", models.CharField(max_length=255)),
+                ("TextBody", models.TextField()),
+                ("HtmlBody", models.TextField(blank=True)),
+                (
+                    "Status",
+                    models.CharField(
+                        choices=[
+                            ("Pending", "Pending"),
+                            ("Sent", "Sent"),
+                            ("Failed", "Failed"),
+                        ],
+                        default="Pending",
+                        max_length=20,
+                    ),
+                ),
+                ("Attempts", models.IntegerField(default=0)),
+                (
+                    "NextAttemptAt",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("LastError", models.TextField(blank=True)),
+                ("CreatedAt", models.DateTimeField(auto_now_add=True)),
+                ("SentAt", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["Status", "NextAttemptAt"], name="outbox_status_due_idx"
+                    )
+                ],
+            },
+        ),
+    ]
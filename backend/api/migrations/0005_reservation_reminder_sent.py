@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_email_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reservation",
+            name="ReminderSentAt",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,138 @@
+import django.db.models.deletion
+from datetime import datetime, timezone as dt_timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copy of api.booking.claim_slot_starts as of this migration, so that
+# later changes to the app code cannot change what it backfills: every
+# 30-minute slot touching one hour either side of the reservation
+SLOT_SECONDS = 30 * 60
+HALF_WINDOW_SECONDS = 60 * 60
+
+
+def claim_slot_starts(reservation_dt):
+    if timezone.is_naive(reservation_dt):
+        reservation_dt = timezone.make_aware(reservation_dt)
+    ts = reservation_dt.timestamp()
+    first = int((ts - HALF_WINDOW_SECONDS) // SLOT_SECONDS)
+    last = int((ts + HALF_WINDOW_SECONDS) // SLOT_SECONDS)
+    return [
+        datetime.fromtimestamp(slot * SLOT_SECONDS, tz=dt_timezone.utc)
+        for slot in range(first, last + 1)
+    ]
+
+
+# The layout the reservation views hardcoded before tables were configurable
+DEFAULT_TABLE_NUMBERS = range(1, 21)
+DEFAULT_SEATS = 4
+
+
+def seed_tables_and_branches(apps, schema_editor):
+    """
+    Give every branch the old 20-table layout and move existing
+    reservations to the first branch.
+    """
+    Branch = apps.get_model("api", "Branch")
+    Table = apps.get_model("api", "Table")
+    Reservation = apps.get_model("api", "Reservation")
+
+    Table.objects.bulk_create(
+        [
+            Table(BranchID_id=branch_id, TableNumber=number, Seats=DEFAULT_SEATS)
+            for branch_id in Branch.objects.values_list("pk", flat=True)
+            for number in DEFAULT_TABLE_NUMBERS
+        ]
+    )
+    first_branch = Branch.objects.order_by("pk").first()
+    if first_branch is not None:
+        Reservation.objects.filter(BranchID__isnull=True).update(BranchID=first_branch)
+
+
+def rebuild_claims(apps, schema_editor):
+    Reservation = apps.get_model("api", "Reservation")
+    TableSlotClaim = apps.get_model("api", "TableSlotClaim")
+    active = Reservation.objects.filter(
+        Status__in=["Confirmed", "Pending"], BranchID__isnull=False
+    ).order_by("pk")
+    claims = [
+        TableSlotClaim(
+            BranchID_id=reservation.BranchID_id,
+            TableNumber=reservation.TableNumber,
+            SlotStart=slot_start,
+            ReservationID_id=reservation.pk,
+        )
+        for reservation in active.iterator()
+        for slot_start in claim_slot_starts(reservation.ReservationDateTime)
+    ]
+    TableSlotClaim.objects.bulk_create(claims, batch_size=1000, ignore_conflicts=True)
+
+
+def clear_claims(apps, schema_editor):
+    apps.get_model("api", "TableSlotClaim").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_reservation_reminder_sent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Table",
+            fields=[
+                ("TableID", models.AutoField(primary_key=True, serialize=False)),
+                ("TableNumber", models.IntegerField()),
+                ("Seats", models.IntegerField()),
+                ("Combinable", models.BooleanField(default=True)),
+                (
+                    "BranchID",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="api.branch"
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("BranchID", "TableNumber")},
+            },
+        ),
+        migrations.AddField(
+            model_name="reservation",
+            name="BranchID",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="api.branch",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["BranchID", "ReservationDateTime"],
+                name="reservation_branch_time_idx",
+            ),
+        ),
+        migrations.RunPython(seed_tables_and_branches, migrations.RunPython.noop),
+        # Claims are rebuilt below with their branch
+        migrations.RunPython(clear_claims, clear_claims),
+        migrations.AlterUniqueTogether(
+            name="tableslotclaim",
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name="tableslotclaim",
+            name="BranchID",
+            field=models.ForeignKey(
+                default=None,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="api.branch",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AlterUniqueTogether(
+            name="tableslotclaim",
+            unique_together={("BranchID", "TableNumber", "SlotStart")},
+        ),
+        migrations.RunPython(rebuild_claims, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_branch_tables"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reservation",
+            name="MergedTables",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_reservation_merged_tables"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevokedToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("JTI", models.CharField(max_length=255, unique=True)),
+                ("ExpiresAt", models.DateTimeField(db_index=True)),
+                ("RevokedAt", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,390 @@
+# backend/api/mixins.py
+"""
+Behaviour shared by the router viewsets and their serializers.
+
+Sparse fieldsets and nested expansion:
+
+    GET /api/order-details/?fields=OrderID,Quantity
+    GET /api/order-details/?expand=OrderID,MenuItemID
+    GET /api/orders/?expand=orderdetail_set,bill_set
+
+`fields` limits both the serialized columns and the SQL (via .only()).
+`expand` replaces a foreign-key id with the related object, loaded with
+select_related (forward relations) or prefetch_related (reverse ones).
+Both only apply to GET requests, so writes keep using plain ids.
+
+Bulk writes on the collection route:
+
+    POST   /api/inventory/   [{...}, {...}]
+    PATCH  /api/inventory/   [{"ItemID": 1, "QuantityAvailable": 12}, ...]
+    DELETE /api/inventory/   {"ids": [1, 2, 3]}  (or ?ids=1,2,3)
+"""
+from collections import namedtuple
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.validators import UniqueTogetherValidator
+
+Relation = namedtuple('Relation', ['model', 'many', 'forward'])
+
+# Values per IN (...) lookup in the batch unique_together check
+UNIQUE_CHECK_CHUNK_SIZE = 500
+
+
+def parse_field_list(request, param):
+    """
+    Return the comma-separated names in ?<param>= as a set,
+    or None if the parameter is absent or this is not a read.
+    """
+    if request is None or request.method != 'GET':
+        return None
+    value = request.query_params.get(param)
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+@lru_cache(maxsize=None)
+def expandable_relations(model):
+    """
+    Map each expandable name on `model` to its related model.
+    Forward relations use the field name (e.g. OrderID); reverse ones use
+    the accessor name (e.g. orderdetail_set, billcomputation).
+    """
+    relations = {}
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.many_to_many:
+            continue
+        if field.concrete:
+            relations[field.name] = Relation(field.related_model, False, True)
+        else:
+            relations[field.get_accessor_name()] = Relation(
+                field.related_model, field.one_to_many, False
+            )
+    return relations
+
+
+@lru_cache(maxsize=None)
+def nested_serializer_class(model):
+    meta = type('Meta', (), {'model': model, 'fields': '__all__'})
+    return type(f'{model.__name__}NestedSerializer', (serializers.ModelSerializer,), {'Meta': meta})
+
+
+class DynamicFieldsSerializerMixin:
+    """
+    Honour ?fields= and ?expand= from the request in the serializer context.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        fields = parse_field_list(request, 'fields')
+        expand = parse_field_list(request, 'expand') or set()
+
+        relations = expandable_relations(self.Meta.model)
+        for name in expand & set(relations):
+            relation = relations[name]
+            self.fields[name] = nested_serializer_class(relation.model)(
+                many=relation.many, read_only=True
+            )
+
+        if fields is not None:
+            for name in set(self.fields) - fields - expand:
+                self.fields.pop(name)
+
+
+class SparseFieldsMixin:
+    """
+    Narrow the viewset queryset to match ?fields= and ?expand=.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        model = queryset.model
+        relations = expandable_relations(model)
+
+        expand = (parse_field_list(self.request, 'expand') or set()) & set(relations)
+        select = [name for name in expand if relations[name].forward]
+        prefetch = [name for name in expand if not relations[name].forward]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+
+        fields = parse_field_list(self.request, 'fields')
+        if fields:
+            concrete = {field.name for field in model._meta.concrete_fields}
+            # Keep the key, anything being joined and the pagination ordering
+            ordering = {
+                name.lstrip('-') for name in getattr(self, 'pagination_ordering', ())
+            }
+            only = (fields | set(select) | ordering) & concrete
+            only.add(model._meta.pk.name)
+            queryset = queryset.only(*only)
+
+        return queryset
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolve ids from the objects BulkMixin loaded up front (one in_bulk
+    query per foreign key) instead of one .get() per item.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded', {}).get(self.queryset.model)
+        if preloaded is None or isinstance(data, bool):
+            return super().to_internal_value(data)
+        try:
+            pk = self.queryset.model._meta.pk.to_python(data)
+        except (DjangoValidationError, TypeError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return preloaded[pk]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class BulkSerializerMixin:
+    """
+    In bulk mode, unique_together is checked once for the whole batch by
+    BulkMixin rather than with one query per item.
+    """
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+
+    def get_validators(self):
+        validators = super().get_validators()
+        if self.context.get('bulk'):
+            validators = [v for v in validators if not isinstance(v, UniqueTogetherValidator)]
+        return validators
+
+
+class BulkMixin:
+    """
+    List payloads for create, partial update and delete.
+
+    Every item is validated first and errors are returned keyed by item
+    index; nothing is written unless all items are valid. Writes go through
+    bulk_create/bulk_update in one transaction. Viewsets with side effects
+    override perform_bulk_create/perform_bulk_update/perform_bulk_destroy.
+    """
+
+    def get_max_bulk_size(self):
+        return getattr(settings, 'API_MAX_BULK_SIZE', 1000)
+
+    def _check_bulk_size(self, items):
+        if not items:
+            return Response({'error': 'Expected a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.get_max_bulk_size():
+            return Response(
+                {'error': f'At most {self.get_max_bulk_size()} items per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return None
+
+    def _preload_related(self, model, items):
+        """
+        Load the related objects referenced by the payload, one query per
+        foreign key, for PreloadedPrimaryKeyRelatedField.
+        """
+        preloaded = {}
+        for field in model._meta.concrete_fields:
+            if not field.is_relation:
+                continue
+            ids = set()
+            for item in items:
+                if isinstance(item, dict) and item.get(field.name) is not None:
+                    try:
+                        ids.add(field.target_field.to_python(item[field.name]))
+                    except (DjangoValidationError, TypeError):
+                        pass  # reported by the per-item validation
+            if ids:
+                related = preloaded.setdefault(field.related_model, {})
+                related.update(field.related_model._default_manager.in_bulk(ids))
+        return preloaded
+
+    def _validate_items(self, items, instances=None):
+        model = self.get_queryset().model
+        context = self.get_serializer_context()
+        context['bulk'] = True
+        context['preloaded'] = self._preload_related(model, items)
+        serializer_class = self.get_serializer_class()
+
+        valid, errors = [], {}
+        for index, item in enumerate(items):
+            instance = instances[index] if instances is not None else None
+            serializer = serializer_class(
+                instance, data=item, partial=instance is not None, context=context
+            )
+            if serializer.is_valid():
+                valid.append(serializer)
+            else:
+                errors[index] = serializer.errors
+        return valid, errors
+
+    def _unique_together_errors(self, model, serializers_):
+        """
+        Detect unique_together clashes within the batch and against
+        existing rows. For updates each item's key is its instance's current
+        values overlaid with the validated data, and rows of the batch are
+        compared by their new keys only. Existing rows are loaded by the
+        first field (chunked, so a full batch stays within the database's
+        parameter and expression limits) and compared in Python.
+        """
+        errors = {}
+        batch_pks = {s.instance.pk for s in serializers_ if s.instance is not None}
+        for fields in model._meta.unique_together:
+            keys = [self._unique_key(model, serializer, fields) for serializer in serializers_]
+            first_values = list({key[0] for key in keys if None not in key})
+            existing = set()
+            for start in range(0, len(first_values), UNIQUE_CHECK_CHUNK_SIZE):
+                rows = model._default_manager.filter(**{
+                    f'{fields[0]}__in': first_values[start:start + UNIQUE_CHECK_CHUNK_SIZE]
+                }).values_list('pk', *fields)
+                existing.update(tuple(row[1:]) for row in rows if row[0] not in batch_pks)
+
+            seen = set()
+            for index, key in enumerate(keys):
+                if None in key:
+                    continue  # NULLs never clash
+                if key in existing or key in seen:
+                    errors[index] = {'non_field_errors': [
+                        f'The fields {", ".join(fields)} must make a unique set.'
+                    ]}
+                seen.add(key)
+        return errors
+
+    @staticmethod
+    def _unique_key(model, serializer, fields):
+        key = []
+        for name in fields:
+            if name in serializer.validated_data:
+                value = serializer.validated_data[name]
+                key.append(getattr(value, 'pk', value))
+            elif serializer.instance is not None:
+                key.append(getattr(serializer.instance, model._meta.get_field(name).attname))
+            else:
+                key.append(None)
+        return tuple(key)
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+
+        items = request.data
+        error = self._check_bulk_size(items)
+        if error:
+            return error
+
+        model = self.get_queryset().model
+        serializers_, errors = self._validate_items(items)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        errors = self._unique_together_errors(model, serializers_)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                objs = self.perform_bulk_create(
+                    [model(**serializer.validated_data) for serializer in serializers_]
+                )
+        except IntegrityError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(objs, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_partial_update(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'error': 'Expected a list'}, status=status.HTTP_400_BAD_REQUEST)
+        error = self._check_bulk_size(items)
+        if error:
+            return error
+
+        model = self.get_queryset().model
+        pk_name = model._meta.pk.name
+        ids, errors = [], {}
+        for index, item in enumerate(items):
+            try:
+                ids.append(model._meta.pk.to_python(item[pk_name]))
+            except (KeyError, TypeError, DjangoValidationError):
+                ids.append(None)
+                errors[index] = {pk_name: ['This field is required.']}
+
+        instances_by_pk = self.get_queryset().in_bulk([pk for pk in ids if pk is not None])
+        for index, pk in enumerate(ids):
+            if pk is not None and pk not in instances_by_pk:
+                errors[index] = {pk_name: [f'Not found: {pk}']}
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        instances = [instances_by_pk[pk] for pk in ids]
+        serializers_, errors = self._validate_items(items, instances)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        errors = self._unique_together_errors(model, serializers_)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        fields = set()
+        for serializer in serializers_:
+            for attr, value in serializer.validated_data.items():
+                setattr(serializer.instance, attr, value)
+                fields.add(attr)
+        fields.discard(pk_name)
+
+        objs = [serializer.instance for serializer in serializers_]
+        try:
+            with transaction.atomic():
+                objs = self.perform_bulk_update(objs, sorted(fields))
+        except IntegrityError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(objs, many=True)
+        return Response(serializer.data)
+
+    def bulk_destroy(self, request, *args, **kwargs):
+        ids = request.query_params.get('ids')
+        if ids:
+            ids = ids.split(',')
+        elif isinstance(request.data, dict):
+            ids = request.data.get('ids')
+        if not isinstance(ids, list):
+            return Response({'error': 'Expected a list of ids'}, status=status.HTTP_400_BAD_REQUEST)
+        error = self._check_bulk_size(ids)
+        if error:
+            return error
+
+        model = self.get_queryset().model
+        try:
+            ids = {model._meta.pk.to_python(pk) for pk in ids}
+        except (DjangoValidationError, TypeError):
+            return Response({'error': 'Invalid id in list'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(pk__in=ids)
+            found = set(queryset.values_list('pk', flat=True))
+            self.perform_bulk_destroy(queryset)
+
+        return Response({
+            'success': True,
+            'deleted': len(found),
+            'not_found': sorted(ids - found)
+        })
+
+    def perform_bulk_create(self, objs):
+        return self.get_queryset().model.objects.bulk_create(objs)
+
+    def perform_bulk_update(self, objs, fields):
+        if fields:
+            self.get_queryset().model.objects.bulk_update(objs, fields)
+        return objs
+
+    def perform_bulk_destroy(self, queryset):
+        queryset.delete()
@@ -2,6 +2,7 @@ from django.db import models
 
 # Create your models here.
 from django.db import models
+from django.utils import timezone
 
 # -------------------------
 # 1. CUSTOMER
@@ -11,7 +12,7 @@ class Customer(models.Model):
     FirstName = models.CharField(max_length=50)
     LastName = models.CharField(max_length=50)
     Contact = models.CharField(max_length=20)
-    Email = models.CharField(max_length=100)
+    Email = models.CharField(max_length=100, unique=True)
     LoyaltyPoints = models.IntegerField(default=0)
 
     def __str__(self):
@@ -77,6 +78,12 @@ class Order(models.Model):
     OrderDate = models.DateTimeField()
     Status = models.CharField(max_length=50)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['OrderDate'], name='order_date_idx'),
+            models.Index(fields=['Status', 'OrderDate'], name='order_status_date_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.OrderID}"
 
@@ -105,6 +112,11 @@ class Bill(models.Model):
     PaymentDate = models.DateTimeField()
     OrderID = models.ForeignKey(Order, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['PaymentDate'], name='bill_payment_date_idx'),
+        ]
+
     def __str__(self):
         return f"Bill {self.BillID}"
 
@@ -150,9 +162,25 @@ class Reservation(models.Model):
     ReservationID = models.AutoField(primary_key=True)
     ReservationDateTime = models.DateTimeField()
     NumPeople = models.IntegerField()
+    # Table numbers are per branch (see Table)
+    BranchID = models.ForeignKey(Branch, on_delete=models.CASCADE, null=True, blank=True)
     TableNumber = models.IntegerField()
+    # Further tables pushed together with TableNumber for a large party
+    MergedTables = models.JSONField(default=list, blank=True)
     Status = models.CharField(max_length=50)
     Confirmed = models.BooleanField(default=False)
+    # Set by the send_reminders command; a rerun skips these
+    ReminderSentAt = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Overlap check in create_reservation
+            models.Index(fields=['TableNumber', 'ReservationDateTime'], name='reservation_table_time_idx'),
+            # Window scans in get_available_tables
+            models.Index(fields=['ReservationDateTime', 'Status'], name='reservation_time_status_idx'),
+            # Per-branch day loads for the availability index
+            models.Index(fields=['BranchID', 'ReservationDateTime'], name='reservation_branch_time_idx'),
+        ]
 
     def __str__(self):
         return f"Reservation {self.ReservationID}"
@@ -267,3 +295,84 @@ class OrderStaff(models.Model):
 
     class Meta:
         unique_together = ('OrderID', 'StaffID')
+
+
+# -------------------------
+# 22. TABLE SLOT CLAIM (Composite Key)
+# -------------------------
+class TableSlotClaim(models.Model):
+    # One row per table per 30-minute slot held by an active reservation;
+    # the unique key makes a double booking fail at insert time
+    BranchID = models.ForeignKey(Branch, on_delete=models.CASCADE)
+    TableNumber = models.IntegerField()
+    SlotStart = models.DateTimeField()
+    ReservationID = models.ForeignKey(Reservation, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ('BranchID', 'TableNumber', 'SlotStart')
+
+
+# -------------------------
+# 23. EMAIL OUTBOX
+# -------------------------
+class EmailOutbox(models.Model):
+    STATUS_PENDING = 'Pending'
+    STATUS_SENT = 'Sent'
+    STATUS_FAILED = 'Failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    EmailID = models.AutoField(primary_key=True)
+    Recipient = models.CharField(max_length=100)
+    Subject = models.CharField(max_length=255)
+    TextBody = models.TextField()
+    HtmlBody = models.TextField(blank=True)
+    Status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    Attempts = models.IntegerField(default=0)
+    NextAttemptAt = models.DateTimeField(default=timezone.now)
+    LastError = models.TextField(blank=True)
+    CreatedAt = models.DateTimeField(auto_now_add=True)
+    SentAt = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Due messages for the send_outbox worker
+            models.Index(fields=['Status', 'NextAttemptAt'], name='outbox_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Email {self.EmailID} to {self.Recipient} ({self.Status})"
+
+
+# -------------------------
+# 24. TABLE
+# -------------------------
+class Table(models.Model):
+    TableID = models.AutoField(primary_key=True)
+    BranchID = models.ForeignKey(Branch, on_delete=models.CASCADE)
+    TableNumber = models.IntegerField()
+    Seats = models.IntegerField()
+    # Can be pushed together with neighbouring tables for larger parties
+    Combinable = models.BooleanField(default=True)
+
+    class Meta:
+        unique_together = ('BranchID', 'TableNumber')
+
+    def __str__(self):
+        return f"Table {self.TableNumber} ({self.Seats} seats)"
+
+
+# -------------------------
+# 25. REVOKED TOKEN
+# -------------------------
+class RevokedToken(models.Model):
+    # Keyed by the token's jti claim; see api/authentication.py
+    JTI = models.CharField(max_length=255, unique=True)
+    ExpiresAt = models.DateTimeField(db_index=True)
+    RevokedAt = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Revoked token {self.JTI}"
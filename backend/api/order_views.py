@@ -0,0 +1,56 @@
+# backend/api/order_views.py
+from django.db.models import Prefetch
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from .models import Customer, Order, OrderDetail, Bill
+from .pagination import OrderHistoryPagination
+from .serializers import OrderHistorySerializer
+from .tokens import request_customer_id
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_my_orders(request):
+    """
+    Get the current user's orders with line items, menu items and bills.
+    Runs a fixed number of queries per page regardless of order size.
+    """
+    try:
+        customer_id = request_customer_id(request)
+
+        orders = Order.objects.filter(
+            ordercustomer__CustomerID_id=customer_id
+        ).prefetch_related(
+            Prefetch(
+                'orderdetail_set',
+                queryset=OrderDetail.objects.select_related('MenuItemID')
+            ),
+            Prefetch(
+                'bill_set',
+                queryset=Bill.objects.select_related('billcomputation').order_by('BillID')
+            ),
+        )
+
+        paginator = OrderHistoryPagination()
+        page = paginator.paginate_queryset(orders, request)
+        serializer = OrderHistorySerializer(page, many=True)
+
+        return Response({
+            'success': True,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'orders': serializer.data
+        })
+
+    except Customer.DoesNotExist:
+        return Response(
+            {'error': 'Customer profile not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -0,0 +1,129 @@
+# backend/api/outbox.py
+"""
+Transactional email outbox.
+
+Views never talk to SMTP. They call queue_email() inside the same
+transaction as the change the email describes, so a rolled-back booking
+sends nothing and a committed one is never lost. The send_outbox command
+drains due rows in batches over a single backend connection.
+
+A failed message is retried with exponential backoff
+(EMAIL_OUTBOX_RETRY_SECONDS * 2 ** attempts, capped at
+EMAIL_OUTBOX_MAX_RETRY_SECONDS). After EMAIL_OUTBOX_MAX_ATTEMPTS it is
+marked Failed and left for inspection in the admin (the dead letters).
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import EmailOutbox
+
+# How long a claimed batch is hidden from other workers while it is sent
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def queue_email(recipient, subject, text_body, html_body=''):
+    return EmailOutbox.objects.create(
+        Recipient=recipient,
+        Subject=subject,
+        TextBody=text_body,
+        HtmlBody=html_body
+    )
+
+
+def retry_delay(attempts):
+    seconds = settings.EMAIL_OUTBOX_RETRY_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.EMAIL_OUTBOX_MAX_RETRY_SECONDS))
+
+
+def claim_batch(batch_size):
+    """
+    Lock up to `batch_size` due messages and push their NextAttemptAt past
+    the lease, so concurrent workers pick different rows.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(Status=EmailOutbox.STATUS_PENDING, NextAttemptAt__lte=now)
+            .order_by('NextAttemptAt', 'EmailID')[:batch_size]
+        )
+        if batch:
+            EmailOutbox.objects.filter(pk__in=[email.pk for email in batch]).update(
+                NextAttemptAt=now + CLAIM_LEASE
+            )
+    return batch
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.Subject,
+        body=email.TextBody,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.Recipient],
+        connection=connection
+    )
+    if email.HtmlBody:
+        message.attach_alternative(email.HtmlBody, 'text/html')
+    return message
+
+
+def deliver_batch(batch, connection):
+    """
+    Send each claimed message over `connection` and record the outcome.
+    Returns (sent, retried, dead) counts.
+    """
+    sent = retried = dead = 0
+    max_attempts = settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    for email in batch:
+        email.Attempts += 1
+        try:
+            connection.open()  # no-op while the connection is up
+            build_message(email, connection).send()
+        except Exception as e:
+            # Drop a possibly broken connection; the next message reopens it
+            connection.close()
+            email.LastError = f'{type(e).__name__}: {e}'
+            if email.Attempts >= max_attempts:
+                email.Status = EmailOutbox.STATUS_FAILED
+                dead += 1
+            else:
+                email.NextAttemptAt = timezone.now() + retry_delay(email.Attempts)
+                retried += 1
+        else:
+            email.Status = EmailOutbox.STATUS_SENT
+            email.SentAt = timezone.now()
+            email.LastError = ''
+            sent += 1
+
+    EmailOutbox.objects.bulk_update(
+        batch, ['Status', 'Attempts', 'NextAttemptAt', 'LastError', 'SentAt']
+    )
+    return sent, retried, dead
+
+
+def drain_outbox(batch_size=None, max_batches=None):
+    """
+    Deliver due messages until none are left (or `max_batches` is reached),
+    reusing one backend connection for every batch.
+    Returns (sent, retried, dead) totals.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    totals = [0, 0, 0]
+    batches = 0
+    connection = None
+    try:
+        while max_batches is None or batches < max_batches:
+            batch = claim_batch(batch_size)
+            if not batch:
+                break
+            if connection is None:
+                connection = get_connection(fail_silently=False)
+            for index, count in enumerate(deliver_batch(batch, connection)):
+                totals[index] += count
+            batches += 1
+    finally:
+        if connection is not None:
+            connection.close()
+    return tuple(totals)
@@ -0,0 +1,33 @@
+# backend/api/pagination.py
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Default pagination for the router viewsets.
+
+    Pages are fetched with a WHERE on the ordering key rather than an
+    OFFSET, so deep pages cost the same as the first one. A viewset can
+    set `pagination_ordering` (e.g. newest first by date); otherwise rows
+    are ordered by primary key.
+    """
+    ordering = ('pk',)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 200)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'pagination_ordering', None)
+        if ordering:
+            return tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+
+class OrderHistoryPagination(KeysetPagination):
+    """
+    Newest orders first; OrderID breaks ties between orders placed
+    at the same instant so the cursor stays stable.
+    """
+    ordering = ('-OrderDate', '-OrderID')
+    page_size = 10
+    max_page_size = 50
@@ -0,0 +1,192 @@
+# backend/api/pricing.py
+"""
+Server-side pricing engine.
+
+All money is handled as Decimal and rounded to cents with ROUND_HALF_UP.
+Discount percentages are added together (capped at 100%) and tax is charged
+on the discounted subtotal.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import MenuItem, Discount, Bill, BillComputation, OrderDetail, Applies
+
+CENTS = Decimal('0.01')
+ZERO = Decimal('0.00')
+HUNDRED = Decimal('100')
+
+
+class PricingError(ValueError):
+    """Raised when a cart or discount cannot be priced."""
+
+
+def get_tax_rate():
+    return Decimal(str(getattr(settings, 'TAX_RATE', '0.18')))
+
+
+def _cents(value):
+    return value.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def compute_totals(subtotal, percentages=(), tax_rate=None):
+    """
+    Apply discount percentages and tax to a subtotal.
+    Returns a dict with the four Bill/BillComputation amounts.
+    """
+    if tax_rate is None:
+        tax_rate = get_tax_rate()
+    subtotal = _cents(Decimal(subtotal))
+    percentage = min(sum(percentages, Decimal('0')), HUNDRED)
+    discount_amount = _cents(subtotal * percentage / HUNDRED)
+    tax_amount = _cents((subtotal - discount_amount) * tax_rate)
+    return {
+        'TotalBeforeDiscount': subtotal,
+        'DiscountAmount': discount_amount,
+        'TaxAmount': tax_amount,
+        'TotalAmount': subtotal - discount_amount + tax_amount,
+    }
+
+
+def parse_cart(items):
+    """
+    Normalise a cart payload into {MenuItemID: quantity}.
+    Repeated lines for the same menu item are merged, since
+    OrderDetail is unique per (OrderID, MenuItemID).
+    """
+    if not isinstance(items, list) or not items:
+        raise PricingError('Cart is empty')
+
+    quantities = {}
+    for item in items:
+        try:
+            menu_item_id = int(item['MenuItemID'])
+            quantity = int(item.get('Quantity', item.get('quantity')))
+        except (KeyError, TypeError, ValueError):
+            raise PricingError('Each cart item needs a MenuItemID and Quantity')
+        if quantity <= 0:
+            raise PricingError('Quantity must be greater than zero')
+        quantities[menu_item_id] = quantities.get(menu_item_id, 0) + quantity
+    return quantities
+
+
+def get_active_discounts(discount_ids):
+    """
+    Load the requested discounts in one query, rejecting any that do not
+    exist or are outside their StartDate/EndDate window today.
+    """
+    try:
+        discount_ids = {int(d) for d in discount_ids if d}
+    except (TypeError, ValueError):
+        raise PricingError('Discount IDs must be integers')
+    if not discount_ids:
+        return []
+    today = timezone.localdate()
+    discounts = list(Discount.objects.filter(
+        DiscountID__in=discount_ids,
+        StartDate__lte=today,
+        EndDate__gte=today
+    ))
+    if len(discounts) != len(discount_ids):
+        raise PricingError('Discount is invalid or has expired')
+    return discounts
+
+
+def quote_cart(quantities, discounts=()):
+    """
+    Price a cart of {MenuItemID: quantity}.
+    All menu item prices are loaded with a single query.
+    """
+    menu_items = MenuItem.objects.in_bulk(list(quantities))
+    missing = [i for i in quantities if i not in menu_items]
+    if missing:
+        raise PricingError(f'Menu items not found: {missing}')
+    unavailable = [menu_items[i].Name for i in quantities if not menu_items[i].Availability]
+    if unavailable:
+        raise PricingError(f'Menu items not available: {", ".join(unavailable)}')
+
+    lines = []
+    subtotal = Decimal('0')
+    for menu_item_id, quantity in quantities.items():
+        item = menu_items[menu_item_id]
+        line_total = item.Price * quantity
+        subtotal += line_total
+        lines.append({
+            'MenuItemID': menu_item_id,
+            'Name': item.Name,
+            'Price': item.Price,
+            'Quantity': quantity,
+            'LineTotal': _cents(line_total),
+        })
+
+    totals = compute_totals(subtotal, [d.Percentage for d in discounts])
+    totals['lines'] = lines
+    totals['discounts'] = [
+        {'DiscountID': d.DiscountID, 'Name': d.Name, 'Percentage': d.Percentage}
+        for d in discounts
+    ]
+    totals['TaxRate'] = get_tax_rate()
+    return totals
+
+
+def recompute_bills(bills=None, batch_size=1000):
+    """
+    Recompute Bill amounts and BillComputation.TotalAmount from the
+    order lines and applied discounts.
+
+    Works in batches of `batch_size` bills; each batch costs a fixed number
+    of queries (bills, line subtotals, discounts, bulk update, upsert)
+    no matter how many bills it holds. Returns the number of bills updated.
+    """
+    if bills is None:
+        bills = Bill.objects.all()
+    bill_ids = list(bills.order_by('BillID').values_list('BillID', flat=True))
+    tax_rate = get_tax_rate()
+    updated = 0
+
+    for start in range(0, len(bill_ids), batch_size):
+        chunk = bill_ids[start:start + batch_size]
+        chunk_bills = list(Bill.objects.filter(BillID__in=chunk).only(
+            'BillID', 'OrderID', 'TotalBeforeDiscount', 'DiscountAmount', 'TaxAmount'
+        ))
+
+        subtotals = dict(
+            OrderDetail.objects
+            .filter(OrderID__in={b.OrderID_id for b in chunk_bills})
+            .values('OrderID')
+            .annotate(subtotal=Sum(F('Quantity') * F('MenuItemID__Price')))
+            .values_list('OrderID', 'subtotal')
+        )
+
+        percentages = {}
+        for bill_id, percentage in Applies.objects.filter(
+            BillID__in=chunk
+        ).values_list('BillID', 'DiscountID__Percentage'):
+            percentages.setdefault(bill_id, []).append(percentage)
+
+        computations = []
+        for bill in chunk_bills:
+            totals = compute_totals(
+                subtotals.get(bill.OrderID_id) or ZERO,
+                percentages.get(bill.BillID, ()),
+                tax_rate
+            )
+            bill.TotalBeforeDiscount = totals['TotalBeforeDiscount']
+            bill.DiscountAmount = totals['DiscountAmount']
+            bill.TaxAmount = totals['TaxAmount']
+            computations.append(
+                BillComputation(BillID=bill, TotalAmount=totals['TotalAmount'])
+            )
+
+        Bill.objects.bulk_update(
+            chunk_bills, ['TotalBeforeDiscount', 'DiscountAmount', 'TaxAmount']
+        )
+        BillComputation.objects.bulk_create(
+            computations,
+            update_conflicts=True,
+            unique_fields=['BillID'],
+            update_fields=['TotalAmount']
+        )
+        updated += len(chunk_bills)
+
+    return updated
@@ -0,0 +1,81 @@
+# backend/api/reminders.py
+"""
+Reminder emails for the next day's confirmed reservations.
+
+Recipients are read in keyset pages of one joined query each
+(ReservationCustomer -> Reservation, Customer), messages are rendered
+lazily by a generator, and each page is sent with send_messages() over a
+single backend connection. After every page the reservations are stamped
+with ReminderSentAt, so an interrupted run resumes where it stopped.
+"""
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+from .email_utils import render_email
+from .models import Reservation, ReservationCustomer
+
+
+def pending_reminders(day, page_size):
+    """
+    Yield pages of ReservationCustomer rows (with reservation and customer
+    joined) for confirmed reservations on `day` that have no reminder yet.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    rows = ReservationCustomer.objects.filter(
+        ReservationID__ReservationDateTime__gte=start,
+        ReservationID__ReservationDateTime__lt=start + timedelta(days=1),
+        ReservationID__Status='Confirmed',
+        ReservationID__ReminderSentAt__isnull=True
+    ).select_related('ReservationID', 'CustomerID').order_by('ReservationID', 'pk')
+
+    last_reservation_id = 0
+    while True:
+        # One row of lookahead tells whether the last reservation is split
+        # across pages; a checkpoint must cover whole reservations
+        fetched = list(rows.filter(ReservationID__gt=last_reservation_id)[:page_size + 1])
+        if not fetched:
+            return
+        page = fetched[:page_size]
+        trailing = page[-1].ReservationID_id
+        if len(fetched) > page_size and fetched[-1].ReservationID_id == trailing:
+            page = [row for row in page if row.ReservationID_id != trailing]
+            if not page:
+                page = list(rows.filter(ReservationID=trailing))
+        last_reservation_id = page[-1].ReservationID_id
+        yield page
+
+
+def reminder_messages(rows, connection):
+    """
+    Render one reminder per row, lazily.
+    """
+    for row in rows:
+        subject, text, html = render_email('reservation_reminder', row.ReservationID, row.CustomerID)
+        message = EmailMultiAlternatives(
+            subject=subject,
+            body=text,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[row.CustomerID.Email],
+            connection=connection
+        )
+        message.attach_alternative(html, 'text/html')
+        yield message
+
+
+def send_reminders(day, batch_size=500):
+    """
+    Send reminders for `day` and return how many messages went out.
+    """
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    sent = 0
+    try:
+        for page in pending_reminders(day, batch_size):
+            sent += connection.send_messages(list(reminder_messages(page, connection))) or 0
+            reservation_ids = [key for key, _ in groupby(row.ReservationID_id for row in page)]
+            Reservation.objects.filter(pk__in=reservation_ids).update(ReminderSentAt=timezone.now())
+    finally:
+        connection.close()
+    return sent
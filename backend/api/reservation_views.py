@@ -3,80 +3,116 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.db import transaction
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime
 from .models import Reservation, ReservationCustomer, Customer
 from .serializers import ReservationSerializer
-from .email_utils import send_reservation_confirmation_email, send_reservation_cancellation_email
+from .email_utils import queue_reservation_confirmation_email, queue_reservation_cancellation_email
+from .availability import SLOT_MINUTES, as_aware, time_slots, day_availability, occupied_tables
+from .booking import InvalidTable, InvalidTime, SlotConflict, book_best_fit, book_reservation
+from .tables import default_branch_id, tables_for_party
+from .tokens import request_customer_id
+
+
+def _branch_and_party(params):
+    """
+    (branch_id, party_size) from ?branch= and ?party=. The branch defaults
+    to the first one; no party size means every table. Raises ValueError.
+    """
+    branch = params.get('branch')
+    branch_id = int(branch) if branch else default_branch_id()
+    party = params.get('party')
+    party_size = int(party) if party else None
+    if party_size is not None and party_size < 1:
+        raise ValueError('party must be at least 1')
+    return branch_id, party_size
+
+
+def book_for_customer(customer, branch_id, reservation_datetime, num_people, table_number=None):
+    """
+    Book a table (the best fit if none is given), link the customer and
+    queue the confirmation email, all in one transaction. Raises
+    SlotConflict, InvalidTable or InvalidTime.
+    """
+    with transaction.atomic():
+        # Claim the table; fails with 409 if it is taken within 2 hours,
+        # including by a booking racing this one
+        if table_number:
+            reservation = book_reservation(branch_id, reservation_datetime, num_people, table_number)
+        else:
+            reservation = book_best_fit(branch_id, reservation_datetime, num_people)
+
+        # Link to customer
+        ReservationCustomer.objects.create(
+            ReservationID=reservation,
+            CustomerID=customer
+        )
+
+        # Queue confirmation email; it is only sent if the booking commits
+        queue_reservation_confirmation_email(reservation, customer)
+    return reservation
+
+
+def cancel_for_customer(reservation, customer):
+    """
+    Cancel the reservation and queue the cancellation email.
+    """
+    with transaction.atomic():
+        reservation.Status = 'Cancelled'
+        reservation.Confirmed = False
+        reservation.save()
+        queue_reservation_cancellation_email(reservation, customer)
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_reservation(request):
     """
-    Create a new reservation with email confirmation
+    Create a new reservation and queue its confirmation email
     """
     try:
         # Extract data
         reservation_datetime = request.data.get('ReservationDateTime')
         num_people = request.data.get('NumPeople')
         table_number = request.data.get('TableNumber')
-        customer_id = request.data.get('CustomerID')
+        branch_id = request.data.get('BranchID') or default_branch_id()
         
-        # Validation
-        if not all([reservation_datetime, num_people, table_number, customer_id]):
+        # Validation (TableNumber is optional; without it a table is chosen)
+        if not all([reservation_datetime, num_people]):
             return Response(
-                {'error': 'All fields are required'},
+                {'error': 'ReservationDateTime and NumPeople are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if table is available
-        reservation_dt = datetime.fromisoformat(reservation_datetime.replace('Z', '+00:00'))
-        
-        # Check for overlapping reservations (same table, same time +/- 2 hours)
-        time_window_start = reservation_dt - timedelta(hours=2)
-        time_window_end = reservation_dt + timedelta(hours=2)
-        
-        overlapping = Reservation.objects.filter(
-            TableNumber=table_number,
-            ReservationDateTime__gte=time_window_start,
-            ReservationDateTime__lte=time_window_end,
-            Status__in=['Confirmed', 'Pending']
-        ).exists()
-        
-        if overlapping:
+        # The customer is the one in the token; CustomerID in the body is
+        # optional and must match it
+        customer_id = request_customer_id(request)
+        if request.data.get('CustomerID') not in (None, '', customer_id, str(customer_id)):
             return Response(
-                {'error': 'This table is not available at the selected time. Please choose another time or table.'},
-                status=status.HTTP_400_BAD_REQUEST
+                {'error': 'You can only book reservations for yourself'},
+                status=status.HTTP_403_FORBIDDEN
             )
         
-        # Create reservation
-        reservation = Reservation.objects.create(
-            ReservationDateTime=reservation_datetime,
-            NumPeople=num_people,
-            TableNumber=table_number,
-            Status='Confirmed',
-            Confirmed=True
-        )
-        
-        # Link to customer
-        ReservationCustomer.objects.create(
-            ReservationID=reservation,
-            CustomerID_id=customer_id
-        )
-        
         # Get customer for email
         customer = Customer.objects.get(CustomerID=customer_id)
         
-        # Send confirmation email
-        email_sent = send_reservation_confirmation_email(reservation, customer)
+        reservation = book_for_customer(
+            customer, branch_id, reservation_datetime.replace('Z', '+00:00'), num_people, table_number
+        )
         
         return Response({
             'success': True,
             'message': 'Reservation created successfully!',
             'reservation': ReservationSerializer(reservation).data,
-            'email_sent': email_sent
+            'email_queued': True
         }, status=status.HTTP_201_CREATED)
         
+    except (SlotConflict, InvalidTable, InvalidTime) as e:
+        return Response(
+            {'error': str(e.detail)},
+            status=e.status_code
+        )
     except Customer.DoesNotExist:
         return Response(
             {'error': 'Customer not found'},
@@ -96,12 +132,12 @@ def get_my_reservations(request):
     Get all reservations for the current user
     """
     try:
-        # Get customer ID from user
-        customer = Customer.objects.get(Email=request.user.email)
+        # Customer ID from the access token
+        customer_id = request_customer_id(request)
         
         # Get reservation links
         reservation_links = ReservationCustomer.objects.filter(
-            CustomerID=customer
+            CustomerID_id=customer_id
         ).select_related('ReservationID')
         
         # Get reservations
@@ -131,40 +167,35 @@ def get_my_reservations(request):
 @permission_classes([IsAuthenticated])
 def cancel_reservation(request, reservation_id):
     """
-    Cancel a reservation and send cancellation email
+    Cancel a reservation and queue the cancellation email
     """
     try:
         # Get reservation
         reservation = Reservation.objects.get(ReservationID=reservation_id)
         
         # Get customer
-        reservation_customer = ReservationCustomer.objects.get(
+        reservation_customer = ReservationCustomer.objects.select_related('CustomerID').get(
             ReservationID=reservation
         )
         customer = reservation_customer.CustomerID
         
         # Verify it's the user's reservation
-        if customer.Email != request.user.email:
+        if customer.CustomerID != request_customer_id(request):
             return Response(
                 {'error': 'You can only cancel your own reservations'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Update status
-        reservation.Status = 'Cancelled'
-        reservation.Confirmed = False
-        reservation.save()
-        
-        # Send cancellation email
-        email_sent = send_reservation_cancellation_email(reservation, customer)
+        # Update status and queue the cancellation email
+        cancel_for_customer(reservation, customer)
         
         return Response({
             'success': True,
             'message': 'Reservation cancelled successfully',
-            'email_sent': email_sent
+            'email_queued': True
         })
         
-    except Reservation.DoesNotExist:
+    except (Reservation.DoesNotExist, ReservationCustomer.DoesNotExist):
         return Response(
             {'error': 'Reservation not found'},
             status=status.HTTP_404_NOT_FOUND
@@ -192,28 +223,28 @@ def get_available_tables(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Parse datetime
-        reservation_datetime = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-        
-        # Time window (2 hours before and after)
-        time_window_start = reservation_datetime - timedelta(hours=2)
-        time_window_end = reservation_datetime + timedelta(hours=2)
+        try:
+            branch_id, party_size = _branch_and_party(request.query_params)
+        except ValueError:
+            return Response(
+                {'error': 'branch and party must be positive integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Get occupied tables
-        occupied_tables = Reservation.objects.filter(
-            ReservationDateTime__gte=time_window_start,
-            ReservationDateTime__lte=time_window_end,
-            Status__in=['Confirmed', 'Pending']
-        ).values_list('TableNumber', flat=True)
+        # Parse datetime
+        reservation_datetime = as_aware(
+            datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+        )
         
-        # Total tables in restaurant (1-20)
-        all_tables = list(range(1, 21))
-        available_tables = [t for t in all_tables if t not in occupied_tables]
+        # Tables booked within 2 hours either side, from the availability index
+        occupied = occupied_tables(branch_id, reservation_datetime)
+        available_tables = [t for t in tables_for_party(branch_id, party_size) if t not in occupied]
         
         return Response({
             'success': True,
+            'branch': branch_id,
             'available_tables': available_tables,
-            'occupied_tables': list(occupied_tables),
+            'occupied_tables': occupied,
             'date': date_str,
             'time': time_str
         })
@@ -242,18 +273,10 @@ def get_available_time_slots(request):
         
         # Restaurant hours: 11:00 AM to 11:00 PM
         # Time slots every 30 minutes
-        time_slots = []
-        
-        for hour in range(11, 23):  # 11 AM to 11 PM
-            for minute in [0, 30]:
-                if hour == 22 and minute == 30:  # Stop at 10:30 PM
-                    break
-                time_slots.append(f"{hour:02d}:{minute:02d}")
-        
         return Response({
             'success': True,
             'date': date_str,
-            'time_slots': time_slots,
+            'time_slots': time_slots(),
             'restaurant_hours': {
                 'open': '11:00',
                 'close': '23:00'
@@ -264,4 +287,51 @@ def get_available_time_slots(request):
         return Response(
             {'error': str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_availability(request):
+    """
+    Get free tables for every time slot of a date in one response
+    """
+    try:
+        date_str = request.query_params.get('date')
+
+        if not date_str:
+            return Response(
+                {'error': 'Date is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            day = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            return Response(
+                {'error': 'Date must be in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            branch_id, party_size = _branch_and_party(request.query_params)
+        except ValueError:
+            return Response(
+                {'error': 'branch and party must be positive integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'success': True,
+            'date': date_str,
+            'slot_minutes': SLOT_MINUTES,
+            'branch': branch_id,
+            'tables': tables_for_party(branch_id, party_size),
+            'slots': day_availability(branch_id, day, party_size)
+        })
+
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
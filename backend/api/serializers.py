@@ -3,130 +3,234 @@ from .models import (
     Customer, Branch, Staff, WorksAt, MenuItem, Order, OrderDetail, Bill,
     BillComputation, Discount, Applies, Reservation, ReservationCustomer,
     Feedback, FeedbackOrder, Supplier, FoodChallenge, ChallengeParticipation,
-    Inventory, OrderCustomer, OrderStaff
+    Inventory, OrderCustomer, OrderStaff, Table
 )
+from .booking import InvalidTime, check_slot_grid
+from .instrumentation import TimedSerializerMixin
+from .mixins import DynamicFieldsSerializerMixin, BulkSerializerMixin
 
-class CustomerSerializer(serializers.ModelSerializer):
+
+class DynamicFieldsModelSerializer(
+    TimedSerializerMixin, DynamicFieldsSerializerMixin, BulkSerializerMixin, serializers.ModelSerializer
+):
+    """
+    Base for the router serializers; supports ?fields=, ?expand= and
+    bulk payloads (see api/mixins.py). Serializing is timed per request
+    (see api/instrumentation.py).
+    """
+
+
+class CustomerSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Customer
         fields = '__all__'
 
 
-class BranchSerializer(serializers.ModelSerializer):
+class BranchSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Branch
         fields = '__all__'
 
 
-class StaffSerializer(serializers.ModelSerializer):
+class StaffSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Staff
         fields = '__all__'
 
 
-class WorksAtSerializer(serializers.ModelSerializer):
+class WorksAtSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = WorksAt
         fields = '__all__'
 
 
-class MenuItemSerializer(serializers.ModelSerializer):
+class MenuItemSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = MenuItem
         fields = '__all__'
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Order
         fields = '__all__'
 
 
-class OrderDetailSerializer(serializers.ModelSerializer):
+class OrderDetailSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = OrderDetail
         fields = '__all__'
 
 
-class BillSerializer(serializers.ModelSerializer):
+class BillSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Bill
         fields = '__all__'
+        # Amounts are computed server-side by api.pricing
+        read_only_fields = ('TotalBeforeDiscount', 'DiscountAmount', 'TaxAmount')
 
 
-class BillComputationSerializer(serializers.ModelSerializer):
+class BillComputationSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = BillComputation
         fields = '__all__'
+        read_only_fields = ('TotalAmount',)
 
 
-class DiscountSerializer(serializers.ModelSerializer):
+class DiscountSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Discount
         fields = '__all__'
 
 
-class AppliesSerializer(serializers.ModelSerializer):
+class AppliesSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Applies
         fields = '__all__'
 
 
-class ReservationSerializer(serializers.ModelSerializer):
+class ReservationSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Reservation
         fields = '__all__'
+        read_only_fields = ('ReminderSentAt',)
 
+    def validate_ReservationDateTime(self, value):
+        # Slot claims only match the overlap rule for on-grid times
+        try:
+            check_slot_grid(value)
+        except InvalidTime as e:
+            raise serializers.ValidationError(e.detail)
+        return value
 
-class ReservationCustomerSerializer(serializers.ModelSerializer):
+
+class ReservationCustomerSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = ReservationCustomer
         fields = '__all__'
 
 
-class FeedbackSerializer(serializers.ModelSerializer):
+class FeedbackSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Feedback
         fields = '__all__'
 
 
-class FeedbackOrderSerializer(serializers.ModelSerializer):
+class FeedbackOrderSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = FeedbackOrder
         fields = '__all__'
 
 
-class SupplierSerializer(serializers.ModelSerializer):
+class SupplierSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Supplier
         fields = '__all__'
 
 
-class FoodChallengeSerializer(serializers.ModelSerializer):
+class FoodChallengeSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = FoodChallenge
         fields = '__all__'
 
 
-class ChallengeParticipationSerializer(serializers.ModelSerializer):
+class ChallengeParticipationSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = ChallengeParticipation
         fields = '__all__'
 
 
-class InventorySerializer(serializers.ModelSerializer):
+class InventorySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Inventory
         fields = '__all__'
 
 
-class OrderCustomerSerializer(serializers.ModelSerializer):
+class OrderCustomerSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = OrderCustomer
         fields = '__all__'
 
 
-class OrderStaffSerializer(serializers.ModelSerializer):
+class OrderStaffSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = OrderStaff
         fields = '__all__'
+
+
+class TableSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = Table
+        fields = '__all__'
+
+
+class QuoteLineSerializer(serializers.Serializer):
+    MenuItemID = serializers.IntegerField()
+    Name = serializers.CharField()
+    Price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    Quantity = serializers.IntegerField()
+    LineTotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class QuoteDiscountSerializer(serializers.Serializer):
+    DiscountID = serializers.IntegerField()
+    Name = serializers.CharField()
+    Percentage = serializers.DecimalField(max_digits=5, decimal_places=2)
+
+
+class QuoteSerializer(TimedSerializerMixin, serializers.Serializer):
+    lines = QuoteLineSerializer(many=True)
+    discounts = QuoteDiscountSerializer(many=True)
+    TotalBeforeDiscount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    DiscountAmount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    TaxRate = serializers.DecimalField(max_digits=5, decimal_places=4)
+    TaxAmount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    TotalAmount = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class OrderHistoryMenuItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MenuItem
+        fields = ('MenuItemID', 'Name', 'Price', 'Category')
+
+
+class OrderHistoryItemSerializer(serializers.ModelSerializer):
+    menuItem = OrderHistoryMenuItemSerializer(source='MenuItemID', read_only=True)
+
+    class Meta:
+        model = OrderDetail
+        fields = ('MenuItemID', 'Quantity', 'menuItem')
+
+
+class OrderHistoryBillSerializer(serializers.ModelSerializer):
+    TotalAmount = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Bill
+        fields = (
+            'BillID', 'TotalBeforeDiscount', 'DiscountAmount', 'TaxAmount',
+            'TotalAmount', 'PaymentMethod', 'PaymentDate'
+        )
+
+    def get_TotalAmount(self, bill):
+        try:
+            return str(bill.billcomputation.TotalAmount)
+        except BillComputation.DoesNotExist:
+            return str(bill.TotalBeforeDiscount - bill.DiscountAmount + bill.TaxAmount)
+
+
+class OrderHistorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    An order with its line items and bill, for the customer's order history.
+    Expects orderdetail_set (with MenuItemID) and bill_set to be prefetched.
+    """
+    items = OrderHistoryItemSerializer(source='orderdetail_set', many=True, read_only=True)
+    bill = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Order
+        fields = ('OrderID', 'OrderDate', 'Status', 'items', 'bill')
+
+    def get_bill(self, order):
+        bills = order.bill_set.all()
+        return OrderHistoryBillSerializer(bills[0]).data if bills else None
@@ -0,0 +1,102 @@
+# backend/api/signals.py
+from django.db import transaction
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import MenuItem, Reservation, Branch, Table
+from .menu_cache import bump_menu_version
+from .availability import as_aware, index_save, index_remove
+from .booking import sync_claims
+from .tables import bump_tables_version
+from .email_utils import prerendered_layout
+from .instrumentation import instrument_query
+from .metrics import reset_store
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def invalidate_menu_cache(sender, **kwargs):
+    # Bump after commit so no reader can cache pre-commit data
+    # under the new version
+    transaction.on_commit(bump_menu_version)
+
+
+@receiver(pre_save, sender=Reservation)
+def remember_reservation_time(sender, instance, update_fields=None, **kwargs):
+    # A rescheduled or moved reservation must also leave its old index bucket
+    instance._previous_placement = None
+    if update_fields is not None and not {'ReservationDateTime', 'BranchID'} & set(update_fields):
+        return
+    if instance.pk is not None:
+        instance._previous_placement = (
+            Reservation.objects.filter(pk=instance.pk)
+            .values_list('BranchID', 'ReservationDateTime').first()
+        )
+
+
+@receiver(post_save, sender=Reservation)
+def index_saved_reservation(sender, instance, **kwargs):
+    reservation_id = instance.pk
+    branch_id = instance.BranchID_id
+    table_numbers = [instance.TableNumber, *instance.MergedTables]
+    reservation_dt = as_aware(instance.ReservationDateTime)
+    reservation_status = instance.Status
+    previous = getattr(instance, '_previous_placement', None)
+
+    def sync():
+        if previous is not None:
+            previous_branch_id, previous_dt = previous
+            if (previous_branch_id != branch_id
+                    or timezone.localtime(previous_dt).date() != timezone.localtime(reservation_dt).date()):
+                index_remove(previous_branch_id, reservation_id, previous_dt)
+        index_save(branch_id, reservation_id, table_numbers, reservation_dt, reservation_status)
+
+    transaction.on_commit(sync)
+
+
+@receiver(post_save, sender=Reservation)
+def claim_reservation_slots(sender, instance, update_fields=None, **kwargs):
+    # Runs inside the caller's transaction so a clash rolls back the save;
+    # see api/booking.py
+    if update_fields is not None and not {'ReservationDateTime', 'BranchID', 'TableNumber', 'MergedTables', 'Status'} & set(update_fields):
+        return
+    sync_claims([instance])
+
+
+@receiver(post_delete, sender=Reservation)
+def unindex_deleted_reservation(sender, instance, **kwargs):
+    branch_id = instance.BranchID_id
+    reservation_id = instance.pk
+    reservation_dt = instance.ReservationDateTime
+    transaction.on_commit(lambda: index_remove(branch_id, reservation_id, reservation_dt))
+
+
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+@receiver(post_save, sender=Branch)
+@receiver(post_delete, sender=Branch)
+def invalidate_table_layouts(sender, **kwargs):
+    transaction.on_commit(bump_tables_version)
+
+
+@receiver(setting_changed)
+def reset_email_layouts(setting, **kwargs):
+    # The pre-rendered layouts embed these settings
+    if setting.startswith('RESTAURANT_') or setting in ('DEFAULT_FROM_EMAIL', 'TEMPLATES'):
+        prerendered_layout.cache_clear()
+
+
+@receiver(setting_changed)
+def reopen_metrics_store(setting, **kwargs):
+    if setting == 'METRICS_DIR':
+        reset_store()
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # First in line, so that a caller's `with connection.execute_wrapper()`
+    # still pops its own wrapper; reconnects keep the one already there
+    if instrument_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, instrument_query)
@@ -0,0 +1,156 @@
+# backend/api/stats_views.py
+import hmac
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum, F
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from .availability import ACTIVE_STATUSES
+from .db_router import replica_reads
+from .instrumentation import request_metrics
+from .metrics import CACHE_LOOKUPS, collect, render
+from .models import Customer, MenuItem, Order, Reservation, BillComputation, Inventory, EmailOutbox
+from .pricing import CENTS
+
+DASHBOARD_STATS_CACHE_KEY = 'stats:dashboard'
+OPEN_ORDER_STATUSES = ['Pending', 'Preparing', 'Ready']
+LOW_STOCK_LIMIT = 10
+
+
+def _today_range():
+    """
+    Start and end of today in the current timezone, so the date filters
+    below are plain range comparisons instead of per-row date casts.
+    """
+    today = timezone.localdate()
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    return today, start, start + timedelta(days=1)
+
+
+def compute_dashboard_stats():
+    """
+    Build the dashboard figures with SQL aggregates only;
+    no table is loaded row by row.
+    """
+    today, day_start, day_end = _today_range()
+
+    orders = Order.objects.aggregate(
+        total=Count('OrderID'),
+        open=Count('OrderID', filter=Q(Status__in=OPEN_ORDER_STATUSES)),
+    )
+    reservations = Reservation.objects.aggregate(
+        total=Count('ReservationID'),
+        today=Count('ReservationID', filter=Q(
+            ReservationDateTime__gte=day_start,
+            ReservationDateTime__lt=day_end,
+        ) & ~Q(Status='Cancelled')),
+    )
+    revenue = BillComputation.objects.filter(
+        BillID__PaymentDate__gte=day_start,
+        BillID__PaymentDate__lt=day_end,
+    ).aggregate(total=Sum('TotalAmount'))['total']
+
+    low_stock = Inventory.objects.filter(QuantityAvailable__lte=F('ReorderLevel'))
+
+    return {
+        'date': today.isoformat(),
+        'totalCustomers': Customer.objects.count(),
+        'totalOrders': orders['total'],
+        'totalMenuItems': MenuItem.objects.count(),
+        'totalReservations': reservations['total'],
+        'openOrders': orders['open'],
+        'todayReservations': reservations['today'],
+        'todayRevenue': str(Decimal(revenue or 0).quantize(CENTS)),
+        'lowStockCount': low_stock.count(),
+        'lowStockItems': list(
+            low_stock.order_by('QuantityAvailable')
+            .values('ItemID', 'ItemName', 'QuantityAvailable', 'ReorderLevel')[:LOW_STOCK_LIMIT]
+        ),
+        'generatedAt': timezone.now().isoformat(),
+    }
+
+
+@replica_reads
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_dashboard_stats(request):
+    """
+    Get dashboard counts and today's figures, cached for a short TTL
+    """
+    try:
+        stats = cache.get(DASHBOARD_STATS_CACHE_KEY)
+        if stats is None:
+            stats = compute_dashboard_stats()
+            cache.set(DASHBOARD_STATS_CACHE_KEY, stats, settings.DASHBOARD_STATS_TTL)
+
+        return Response({
+            'success': True,
+            'stats': stats
+        })
+
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_request_metrics(request):
+    """
+    Get the per-route query, timing and size histograms from the store in
+    api/metrics.py, summed over every worker's file when METRICS_DIR is set
+    """
+    return Response({
+        'success': True,
+        'sample_rate': 1 if settings.DEBUG else settings.REQUEST_METRICS_SAMPLE_RATE,
+        'routes': request_metrics()
+    })
+
+
+def _cache_hit_ratios(samples):
+    lookups = {}
+    for (name, labels), value in samples.items():
+        if name == CACHE_LOOKUPS.name:
+            labels = dict(labels)
+            hits, total = lookups.get(labels['cache'], (0, 0))
+            lookups[labels['cache']] = (hits + value * (labels['result'] == 'hit'), total + value)
+    return {(('cache', name),): hits / total for name, (hits, total) in lookups.items() if total}
+
+
+def prometheus_metrics(request):
+    """
+    Request, cache and business metrics in the Prometheus text format.
+    Needs `Authorization: Bearer <METRICS_BEARER_TOKEN>`; without that
+    setting the endpoint is off.
+    """
+    token = settings.METRICS_BEARER_TOKEN
+    if not token:
+        return HttpResponse('Forbidden: METRICS_BEARER_TOKEN is not set\n', status=403, content_type='text/plain')
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+
+    samples = collect()
+    outbox = EmailOutbox.objects.exclude(Status=EmailOutbox.STATUS_SENT).values('Status').annotate(n=Count('pk'))
+    active = Reservation.objects.filter(
+        ReservationDateTime__gte=timezone.now(), Status__in=ACTIVE_STATUSES
+    ).values('BranchID').annotate(n=Count('pk'))
+
+    gauges = [
+        ('email_outbox_messages', 'Emails waiting in the outbox by status (Pending or Failed)', {
+            (('status', status_),): 0
+            for status_ in (EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_FAILED)
+        } | {(('status', row['Status']),): row['n'] for row in outbox}),
+        ('cache_hit_ratio', 'Hits over lookups since the workers started', _cache_hit_ratios(samples)),
+        ('reservations_active', 'Upcoming Pending or Confirmed reservations by branch', {
+            (('branch', row['BranchID'] or ''),): row['n'] for row in active
+        }),
+    ]
+    return HttpResponse(render(gauges, samples), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,139 @@
+# backend/api/tables.py
+"""
+Per-branch table layouts.
+
+Layouts change rarely but are read by every availability request, so each
+process keeps them in memory. A version counter in the default cache is
+bumped whenever a Table or Branch is saved or deleted (see api/signals.py);
+a process that sees a new version drops everything it holds. That cache is
+per process, so the bump only reaches the worker that made the edit: the
+version and the layouts held in memory expire after TABLES_VERSION_TTL,
+which bounds how long any other worker keeps an old layout. Party-size
+filtering and best_fit() table assignment run over the cached layout,
+which is a few dozen rows per branch.
+"""
+import time
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from .models import Branch, Table
+
+TABLES_VERSION_KEY = 'tables:version'
+
+TableLayout = namedtuple('TableLayout', ['number', 'seats', 'combinable'])
+
+_memory = {'version': None, 'expires': 0, 'layouts': {}}
+
+
+def get_tables_version():
+    version = cache.get(TABLES_VERSION_KEY)
+    if version is None:
+        cache.add(TABLES_VERSION_KEY, int(time.time() * 1000), settings.TABLES_VERSION_TTL)
+        version = cache.get(TABLES_VERSION_KEY)
+    return version
+
+
+def bump_tables_version():
+    try:
+        cache.incr(TABLES_VERSION_KEY)
+    except ValueError:
+        get_tables_version()
+
+
+def _current_layouts():
+    global _memory
+    version = get_tables_version()
+    now = time.monotonic()
+    if _memory['version'] != version or _memory['expires'] <= now:
+        _memory = {'version': version, 'expires': now + settings.TABLES_VERSION_TTL, 'layouts': {}}
+    return _memory['layouts']
+
+
+def branch_layout(branch_id):
+    """
+    The branch's tables as TableLayout tuples ordered by number.
+    """
+    layouts = _current_layouts()
+    layout = layouts.get(branch_id)
+    if layout is None:
+        layout = [
+            TableLayout(*row)
+            for row in Table.objects.filter(BranchID=branch_id)
+            .order_by('TableNumber')
+            .values_list('TableNumber', 'Seats', 'Combinable')
+        ]
+        layouts[branch_id] = layout
+    return layout
+
+
+def get_table(branch_id, table_number):
+    for table in branch_layout(branch_id):
+        if table.number == table_number:
+            return table
+    return None
+
+
+def tables_for_party(branch_id, party_size=None):
+    """
+    Numbers of the branch's tables that seat `party_size` (all if None).
+    """
+    return [
+        table.number for table in branch_layout(branch_id)
+        if party_size is None or table.seats >= party_size
+    ]
+
+
+def default_branch_id():
+    """
+    The branch used when a request does not name one (the first branch).
+    """
+    layouts = _current_layouts()
+    if 'default' not in layouts:
+        layouts['default'] = Branch.objects.order_by('pk').values_list('pk', flat=True).first()
+    return layouts['default']
+
+
+def best_fit(layout, free, party_size):
+    """
+    Table numbers to seat `party_size` using only tables in `free`, or None.
+
+    The smallest single table that fits wins. Failing that, a run of free,
+    combinable tables with consecutive numbers is merged (tables are
+    numbered so that neighbours stand next to each other): the run wasting
+    the fewest seats, then the one with the fewest tables. The first number
+    is the main table; the rest are merged with it.
+    """
+    best_single = None
+    for table in layout:
+        if table.number in free and table.seats >= party_size:
+            if best_single is None or table.seats < best_single.seats:
+                best_single = table
+    if best_single is not None:
+        return [best_single.number]
+
+    best_run = None
+    best_key = None
+    run = []
+    # A sentinel closes the last run
+    for table in [*layout, None]:
+        if (table is not None and table.combinable and table.number in free
+                and (not run or table.number == run[-1].number + 1)):
+            run.append(table)
+            continue
+        for start in range(len(run)):
+            seats = 0
+            for end in range(start, len(run)):
+                seats += run[end].seats
+                if seats >= party_size:
+                    key = (seats, end - start)
+                    if best_key is None or key < best_key:
+                        best_key = key
+                        best_run = run[start:end + 1]
+                    break
+        run = []
+        if table is not None and table.combinable and table.number in free:
+            run.append(table)
+
+    if best_run is None:
+        return None
+    return [table.number for table in best_run]
@@ -1,3 +1,952 @@
 from django.test import TestCase
 
 # Create your tests here.
+import os
+import re
+import runpy
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection, connections, router
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from .availability import occupied_tables
+from .booking import InvalidTable, InvalidTime, SlotConflict, book_best_fit, book_reservation
+from .db_router import ReplicaRoutingMiddleware
+from .email_utils import (
+    CONTENT_MARKER, EMAIL_KINDS, prerendered_layout, queue_reservation_confirmation_email, render_email
+)
+from .instrumentation import RequestMetricsMiddleware, request_metrics
+from .management.commands.bench_booking import create_bench_branch, find_double_bookings, run_booking_stress
+from .menu_cache import MENU_VERSION_KEY
+from .metrics import FileStore, read_directory, reset_store
+from .models import (
+    Branch, Customer, Discount, Order, OrderDetail, MenuItem, Bill, BillComputation, Reservation, ReservationCustomer,
+    EmailOutbox, Table, TableSlotClaim
+)
+from .outbox import drain_outbox, queue_email
+from .reminders import send_reminders
+from .tables import tables_for_party
+from .throttling import take_token
+from .tokens import CustomerTokenObtainPairSerializer
+
+
+class CheckoutTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='diner', email='diner@example.com')
+        self.customer = Customer.objects.create(FirstName='Di', LastName='Ner', Contact='-', Email='diner@example.com')
+        self.items = MenuItem.objects.bulk_create([
+            MenuItem(Name=f'Dish {number}', Price=Decimal('4.50'), Category='Main') for number in range(5)
+        ])
+        self.auth = {'Authorization': f'Bearer {CustomerTokenObtainPairSerializer.get_token(user).access_token}'}
+
+    def checkout(self, items, **data):
+        return self.client.post(
+            '/api/checkout/', {'PaymentMethod': 'Card', 'items': items, **data},
+            content_type='application/json', headers=self.auth
+        )
+
+    def test_order_and_bill(self):
+        response = self.checkout([
+            {'MenuItemID': self.items[0].pk, 'Quantity': 2},
+            {'MenuItemID': self.items[1].pk, 'Quantity': 1},
+            {'MenuItemID': self.items[0].pk, 'Quantity': 1},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['total'], '21.24')
+        order = Order.objects.get(pk=response.json()['order']['OrderID'])
+        self.assertEqual(
+            sorted(order.orderdetail_set.values_list('MenuItemID', 'Quantity')),
+            [(self.items[0].pk, 3), (self.items[1].pk, 1)]
+        )
+        self.assertEqual(order.ordercustomer_set.get().CustomerID, self.customer)
+        bill = Bill.objects.get(OrderID=order)
+        self.assertEqual((bill.TotalBeforeDiscount, bill.TaxAmount), (Decimal('18.00'), Decimal('3.24')))
+        self.assertEqual(bill.billcomputation.TotalAmount, Decimal('21.24'))
+
+    def test_queries_do_not_grow_with_the_cart(self):
+        # Prices, then the order's rows in one transaction (a savepoint in
+        # the test); the revoked set is already cached
+        self.checkout([{'MenuItemID': self.items[0].pk, 'Quantity': 1}])
+        with self.assertNumQueries(8):
+            self.checkout([{'MenuItemID': self.items[0].pk, 'Quantity': 1}])
+        with self.assertNumQueries(8):
+            self.checkout([{'MenuItemID': item.pk, 'Quantity': 2} for item in self.items])
+
+    def test_quote(self):
+        today = timezone.localdate()
+        discount = Discount.objects.create(
+            Name='Lunch', Description='-', Percentage=Decimal('10'), StartDate=today, EndDate=today
+        )
+        expired = Discount.objects.create(
+            Name='Old', Description='-', Percentage=Decimal('50'),
+            StartDate=today - timedelta(days=9), EndDate=today - timedelta(days=1)
+        )
+        cart = [{'MenuItemID': self.items[0].pk, 'Quantity': 3}]
+        # No login needed; the prices and the discounts, nothing written
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                '/api/quote/', {'items': cart, 'DiscountIDs': [discount.pk]}, content_type='application/json'
+            )
+        quote = response.json()['quote']
+        self.assertEqual(quote['lines'][0]['LineTotal'], '13.50')
+        self.assertEqual(quote['discounts'][0]['Name'], 'Lunch')
+        self.assertEqual(
+            (quote['DiscountAmount'], quote['TaxAmount'], quote['TotalAmount']), ('1.35', '2.19', '14.34')
+        )
+        self.assertFalse(Order.objects.exists())
+
+        response = self.client.post(
+            '/api/quote/', {'items': cart, 'DiscountID': expired.pk}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        for ids in (['abc'], [{'id': 1}], 'abc'):
+            response = self.client.post(
+                '/api/quote/', {'items': cart, 'DiscountIDs': ids}, content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_my_orders(self):
+        other = Order.objects.create(OrderDate=timezone.now(), Status='Pending')
+        self.checkout([{'MenuItemID': self.items[0].pk, 'Quantity': 1}])
+        self.checkout([{'MenuItemID': item.pk, 'Quantity': 1} for item in self.items])
+        # Orders, their lines with menu items, their bills; the revoked
+        # set is already cached
+        with self.assertNumQueries(3):
+            orders = self.client.get('/api/orders/my/', headers=self.auth).json()['orders']
+        self.assertNotIn(other.pk, [order['OrderID'] for order in orders])
+        self.assertEqual([len(order['items']) for order in orders], [5, 1])
+        self.assertEqual(orders[1]['items'][0]['menuItem']['Name'], 'Dish 0')
+        self.assertEqual(orders[1]['bill']['TotalAmount'], '5.31')
+
+    def test_bad_carts(self):
+        self.assertEqual(self.checkout([]).status_code, 400)
+        self.assertEqual(self.checkout([{'MenuItemID': self.items[0].pk, 'Quantity': 0}]).status_code, 400)
+        response = self.checkout([{'MenuItemID': self.items[0].pk, 'Quantity': 1}], DiscountID='abc')
+        self.assertEqual(response.json(), {'error': 'Discount IDs must be integers'})
+        MenuItem.objects.filter(pk=self.items[0].pk).update(Availability=False)
+        response = self.checkout([{'MenuItemID': self.items[0].pk, 'Quantity': 1}])
+        self.assertEqual(response.json(), {'error': 'Menu items not available: Dish 0'})
+        self.assertFalse(Order.objects.exists())
+
+
+@override_settings(THROTTLE_BUCKETS={})
+class PaginationTests(TestCase):
+
+    def walk(self, url):
+        """
+        Follow `next` links from `url`; returns the pages' results.
+        """
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json()['results'])
+            url = response.json()['next']
+        return pages
+
+    def test_cursor_walk_newest_first(self):
+        now = timezone.now()
+        # Three orders share each timestamp, so pages split ties
+        orders = Order.objects.bulk_create([
+            Order(OrderDate=now - timedelta(minutes=number // 3), Status='Pending') for number in range(8)
+        ])
+        pages = self.walk('/api/orders/?page_size=3')
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        ids = [order['OrderID'] for page in pages for order in page]
+        newest_first = sorted(orders, key=lambda order: (order.OrderDate, order.OrderID), reverse=True)
+        self.assertEqual(ids, [order.OrderID for order in newest_first])
+
+        # A new order does not shift the pages already handed out
+        second = self.client.get('/api/orders/?page_size=3').json()['next']
+        Order.objects.create(OrderDate=now + timedelta(minutes=1), Status='Pending')
+        self.assertEqual([order['OrderID'] for order in self.client.get(second).json()['results']], ids[3:6])
+
+    def test_tables_second_page(self):
+        for name in ('Branch 1', 'Branch 2'):
+            branch = Branch.objects.create(Name=name, Location='-', Contact='-')
+            Table.objects.bulk_create([
+                Table(BranchID=branch, TableNumber=number, Seats=4) for number in range(1, 31)
+            ])
+        pages = self.walk('/api/tables/')
+        self.assertEqual([len(page) for page in pages], [50, 10])
+        ids = [table['TableID'] for page in pages for table in page]
+        self.assertEqual(ids, sorted(Table.objects.values_list('TableID', flat=True)))
+
+
+class DynamicFieldsTests(TestCase):
+
+    def setUp(self):
+        items = MenuItem.objects.bulk_create([
+            MenuItem(Name=f'Dish {number}', Price=Decimal('5.00'), Category='Main') for number in range(3)
+        ])
+        for _ in range(2):
+            order = Order.objects.create(OrderDate=timezone.now(), Status='Pending')
+            OrderDetail.objects.bulk_create([OrderDetail(OrderID=order, MenuItemID=item, Quantity=1) for item in items])
+
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.client.get('/api/order-details/?fields=OrderID,Quantity').json()['results']
+        self.assertEqual(set(rows[0]), {'OrderID', 'Quantity'})
+        # The unused column is not read either
+        self.assertNotIn('MenuItemID', queries.captured_queries[-1]['sql'])
+
+    def test_expand_without_extra_queries(self):
+        # One query for the page, with both relations joined in
+        with self.assertNumQueries(1):
+            rows = self.client.get('/api/order-details/?expand=OrderID,MenuItemID').json()['results']
+        self.assertEqual(len(rows), 6)
+        self.assertEqual((rows[0]['OrderID']['Status'], rows[0]['MenuItemID']['Name']), ('Pending', 'Dish 0'))
+
+        # Reverse relations are prefetched: orders, then all their lines
+        with self.assertNumQueries(2):
+            orders = self.client.get('/api/orders/?expand=orderdetail_set&fields=OrderID').json()['results']
+        self.assertEqual([len(order['orderdetail_set']) for order in orders], [3, 3])
+        self.assertEqual(set(orders[0]), {'OrderID', 'orderdetail_set'})
+
+    def test_writes_ignore_expand(self):
+        order = Order.objects.first()
+        response = self.client.patch(
+            f'/api/orders/{order.pk}/?expand=orderdetail_set', {'Status': 'Ready'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('orderdetail_set', response.json())
+
+
+class MenuCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.item = MenuItem.objects.create(Name='Soup', Price=Decimal('3.00'), Category='Starters')
+
+    def test_etag_revalidation(self):
+        url = '/api/menu-items/by-category/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(response.json()['categories'][0]['items'][0]['Name'], 'Soup')
+        # Served from the cache, or not at all when the client's copy is current
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).content, response.content)
+            self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.Name = 'Broth'
+            self.item.save()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['categories'][0]['items'][0]['Name'], 'Broth')
+
+    def test_list_variants_have_their_own_etag(self):
+        first = self.client.get('/api/menu-items/')
+        narrow = self.client.get('/api/menu-items/?fields=Name')
+        self.assertNotEqual(first['ETag'], narrow['ETag'])
+        self.assertEqual(narrow.json()['results'], [{'Name': 'Soup'}])
+        response = self.client.get('/api/menu-items/?fields=Name', headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 200)
+
+    def test_version_expiry_picks_up_edits_from_other_workers(self):
+        url = '/api/menu-items/by-category/'
+        etag = self.client.get(url)['ETag']
+        # Another worker's edit: the row changes but this worker's version is not bumped
+        MenuItem.objects.filter(pk=self.item.pk).update(Name='Broth')
+        self.assertEqual(self.client.get(url)['ETag'], etag)
+
+        time.sleep(0.002)
+        cache.delete(MENU_VERSION_KEY)  # as when MENU_VERSION_TTL runs out
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['categories'][0]['items'][0]['Name'], 'Broth')
+
+
+class EmailTemplateTests(TestCase):
+
+    def setUp(self):
+        self.customer = Customer(FirstName='Zoë', LastName='<Rae & Co>', Contact='-', Email='zoe@example.com')
+        self.reservation = Reservation(
+            ReservationID=42, ReservationDateTime=timezone.make_aware(datetime(2030, 3, 9, 19, 30)), NumPeople=4,
+            TableNumber=7, Status='Confirmed'
+        )
+
+    def test_every_kind_renders(self):
+        for kind, options in EMAIL_KINDS.items():
+            subject, text, html = render_email(kind, self.reservation, self.customer)
+            self.assertEqual(subject, f"{options['subject']} - {settings.RESTAURANT_NAME}")
+            self.assertIn('March 09, 2030 at 07:30 PM', text)
+            self.assertIn('Zoë <Rae & Co>', text)
+            self.assertIn('Zoë &lt;Rae &amp; Co&gt;', html)
+            self.assertIn(f"<h2>{options['heading']}</h2>", html)
+            self.assertEqual('This is an automated email' in html, options['automated_notice'])
+            self.assertNotIn(CONTENT_MARKER, html)
+
+    @override_settings(RESTAURANT_NAME='Chez Test')
+    def test_layout_is_rendered_once_per_kind(self):
+        prerendered_layout.cache_clear()
+        self.addCleanup(prerendered_layout.cache_clear)
+        with mock.patch('api.email_utils.render_to_string', wraps=render_to_string) as layout:
+            for _ in range(3):
+                render_email('reservation_confirmation', self.reservation, self.customer)
+        self.assertEqual(layout.call_count, 1)
+
+        self.reservation.save()
+        queue_reservation_confirmation_email(self.reservation, self.customer)
+        email = EmailOutbox.objects.get()
+        self.assertEqual((email.Recipient, email.Subject), ('zoe@example.com', 'Reservation Confirmation - Chez Test'))
+        self.assertIn('<h1>🍽️ Chez Test</h1>', email.HtmlBody)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite-specific')
+class QueryPlanTests(TestCase):
+    """
+    The hot queries must be answered from an index. A plain
+    "SCAN <table>" in the plan means a full table scan.
+    """
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullScan(self, queryset):
+        plan = self.explain(queryset)
+        full_scans = [step for step in plan if re.fullmatch(r'SCAN \w+', step)]
+        self.assertFalse(full_scans, f'Full table scan in plan: {plan}')
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_reservation_overlap_check(self):
+        # create_reservation
+        self.assertNoFullScan(Reservation.objects.filter(
+            TableNumber=5,
+            ReservationDateTime__gte=self.now - timedelta(hours=2),
+            ReservationDateTime__lte=self.now + timedelta(hours=2),
+            Status__in=['Confirmed', 'Pending']
+        ).values('pk')[:1])
+
+    def test_reservation_occupied_tables(self):
+        # get_available_tables
+        self.assertNoFullScan(Reservation.objects.filter(
+            ReservationDateTime__gte=self.now - timedelta(hours=2),
+            ReservationDateTime__lte=self.now + timedelta(hours=2),
+            Status__in=['Confirmed', 'Pending']
+        ).values_list('TableNumber', flat=True))
+
+    def test_reservation_branch_day(self):
+        # availability index rebuild
+        self.assertNoFullScan(Reservation.objects.filter(
+            BranchID=1,
+            ReservationDateTime__gte=self.now,
+            ReservationDateTime__lt=self.now + timedelta(days=1),
+            Status__in=['Confirmed', 'Pending']
+        ).values_list('TableNumber', 'ReservationDateTime', 'ReservationID'))
+
+    def test_customer_by_email(self):
+        # get_current_user, get_my_reservations, cancel_reservation
+        self.assertNoFullScan(Customer.objects.filter(Email='guest@example.com'))
+
+    def test_orders_by_status_and_date(self):
+        # admin list_filter
+        self.assertNoFullScan(Order.objects.filter(
+            Status='Pending',
+            OrderDate__gte=self.now - timedelta(days=1)
+        ))
+
+    def test_orders_newest_first(self):
+        # /api/orders/ pagination ordering
+        self.assertNoFullScan(Order.objects.order_by('-OrderDate', '-OrderID')[:51])
+
+    def test_bills_paid_today(self):
+        # dashboard revenue
+        self.assertNoFullScan(Bill.objects.filter(
+            PaymentDate__gte=self.now - timedelta(days=1),
+            PaymentDate__lt=self.now
+        ))
+        self.assertNoFullScan(BillComputation.objects.filter(
+            BillID__PaymentDate__gte=self.now - timedelta(days=1),
+            BillID__PaymentDate__lt=self.now
+        ))
+
+
+class BookingTests(TransactionTestCase):
+    """
+    Slot claims must reject every overlapping booking, even when the
+    cache pre-check is skipped or raced past.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.branch = create_bench_branch(tables=6).pk
+        self.noon = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0) + timedelta(days=7)
+
+    def test_window_is_enforced(self):
+        book_reservation(self.branch, self.noon, 2, 4, use_index=False)
+        for offset in (-120, -30, 0, 90, 120):
+            with self.assertRaises(SlotConflict):
+                book_reservation(self.branch, self.noon + timedelta(minutes=offset), 2, 4, use_index=False)
+        book_reservation(self.branch, self.noon + timedelta(minutes=150), 2, 4, use_index=False)
+        book_reservation(self.branch, self.noon, 2, 5, use_index=False)
+
+    def test_claims_agree_with_availability_at_the_window_edge(self):
+        book_reservation(self.branch, self.noon, 2, 1)
+        # Off the slot grid the claims would reach past the window
+        for offset in (130, 15):
+            with self.assertRaises(InvalidTime):
+                book_reservation(self.branch, self.noon + timedelta(minutes=offset), 2, 1)
+        self.assertEqual(occupied_tables(self.branch, self.noon + timedelta(minutes=120)), [1])
+        with self.assertRaises(SlotConflict):
+            book_reservation(self.branch, self.noon + timedelta(minutes=120), 2, 1)
+        self.assertEqual(occupied_tables(self.branch, self.noon + timedelta(minutes=150)), [])
+        book_reservation(self.branch, self.noon + timedelta(minutes=150), 2, 1)
+
+        response = self.client.post('/api/reservations/', {
+            'ReservationDateTime': (self.noon + timedelta(minutes=130)).isoformat(), 'NumPeople': 2,
+            'TableNumber': 2, 'Status': 'Confirmed', 'BranchID': self.branch,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ReservationDateTime', response.json())
+
+    def test_cancelling_releases_the_table(self):
+        reservation = book_reservation(self.branch, self.noon, 2, 4)
+        reservation.Status = 'Cancelled'
+        reservation.save()
+        book_reservation(self.branch, self.noon + timedelta(minutes=30), 2, 4, use_index=False)
+
+    def test_tables_are_per_branch_and_sized(self):
+        other_branch = create_bench_branch(tables=2, seats=8).pk
+        book_reservation(self.branch, self.noon, 2, 1)
+        book_reservation(other_branch, self.noon, 6, 1)
+        with self.assertRaises(InvalidTable):
+            book_reservation(self.branch, self.noon, 6, 2)
+        with self.assertRaises(InvalidTable):
+            book_reservation(other_branch, self.noon, 2, 3)
+
+        self.assertEqual(occupied_tables(self.branch, self.noon), [1])
+        self.assertEqual(tables_for_party(other_branch, 6), [1, 2])
+        self.assertEqual(tables_for_party(self.branch, 6), [])
+
+    def test_layouts_expire_without_a_bump(self):
+        self.assertEqual(tables_for_party(self.branch, 6), [])
+        # Resized by another worker: no signal reaches this one
+        Table.objects.filter(BranchID=self.branch, TableNumber=3).update(Seats=6)
+        self.assertEqual(tables_for_party(self.branch, 6), [])
+        later = time.monotonic() + settings.TABLES_VERSION_TTL
+        with mock.patch('api.tables.time.monotonic', return_value=later):
+            self.assertEqual(tables_for_party(self.branch, 6), [3])
+
+    def test_stale_index_is_only_a_hint(self):
+        reservation = book_reservation(self.branch, self.noon, 2, 4)
+        best = book_best_fit(self.branch, self.noon, 2)
+        self.assertIn(4, occupied_tables(self.branch, self.noon))
+        # Cancelled by another worker: the claims go, this worker's index stays
+        for cancelled in (reservation, best):
+            Reservation.objects.filter(pk=cancelled.pk).update(Status='Cancelled')
+            TableSlotClaim.objects.filter(ReservationID=cancelled).delete()
+        self.assertIn(4, occupied_tables(self.branch, self.noon))
+
+        self.assertEqual(book_reservation(self.branch, self.noon, 2, 4).TableNumber, 4)
+        self.assertEqual(occupied_tables(self.branch, self.noon), [4])
+        # Table 5 is booked, seen by this worker, then cancelled elsewhere
+        other = Reservation.objects.create(
+            BranchID_id=self.branch, ReservationDateTime=self.noon, NumPeople=2, TableNumber=5,
+            Status='Confirmed', Confirmed=True
+        )
+        cache.clear()
+        occupied_tables(self.branch, self.noon)
+        Reservation.objects.filter(pk=other.pk).update(Status='Cancelled')
+        TableSlotClaim.objects.filter(ReservationID=other).delete()
+        for number in (1, 2, 3, 6):
+            book_reservation(self.branch, self.noon, 2, number)
+        # Every table now looks taken to this worker, but table 5 is free
+        self.assertEqual(book_best_fit(self.branch, self.noon, 2).TableNumber, 5)
+
+    def test_best_fit_assignment(self):
+        branch = create_bench_branch(tables=0).pk
+        for number, seats in ((1, 2), (2, 4), (3, 4), (4, 6)):
+            Table.objects.create(BranchID_id=branch, TableNumber=number, Seats=seats)
+        self.assertEqual(book_best_fit(branch, self.noon, 3).TableNumber, 2)
+        self.assertEqual(book_best_fit(branch, self.noon, 5).TableNumber, 4)
+        # Tables 1 and 3 are free but not adjacent, so they cannot be merged
+        self.assertEqual(book_best_fit(branch, self.noon, 3).TableNumber, 3)
+        with self.assertRaises(SlotConflict):
+            book_best_fit(branch, self.noon, 3)
+
+        later = self.noon + timedelta(hours=3)
+        reservation = book_best_fit(branch, later, 9)
+        self.assertEqual([reservation.TableNumber, *reservation.MergedTables], [3, 4])
+        with self.assertRaises(SlotConflict):
+            book_reservation(branch, later, 2, 4, use_index=False)
+
+    def test_concurrent_bookings(self):
+        day = date(2099, 1, 1)
+        booked, conflicts, busy, _ = run_booking_stress(
+            self.branch, day, threads=6, attempts=30, tables=3, use_index=False
+        )
+        self.assertEqual(booked + conflicts + busy, 180)
+        self.assertGreater(booked, 0)
+        self.assertEqual(find_double_bookings(Reservation.objects.filter(ReservationDateTime__date=day)), [])
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP unavailable')
+
+
+class OutboxTests(TestCase):
+
+    def test_batches_are_delivered(self):
+        for n in range(5):
+            queue_email(f'guest{n}@example.com', f'Hello {n}', 'text', '<p>html</p>')
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(drain_outbox(batch_size=2), (5, 0, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.assertFalse(EmailOutbox.objects.exclude(Status=EmailOutbox.STATUS_SENT).exists())
+        self.assertEqual(drain_outbox(), (0, 0, 0))
+
+    @override_settings(
+        EMAIL_BACKEND='api.tests.FailingEmailBackend',
+        EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+        EMAIL_OUTBOX_RETRY_SECONDS=60
+    )
+    def test_failures_back_off_then_dead_letter(self):
+        email = queue_email('guest@example.com', 'Hello', 'text')
+
+        self.assertEqual(drain_outbox(), (0, 1, 0))
+        email.refresh_from_db()
+        self.assertEqual(email.Attempts, 1)
+        self.assertIn('SMTP unavailable', email.LastError)
+        self.assertGreater(email.NextAttemptAt, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(drain_outbox(), (0, 0, 0))  # not due yet
+
+        EmailOutbox.objects.update(NextAttemptAt=timezone.now())
+        self.assertEqual(drain_outbox(), (0, 0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.Status, EmailOutbox.STATUS_FAILED)
+
+
+class ReminderTests(TestCase):
+
+    def test_reminders_are_sent_once(self):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        evening = timezone.make_aware(timezone.datetime.combine(tomorrow, timezone.datetime.min.time())) + timedelta(hours=19)
+        for n, (when, reservation_status) in enumerate([
+            (evening, 'Confirmed'),
+            (evening + timedelta(hours=1), 'Confirmed'),
+            (evening, 'Cancelled'),
+            (evening + timedelta(days=1), 'Confirmed'),
+        ]):
+            customer = Customer.objects.create(
+                FirstName=f'Guest{n}', LastName='Smith', Contact='1', Email=f'guest{n}@example.com'
+            )
+            reservation = Reservation.objects.create(
+                ReservationDateTime=when, NumPeople=2, TableNumber=n + 1, Status=reservation_status
+            )
+            ReservationCustomer.objects.create(ReservationID=reservation, CustomerID=customer)
+
+        with self.assertNumQueries(3):  # one page, one checkpoint, one empty page
+            self.assertEqual(send_reminders(tomorrow, batch_size=2), 2)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['guest0@example.com', 'guest1@example.com'])
+        self.assertEqual(send_reminders(tomorrow), 0)
+
+
+class TokenClaimTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='ana', email='ana@example.com', password='s3cret-Pass')
+        self.customer = Customer.objects.create(
+            FirstName='Ana', LastName='Lee', Contact='1', Email='ana@example.com', LoyaltyPoints=300
+        )
+        ReservationCustomer.objects.create(
+            ReservationID=Reservation.objects.create(
+                ReservationDateTime=timezone.now() + timedelta(days=1), NumPeople=2, TableNumber=1
+            ),
+            CustomerID=self.customer
+        )
+
+    def test_register_rejects_a_taken_customer_email(self):
+        Customer.objects.create(FirstName='Walk', LastName='In', Contact='2', Email='walkin@example.com')
+        response = self.client.post('/api/register/', {
+            'username': 'walkin', 'email': 'walkin@example.com', 'password': 'An0ther-Pass',
+            'password2': 'An0ther-Pass', 'firstName': 'Walk', 'lastName': 'In', 'contact': '2',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Email already registered'})
+        self.assertFalse(User.objects.filter(username='walkin').exists())
+
+    def test_customer_comes_from_the_token(self):
+        access = self.client.post(
+            '/api/token/', {'username': 'ana', 'password': 's3cret-Pass'}
+        ).json()['access']
+        claims = AccessToken(access).payload
+        self.assertEqual(claims['customerId'], self.customer.CustomerID)
+        self.assertEqual(claims['loyaltyTier'], 'Silver')
+
+        # No Customer lookup: the revoked-token set, then the reservations
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/reservations/my/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(len(response.json()['reservations']), 1)
+
+    def test_stateless_views_skip_the_user_query(self):
+        tokens = self.client.post('/api/token/', {'username': 'ana', 'password': 's3cret-Pass'}).json()
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {tokens['access']}"}
+        with self.settings(JWT_STATELESS_VIEWS=[]):
+            with self.assertNumQueries(3):  # revoked set, user, reservations
+                self.client.get('/api/reservations/my/', **auth)
+        with self.settings(JWT_STATELESS_VIEWS=['api.reservation_views.get_my_reservations']):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get('/api/reservations/my/', **auth).status_code, 200)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/logout/', {'refresh': tokens['refresh']}, **auth)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.get('/api/reservations/my/', **auth).status_code, 401)
+            self.assertEqual(self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']}).status_code, 401)
+
+    def test_revocation_reaches_other_workers(self):
+        tokens = self.client.post('/api/token/', {'username': 'ana', 'password': 's3cret-Pass'}).json()
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {tokens['access']}"}
+        self.assertEqual(self.client.get('/api/reservations/my/', **auth).status_code, 200)
+        # Without its on_commit callback the logout leaves the cached set
+        # alone, as it does on every worker but the one that handled it
+        self.client.post('/api/logout/', {'refresh': tokens['refresh']}, **auth)
+        self.assertEqual(self.client.get('/api/reservations/my/', **auth).status_code, 200)
+
+        later = time.time() + settings.REVOKED_TOKENS_CACHE_SECONDS + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            self.assertEqual(self.client.get('/api/reservations/my/', **auth).status_code, 401)
+
+    def test_booking_is_for_the_token_customer(self):
+        branch = create_bench_branch(tables=2).pk
+        other = Customer.objects.create(FirstName='Bo', LastName='Kim', Contact='2', Email='bo@example.com')
+        access = self.client.post('/api/token/', {'username': 'ana', 'password': 's3cret-Pass'}).json()['access']
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {access}'}
+        body = {
+            'ReservationDateTime': (timezone.now() + timedelta(days=2)).replace(hour=12, minute=0, second=0, microsecond=0).isoformat(),
+            'NumPeople': 2, 'BranchID': branch,
+        }
+
+        response = self.client.post(
+            '/api/reservations/create/', {**body, 'CustomerID': other.CustomerID}, content_type='application/json', **auth
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ReservationCustomer.objects.filter(CustomerID=other).exists())
+
+        response = self.client.post('/api/reservations/create/', body, content_type='application/json', **auth)
+        self.assertEqual(response.status_code, 201)
+        booked = ReservationCustomer.objects.get(ReservationID=response.json()['reservation']['ReservationID'])
+        self.assertEqual(booked.CustomerID, self.customer)
+
+
+@override_settings(THROTTLE_BUCKETS={'availability': ('60/min', 3), 'anon': ('1/s', 100)})
+class ThrottleTests(TestCase):
+
+    def setUp(self):
+        caches['throttle'].clear()
+
+    def test_route_bucket_per_ip(self):
+        url = '/api/reservations/time-slots/?date=2099-01-01'
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        # Another client has its own bucket
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    def test_bucket_refills(self):
+        now = 1_000_000
+        for _ in range(3):
+            self.assertEqual(take_token('throttle:test', 1000, 3, now), 0)
+        self.assertEqual(take_token('throttle:test', 1000, 3, now), 1)
+        self.assertEqual(take_token('throttle:test', 1000, 3, now + 1000), 0)
+        self.assertEqual(take_token('throttle:test', 1000, 3, now + 1000), 1)
+        # A long idle spell refills only up to the burst size
+        for _ in range(3):
+            self.assertEqual(take_token('throttle:test', 1000, 3, now + 60_000), 0)
+        self.assertGreater(take_token('throttle:test', 1000, 3, now + 60_000), 0)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def reads_from(self, method, path, write=False, **extra):
+        """
+        The alias a read would use inside the view for `path`.
+        """
+        aliases = []
+
+        def view(request):
+            middleware.process_view(request, resolve(path).func, (), {})
+            if write:
+                router.db_for_write(Customer)
+            aliases.append(router.db_for_read(Customer))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        middleware(getattr(RequestFactory(), method)(path, **extra))
+        return aliases[0]
+
+    def test_reads_follow_writes(self):
+        self.assertEqual(self.reads_from('get', '/api/customers/'), 'replica')
+        self.assertEqual(self.reads_from('get', '/api/stats/dashboard/'), 'replica')
+        self.assertEqual(self.reads_from('get', '/api/menu-items/'), 'default')
+        self.assertEqual(self.reads_from('get', '/api/reservations/my/'), 'default')
+
+        # A write moves the rest of the request to the primary...
+        self.assertEqual(self.reads_from('get', '/api/stats/dashboard/', write=True), 'default')
+        # ...and the client stays there for REPLICA_PIN_SECONDS
+        self.assertEqual(self.reads_from('get', '/api/customers/'), 'default')
+        self.assertEqual(self.reads_from('post', '/api/customers/', REMOTE_ADDR='10.0.0.9'), 'default')
+        self.assertEqual(self.reads_from('get', '/api/customers/', REMOTE_ADDR='10.0.0.9'), 'default')
+        self.assertEqual(self.reads_from('get', '/api/customers/', REMOTE_ADDR='10.0.0.10'), 'replica')
+
+
+@unittest.skipUnless(settings.DB_PROFILE == 'sqlite', 'checks the SQLite profile')
+class DatabaseProfileTests(TestCase):
+
+    def test_sqlite_connection_settings(self):
+        settings_dict = connection.settings_dict
+        self.assertEqual(settings_dict['CONN_MAX_AGE'], 600)
+        self.assertTrue(settings_dict['CONN_HEALTH_CHECKS'])
+        self.assertEqual(settings_dict['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+
+        # The test database lives in memory, so read the pragmas back from a
+        # file database opened with the same settings
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = type(connections['default'])(
+                dict(settings_dict, NAME=os.path.join(directory, 'profile.sqlite3')), alias='profile'
+            )
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {}
+                    for pragma in ('journal_mode', 'busy_timeout', 'synchronous', 'mmap_size'):
+                        cursor.execute(f'PRAGMA {pragma}')
+                        pragmas[pragma] = cursor.fetchone()[0]
+                self.assertEqual(
+                    pragmas, {'journal_mode': 'wal', 'busy_timeout': 5000, 'synchronous': 1, 'mmap_size': 268435456}
+                )
+                self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+            finally:
+                wrapper.close()
+
+    def test_unknown_profile_fails(self):
+        with mock.patch.dict(os.environ, {'DB_PROFILE': 'mysql'}):
+            with self.assertRaisesMessage(ImproperlyConfigured, "Unknown DB_PROFILE 'mysql'"):
+                runpy.run_path(sys.modules[settings.SETTINGS_MODULE].__file__)
+
+
+@override_settings(REQUEST_METRICS_SERVER_TIMING=True)
+class RequestMetricsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_store()
+        self.customer = Customer.objects.create(
+            FirstName='Metric', LastName='Guest', Contact='-', Email='metric@example.com'
+        )
+
+    @override_settings(DEBUG=True)
+    def test_repeated_queries_in_debug(self):
+        def view(request):
+            for _ in range(3):
+                Customer.objects.get(pk=self.customer.pk)
+            return HttpResponse('ok')
+
+        request = RequestFactory().get('/nowhere/')
+        request.resolver_match = None
+        response = RequestMetricsMiddleware(view)(request)
+        self.assertIn('desc="3 queries, 2 repeated"', response['Server-Timing'])
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+    def test_histograms_per_route(self):
+        for _ in range(2):
+            response = self.client.get('/api/customers/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, total;dur=')
+        route = request_metrics()['GET customer-list']
+        self.assertEqual(route['http_request_duration_seconds']['count'], 2)
+        self.assertEqual(route['http_response_size_bytes']['count'], 2)
+        self.assertGreaterEqual(route['http_request_db_queries']['mean'], 1)
+        self.assertGreater(route['http_request_serialize_duration_seconds']['mean'], 0)
+
+        # Unsampled requests only record total time and size
+        with override_settings(REQUEST_METRICS_SAMPLE_RATE=0):
+            response = self.client.get('/api/customers/')
+        self.assertTrue(response['Server-Timing'].startswith('total;dur='))
+        route = request_metrics()['GET customer-list']
+        self.assertEqual(
+            (route['http_request_duration_seconds']['count'], route['http_request_db_queries']['count']), (3, 2)
+        )
+
+        with override_settings(REQUEST_METRICS_SERVER_TIMING=False):
+            self.assertFalse(self.client.get('/api/customers/').has_header('Server-Timing'))
+
+    def test_prometheus_exposition(self):
+        EmailOutbox.objects.create(Recipient='metric@example.com', Subject='-', TextBody='-')
+        self.client.get('/api/customers/')
+        self.client.get('/api/menu-items/')
+        self.client.get('/api/menu-items/')
+        with override_settings(METRICS_BEARER_TOKEN='secret'):
+            body = self.client.get('/metrics', headers={'Authorization': 'Bearer secret'}).content.decode()
+        self.assertIn('http_requests_total{method="GET",route="customer-list",status="200"} 1\n', body)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="customer-list",le="+Inf"} 1\n', body)
+        self.assertIn('cache_lookups_total{cache="menu",result="hit"} 1\n', body)
+        self.assertIn('cache_hit_ratio{cache="menu"} 0.5\n', body)
+        self.assertIn('email_outbox_messages{status="Pending"} 1\n', body)
+
+        with override_settings(METRICS_BEARER_TOKEN='secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', headers={'Authorization': 'Bearer secrets'}).status_code, 401)
+        # Off unless a token is configured
+        with override_settings(METRICS_BEARER_TOKEN=None):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_file_stores_add_up(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Two worker processes, each with its own file
+            first = FileStore(os.path.join(directory, '1.db'))
+            second = FileStore(os.path.join(directory, '2.db'))
+            first.inc([('a', 1), ('b', 0.25)])
+            second.inc([('a', 2)])
+            first.inc([('a', 1)])
+            self.assertEqual(read_directory(directory), {'a': 4, 'b': 0.25})
+            # A restarted worker with the same pid continues its file
+            first.close()
+            FileStore(os.path.join(directory, '1.db')).inc([('a', 10)])
+            self.assertEqual(read_directory(directory)['a'], 14)
+            second.close()
+
+
+@override_settings(THROTTLE_BUCKETS={})
+class BulkWriteTests(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        self.orders = Order.objects.bulk_create([Order(OrderDate=now, Status='Pending') for _ in range(50)])
+        self.items = MenuItem.objects.bulk_create([
+            MenuItem(Name=f'Dish {n}', Price=5, Category='Main') for n in range(20)
+        ])
+
+    def test_full_batch_create(self):
+        rows = [
+            {'OrderID': order.pk, 'MenuItemID': item.pk, 'Quantity': 1}
+            for order in self.orders for item in self.items
+        ]
+        self.assertEqual(len(rows), settings.API_MAX_BULK_SIZE)
+        response = self.client.post('/api/order-details/', rows, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(OrderDetail.objects.count(), 1000)
+
+        # A clash with an existing row is reported by item index
+        response = self.client.post('/api/order-details/', [
+            {'OrderID': self.orders[0].pk, 'MenuItemID': self.items[0].pk, 'Quantity': 2},
+        ], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['0'])
+
+    def test_clashing_partial_update(self):
+        first, second, third = OrderDetail.objects.bulk_create([
+            OrderDetail(OrderID=self.orders[0], MenuItemID=item, Quantity=1) for item in self.items[:3]
+        ])
+        # Rows 0 and 1 would both become (order 0, item 4)
+        response = self.client.patch('/api/order-details/', [
+            {'id': first.pk, 'MenuItemID': self.items[4].pk},
+            {'id': second.pk, 'MenuItemID': self.items[4].pk},
+        ], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['1'])
+
+        # Onto a row outside the batch
+        response = self.client.patch('/api/order-details/', [
+            {'id': first.pk, 'MenuItemID': self.items[2].pk},
+        ], content_type='application/json')
+        self.assertEqual(list(response.json()['errors']), ['0'])
+
+        # A row keeping its own key does not clash with itself
+        response = self.client.patch('/api/order-details/', [
+            {'id': first.pk, 'Quantity': 3},
+            {'id': third.pk, 'MenuItemID': self.items[5].pk},
+        ], content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(OrderDetail.objects.get(pk=third.pk).MenuItemID_id, self.items[5].pk)
+
+
+@override_settings(THROTTLE_BUCKETS={})
+class AvailabilityTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.branch = create_bench_branch(tables=2).pk
+        self.day = timezone.localdate() + timedelta(days=7)
+
+    def test_last_slot_is_ten_pm(self):
+        slots = self.client.get('/api/reservations/time-slots/', {'date': self.day}).json()['time_slots']
+        self.assertEqual((len(slots), slots[0], slots[-1]), (23, '11:00', '22:00'))
+
+    def test_day_matrix(self):
+        noon = timezone.make_aware(datetime.combine(self.day, datetime.min.time())) + timedelta(hours=12)
+        with self.captureOnCommitCallbacks(execute=True):
+            book_reservation(self.branch, noon, 2, 1)
+        response = self.client.get('/api/reservations/availability/', {'date': self.day, 'branch': self.branch})
+        free = {slot['time']: slot['available_tables'] for slot in response.json()['slots']}
+        self.assertEqual(list(free)[-1], '22:00')
+        # Taken within RESERVATION_WINDOW either side of the booking
+        self.assertEqual((free['11:00'], free['12:00'], free['14:00']), ([2], [2], [2]))
+        self.assertEqual(free['14:30'], [1, 2])
+
+
+@override_settings(THROTTLE_BUCKETS={})
+class DashboardTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(username='manager', is_staff=True)
+        self.guest = User.objects.create_user(username='guest')
+        Customer.objects.create(FirstName='Dash', LastName='Board', Contact='-', Email='dash@example.com')
+        Order.objects.create(OrderDate=timezone.now(), Status='Pending')
+        Order.objects.create(OrderDate=timezone.now(), Status='Delivered')
+
+    def get(self, user=None):
+        headers = {}
+        if user is not None:
+            token = CustomerTokenObtainPairSerializer.get_token(user).access_token
+            headers['Authorization'] = f'Bearer {token}'
+        return self.client.get('/api/stats/dashboard/', headers=headers)
+
+    def test_staff_only(self):
+        self.assertEqual(self.get().status_code, 401)
+        self.assertEqual(self.get(self.guest).status_code, 403)
+        stats = self.get(self.staff).json()['stats']
+        self.assertEqual((stats['totalCustomers'], stats['totalOrders'], stats['openOrders']), (1, 2, 1))
+
+    def test_figures_are_cached(self):
+        self.get(self.staff)
+        Customer.objects.create(FirstName='Late', LastName='Comer', Contact='-', Email='late@example.com')
+        # The token's customer lookup, then the staff user; no aggregates
+        with self.assertNumQueries(2):
+            stats = self.get(self.staff).json()['stats']
+        self.assertEqual(stats['totalCustomers'], 1)
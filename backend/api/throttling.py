@@ -0,0 +1,101 @@
+# backend/api/throttling.py
+"""
+Token-bucket throttling on the 'throttle' cache.
+
+Each (scope, client) pair has one cache key holding the bucket's
+"theoretical arrival time" in milliseconds (the GCRA form of a token
+bucket): every request pushes it one refill interval further, and the
+request is allowed while it stays less than `burst` intervals ahead of
+the clock. Updates are single cache.incr() calls, so concurrent workers
+never overwrite each other's counts. A rejected request is refunded with
+cache.decr() so retrying does not push the bucket further out.
+
+With the default LocMem 'throttle' cache every worker process keeps its
+own buckets, so a client spread over N workers gets up to N times the
+rate and burst. Set REDIS_URL to share the buckets between workers.
+
+The scope is the route's entry in THROTTLE_ROUTES (by URL name) or
+'user'/'anon'; rates and bursts come from THROTTLE_BUCKETS.
+"""
+import math
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from rest_framework.throttling import BaseThrottle
+
+# Buckets only limit across workers when this alias is a shared cache
+# (Redis); see CACHES in settings
+cache = ConnectionProxy(caches, 'throttle')
+
+PERIOD_MS = {'s': 1000, 'm': 60 * 1000, 'h': 60 * 60 * 1000, 'd': 24 * 60 * 60 * 1000}
+
+# Idle buckets are dropped after this long; an expired bucket is full again
+THROTTLE_KEY_TIMEOUT = 60 * 60
+
+
+def parse_rate(rate):
+    """
+    '60/min' -> milliseconds between tokens.
+    """
+    count, period = rate.split('/')
+    return max(1, round(PERIOD_MS[period[0]] / int(count)))
+
+
+def take_token(key, interval, burst, now=None):
+    """
+    Take one token from the bucket at `key`. Returns the seconds to wait
+    before retrying, or 0 when the request is allowed.
+    """
+    now = int(time.time() * 1000) if now is None else now
+    try:
+        arrival = cache.incr(key, interval)
+    except ValueError:
+        if cache.add(key, now + interval, timeout=THROTTLE_KEY_TIMEOUT):
+            return 0
+        arrival = cache.incr(key, interval)
+
+    if arrival < now + interval:
+        # The bucket refilled while idle; catch it up with the clock.
+        # Racing catch-ups can only make it stricter.
+        arrival = cache.incr(key, now + interval - arrival)
+
+    excess = arrival - now - burst * interval
+    if excess <= 0:
+        return 0
+    try:
+        cache.decr(key, interval)
+    except ValueError:
+        pass
+    return max(1, math.ceil(excess / 1000))
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Per-user (or per-IP for anonymous requests) token buckets.
+    """
+
+    def get_scope(self, request, view):
+        match = request.resolver_match
+        route_scope = settings.THROTTLE_ROUTES.get(match.url_name) if match else None
+        if route_scope:
+            return route_scope
+        return 'user' if request.user and request.user.is_authenticated else 'anon'
+
+    def get_client(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        bucket = settings.THROTTLE_BUCKETS.get(scope)
+        if bucket is None:
+            return True
+        rate, burst = bucket
+        key = f'throttle:{scope}:{self.get_client(request)}'
+        self.retry_after = take_token(key, parse_rate(rate), burst)
+        return self.retry_after == 0
+
+    def wait(self):
+        return self.retry_after
@@ -0,0 +1,107 @@
+# backend/api/tokens.py
+"""
+Customer identity carried in the JWT.
+
+Access tokens issued by /api/token/ include the customer's id and loyalty
+tier, so authenticated endpoints can find the customer without matching
+request.user.email against Customer.Email on every request. The claims
+are copied into each access token minted from the refresh token, so a
+tier change shows up at the next login. username and is_staff are
+included too, for the stateless views in api/authentication.py.
+"""
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import revoked_token_ids
+from .models import Customer
+
+CUSTOMER_ID_CLAIM = 'customerId'
+LOYALTY_TIER_CLAIM = 'loyaltyTier'
+
+# (minimum points, tier), highest first
+LOYALTY_TIERS = (
+    (1000, 'Gold'),
+    (250, 'Silver'),
+    (0, 'Bronze'),
+)
+
+
+def loyalty_tier(points):
+    for minimum, tier in LOYALTY_TIERS:
+        if points >= minimum:
+            return tier
+    return LOYALTY_TIERS[-1][1]
+
+
+class CustomerTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token pair with the customer claims; staff accounts without a
+    customer profile get null claims.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['username'] = user.get_username()
+        token['is_staff'] = user.is_staff
+        customer = (
+            Customer.objects.filter(Email=user.email)
+            .values('CustomerID', 'LoyaltyPoints').first()
+        )
+        token[CUSTOMER_ID_CLAIM] = customer['CustomerID'] if customer else None
+        token[LOYALTY_TIER_CLAIM] = loyalty_tier(customer['LoyaltyPoints']) if customer else None
+        return token
+
+
+class RevocationAwareTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refuses refresh tokens revoked at logout.
+    """
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        if refresh.get(api_settings.JTI_CLAIM) in revoked_token_ids():
+            raise InvalidToken('Token has been revoked')
+        return super().validate(attrs)
+
+
+def token_claim(request, claim):
+    """
+    The claim from the request's access token. Raises KeyError when the
+    request was not authenticated with a token that carries it.
+    """
+    token = request.auth
+    if token is None or not hasattr(token, 'payload'):
+        raise KeyError(claim)
+    return token.payload[claim]
+
+
+def request_customer_id(request):
+    """
+    The authenticated customer's id, read from the access token.
+
+    Tokens issued before the claim existed fall back to the email lookup.
+    Raises Customer.DoesNotExist when the user has no customer profile.
+    """
+    try:
+        customer_id = token_claim(request, CUSTOMER_ID_CLAIM)
+    except KeyError:
+        customer_id = (
+            Customer.objects.filter(Email=request.user.email)
+            .values_list('CustomerID', flat=True).first()
+        )
+    if customer_id is None:
+        raise Customer.DoesNotExist('Customer profile not found')
+    return customer_id
+
+
+def request_loyalty_tier(request):
+    """
+    The authenticated customer's loyalty tier from the access token, or
+    None when the token does not carry one.
+    """
+    try:
+        return token_claim(request, LOYALTY_TIER_CLAIM)
+    except KeyError:
+        return None
@@ -1,9 +1,26 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import DefaultRouter, Route
 from . import views
 
+
+class BulkRouter(DefaultRouter):
+    """
+    DefaultRouter whose list route also accepts PATCH and DELETE
+    for the bulk actions in api/mixins.py.
+    """
+    routes = [
+        route._replace(mapping={
+            **route.mapping,
+            'patch': 'bulk_partial_update',
+            'delete': 'bulk_destroy',
+        })
+        if isinstance(route, Route) and route.name == '{basename}-list' else route
+        for route in DefaultRouter.routes
+    ]
+
+
 # Create a router and register all viewsets
-router = DefaultRouter()
+router = BulkRouter()
 router.register(r'customers', views.CustomerViewSet, basename='customer')
 router.register(r'branches', views.BranchViewSet, basename='branch')
 router.register(r'staff', views.StaffViewSet, basename='staff')
@@ -25,6 +42,7 @@ router.register(r'challenge-participations', views.ChallengeParticipationViewSet
 router.register(r'inventory', views.InventoryViewSet, basename='inventory')
 router.register(r'order-customers', views.OrderCustomerViewSet, basename='ordercustomer')
 router.register(r'order-staff', views.OrderStaffViewSet, basename='orderstaff')
+router.register(r'tables', views.TableViewSet, basename='table')
 
 # URL patterns
 urlpatterns = [
@@ -1,12 +1,16 @@
 from django.shortcuts import render
 
 # Create your views here.
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from .models import (
     Customer, Branch, Staff, WorksAt, MenuItem, Order, OrderDetail, Bill,
     BillComputation, Discount, Applies, Reservation, ReservationCustomer,
     Feedback, FeedbackOrder, Supplier, FoodChallenge, ChallengeParticipation,
-    Inventory, OrderCustomer, OrderStaff
+    Inventory, OrderCustomer, OrderStaff, Table
 )
 from .serializers import (
     CustomerSerializer, BranchSerializer, StaffSerializer, WorksAtSerializer,
@@ -15,109 +19,331 @@ from .serializers import (
     ReservationSerializer, ReservationCustomerSerializer, FeedbackSerializer,
     FeedbackOrderSerializer, SupplierSerializer, FoodChallengeSerializer,
     ChallengeParticipationSerializer, InventorySerializer,
-    OrderCustomerSerializer, OrderStaffSerializer
+    OrderCustomerSerializer, OrderStaffSerializer, TableSerializer
 )
+from .pricing import ZERO, recompute_bills
+from .mixins import SparseFieldsMixin, BulkMixin
+from .menu_cache import cached_menu_response, bump_menu_version
+from .availability import as_aware, invalidate_day_index
+from .booking import SlotConflict, sync_claims
+from .tables import bump_tables_version
 
-class CustomerViewSet(viewsets.ModelViewSet):
+
+class BaseModelViewSet(SparseFieldsMixin, BulkMixin, viewsets.ModelViewSet):
+    """
+    Shared base for the router-registered viewsets.
+    """
+    # Actions that may read from a replica (see api/db_router.py)
+    replica_actions = ('list', 'retrieve')
+
+
+class CustomerViewSet(BaseModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
 
 
-class BranchViewSet(viewsets.ModelViewSet):
+class BranchViewSet(BaseModelViewSet):
     queryset = Branch.objects.all()
     serializer_class = BranchSerializer
+    # Small reference table, always returned whole
+    pagination_class = None
 
 
-class StaffViewSet(viewsets.ModelViewSet):
+class StaffViewSet(BaseModelViewSet):
     queryset = Staff.objects.all()
     serializer_class = StaffSerializer
 
 
-class WorksAtViewSet(viewsets.ModelViewSet):
+class WorksAtViewSet(BaseModelViewSet):
     queryset = WorksAt.objects.all()
     serializer_class = WorksAtSerializer
 
 
-class MenuItemViewSet(viewsets.ModelViewSet):
+class MenuItemViewSet(BaseModelViewSet):
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
-
-
-class OrderViewSet(viewsets.ModelViewSet):
+    # Menu bodies are cached under the version bumped on commit; a lagging
+    # replica could cache pre-edit data under the new version
+    replica_actions = ()
+
+    def list(self, request, *args, **kwargs):
+        # Only JSON bodies are cached; the browsable API renders normally
+        if request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        return cached_menu_response(
+            request,
+            request.build_absolute_uri(),
+            lambda: self._render_list(request, *args, **kwargs)
+        )
+
+    def _render_list(self, request, *args, **kwargs):
+        return JSONRenderer().render(super().list(request, *args, **kwargs).data)
+
+    @action(detail=False, url_path='by-category', pagination_class=None)
+    def by_category(self, request):
+        """
+        The whole menu grouped by Category, for MenuPage
+        """
+        def render():
+            categories = {}
+            items = MenuItem.objects.order_by('Category', 'Name')
+            for item in MenuItemSerializer(items, many=True).data:
+                categories.setdefault(item['Category'], []).append(item)
+            return JSONRenderer().render({
+                'success': True,
+                'categories': [
+                    {'category': category, 'items': category_items}
+                    for category, category_items in categories.items()
+                ]
+            })
+
+        return cached_menu_response(request, 'by-category', render)
+
+    # bulk_create/bulk_update send no model signals
+    def perform_bulk_create(self, objs):
+        objs = super().perform_bulk_create(objs)
+        transaction.on_commit(bump_menu_version)
+        return objs
+
+    def perform_bulk_update(self, objs, fields):
+        objs = super().perform_bulk_update(objs, fields)
+        transaction.on_commit(bump_menu_version)
+        return objs
+
+
+class OrderViewSet(BaseModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_ordering = ('-OrderDate', '-OrderID')
 
 
-class OrderDetailViewSet(viewsets.ModelViewSet):
+class OrderDetailViewSet(BaseModelViewSet):
     queryset = OrderDetail.objects.all()
     serializer_class = OrderDetailSerializer
 
 
-class BillViewSet(viewsets.ModelViewSet):
+class BillViewSet(BaseModelViewSet):
     queryset = Bill.objects.all()
     serializer_class = BillSerializer
-
-
-class BillComputationViewSet(viewsets.ModelViewSet):
+    pagination_ordering = ('-PaymentDate', '-BillID')
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        # Amounts are filled in by the pricing engine from the order lines
+        bill = serializer.save(TotalBeforeDiscount=ZERO, DiscountAmount=ZERO, TaxAmount=ZERO)
+        recompute_bills(Bill.objects.filter(pk=bill.pk))
+        bill.refresh_from_db()
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        bill = serializer.save()
+        recompute_bills(Bill.objects.filter(pk=bill.pk))
+        bill.refresh_from_db()
+
+    def perform_bulk_create(self, objs):
+        for bill in objs:
+            bill.TotalBeforeDiscount = bill.DiscountAmount = bill.TaxAmount = ZERO
+        objs = Bill.objects.bulk_create(objs)
+        bills = Bill.objects.filter(pk__in=[bill.pk for bill in objs])
+        recompute_bills(bills)
+        return list(bills)
+
+    def perform_bulk_update(self, objs, fields):
+        super().perform_bulk_update(objs, fields)
+        bills = Bill.objects.filter(pk__in=[bill.pk for bill in objs])
+        recompute_bills(bills)
+        return list(bills)
+
+
+class BillComputationViewSet(BaseModelViewSet):
     queryset = BillComputation.objects.all()
     serializer_class = BillComputationSerializer
 
+    def perform_create(self, serializer):
+        bill = serializer.validated_data['BillID']
+        recompute_bills(Bill.objects.filter(pk=bill.pk))
+        serializer.instance = BillComputation.objects.get(pk=bill.pk)
+
+    def perform_update(self, serializer):
+        computation = serializer.save()
+        recompute_bills(Bill.objects.filter(pk=computation.pk))
+        computation.refresh_from_db()
+
+    def perform_bulk_create(self, objs):
+        # TotalAmount is read-only; recompute_bills upserts the rows
+        bill_ids = [computation.BillID_id for computation in objs]
+        recompute_bills(Bill.objects.filter(pk__in=bill_ids))
+        return list(BillComputation.objects.filter(pk__in=bill_ids))
 
-class DiscountViewSet(viewsets.ModelViewSet):
+
+class DiscountViewSet(BaseModelViewSet):
     queryset = Discount.objects.all()
     serializer_class = DiscountSerializer
+    # Small reference table, always returned whole
+    pagination_class = None
 
 
-class AppliesViewSet(viewsets.ModelViewSet):
+class AppliesViewSet(BaseModelViewSet):
     queryset = Applies.objects.all()
     serializer_class = AppliesSerializer
 
-
-class ReservationViewSet(viewsets.ModelViewSet):
+    @transaction.atomic
+    def perform_create(self, serializer):
+        applies = serializer.save()
+        recompute_bills(Bill.objects.filter(pk=applies.BillID_id))
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_bill_id = serializer.instance.BillID_id
+        applies = serializer.save()
+        recompute_bills(Bill.objects.filter(pk__in=[old_bill_id, applies.BillID_id]))
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        bill_id = instance.BillID_id
+        instance.delete()
+        recompute_bills(Bill.objects.filter(pk=bill_id))
+
+    def perform_bulk_create(self, objs):
+        objs = super().perform_bulk_create(objs)
+        recompute_bills(Bill.objects.filter(pk__in={applies.BillID_id for applies in objs}))
+        return objs
+
+    def perform_bulk_update(self, objs, fields):
+        # BillID may have moved; recompute both the old and the new bills
+        old_bill_ids = set(
+            Applies.objects.filter(pk__in=[applies.pk for applies in objs])
+            .values_list('BillID', flat=True)
+        )
+        objs = super().perform_bulk_update(objs, fields)
+        bill_ids = old_bill_ids | {applies.BillID_id for applies in objs}
+        recompute_bills(Bill.objects.filter(pk__in=bill_ids))
+        return objs
+
+    def perform_bulk_destroy(self, queryset):
+        bill_ids = set(queryset.values_list('BillID', flat=True))
+        super().perform_bulk_destroy(queryset)
+        recompute_bills(Bill.objects.filter(pk__in=bill_ids))
+
+
+class ReservationViewSet(BaseModelViewSet):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
-
-
-class ReservationCustomerViewSet(viewsets.ModelViewSet):
+    pagination_ordering = ('-ReservationDateTime', '-ReservationID')
+
+    # Slot claims are written by post_save in the same transaction
+    def perform_create(self, serializer):
+        try:
+            with transaction.atomic():
+                super().perform_create(serializer)
+        except IntegrityError:
+            raise SlotConflict()
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                super().perform_update(serializer)
+        except IntegrityError:
+            raise SlotConflict()
+
+    def _sync_claims(self, objs):
+        try:
+            with transaction.atomic():
+                sync_claims(objs)
+        except IntegrityError:
+            raise SlotConflict()
+
+    # bulk_create/bulk_update send no model signals, so the availability
+    # index is rebuilt for every branch and day the batch touched
+    def _invalidate_days(self, placements):
+        days = {
+            (branch_id, timezone.localtime(as_aware(value)).date())
+            for branch_id, value in placements if branch_id is not None
+        }
+
+        def invalidate():
+            for branch_id, day in days:
+                invalidate_day_index(branch_id, day)
+
+        transaction.on_commit(invalidate)
+
+    def perform_bulk_create(self, objs):
+        objs = super().perform_bulk_create(objs)
+        self._sync_claims(objs)
+        self._invalidate_days((r.BranchID_id, r.ReservationDateTime) for r in objs)
+        return objs
+
+    def perform_bulk_update(self, objs, fields):
+        old_placements = list(
+            Reservation.objects.filter(pk__in=[reservation.pk for reservation in objs])
+            .values_list('BranchID', 'ReservationDateTime')
+        )
+        objs = super().perform_bulk_update(objs, fields)
+        self._sync_claims(objs)
+        self._invalidate_days(old_placements + [(r.BranchID_id, r.ReservationDateTime) for r in objs])
+        return objs
+
+
+class ReservationCustomerViewSet(BaseModelViewSet):
     queryset = ReservationCustomer.objects.all()
     serializer_class = ReservationCustomerSerializer
 
 
-class FeedbackViewSet(viewsets.ModelViewSet):
+class FeedbackViewSet(BaseModelViewSet):
     queryset = Feedback.objects.all()
     serializer_class = FeedbackSerializer
+    pagination_ordering = ('-Date', '-FeedbackID')
 
 
-class FeedbackOrderViewSet(viewsets.ModelViewSet):
+class FeedbackOrderViewSet(BaseModelViewSet):
     queryset = FeedbackOrder.objects.all()
     serializer_class = FeedbackOrderSerializer
 
 
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(BaseModelViewSet):
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
 
 
-class FoodChallengeViewSet(viewsets.ModelViewSet):
+class FoodChallengeViewSet(BaseModelViewSet):
     queryset = FoodChallenge.objects.all()
     serializer_class = FoodChallengeSerializer
 
 
-class ChallengeParticipationViewSet(viewsets.ModelViewSet):
+class ChallengeParticipationViewSet(BaseModelViewSet):
     queryset = ChallengeParticipation.objects.all()
     serializer_class = ChallengeParticipationSerializer
 
 
-class InventoryViewSet(viewsets.ModelViewSet):
+class InventoryViewSet(BaseModelViewSet):
     queryset = Inventory.objects.all()
     serializer_class = InventorySerializer
 
 
-class OrderCustomerViewSet(viewsets.ModelViewSet):
+class OrderCustomerViewSet(BaseModelViewSet):
     queryset = OrderCustomer.objects.all()
     serializer_class = OrderCustomerSerializer
 
 
-class OrderStaffViewSet(viewsets.ModelViewSet):
+class OrderStaffViewSet(BaseModelViewSet):
     queryset = OrderStaff.objects.all()
     serializer_class = OrderStaffSerializer
+
+
+class TableViewSet(BaseModelViewSet):
+    queryset = Table.objects.all()
+    serializer_class = TableSerializer
+    # The cursor position is read from the first column, so it must be a
+    # scalar: ordering by BranchID would put the Branch's name in it
+    pagination_ordering = ('TableID',)
+
+    # bulk_create/bulk_update send no model signals
+    def perform_bulk_create(self, objs):
+        objs = super().perform_bulk_create(objs)
+        transaction.on_commit(bump_tables_version)
+        return objs
+
+    def perform_bulk_update(self, objs, fields):
+        objs = super().perform_bulk_update(objs, fields)
+        transaction.on_commit(bump_tables_version)
+        return objs
@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,19 +50,37 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # SimpleJWT plus revocation and per-view stateless mode
+        'api.authentication.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Change to IsAuthenticated later
     ],
+    # Keyset (cursor) pagination on every list endpoint; see api/pagination.py
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+    # Per-user/per-IP token buckets; see THROTTLE_BUCKETS below
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.TokenBucketThrottle',
+    ],
 }
+
+# Upper bound for ?page_size= on list endpoints
+API_MAX_PAGE_SIZE = 200
+
+# Upper bound on items in one bulk create/update/delete request
+API_MAX_BULK_SIZE = 1000
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # ⬅️ MUST BE AT TOP!
+    # Query count, timings and size per route; see api/instrumentation.py
+    "api.instrumentation.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Sends opted-in reads to DATABASE_REPLICAS; see api/db_router.py
+    "api.db_router.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -71,7 +91,6 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
@@ -79,6 +98,17 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            # Parse each template once per process (email templates are
+            # rendered for every reservation)
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
         },
     },
 ]
@@ -92,14 +122,86 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # backend/backend/settings.py
 # Find the DATABASES section and REPLACE it with this:
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',  # Database file will be created in backend folder
+# Pick the database with DB_PROFILE: 'sqlite' (default) or 'postgres'
+DB_PROFILE = os.environ.get('DB_PROFILE', 'sqlite')
+
+if DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'restaurant'),
+            'USER': os.environ.get('POSTGRES_USER', 'restaurant'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # Check a reused connection is alive before each request
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # psycopg 3 connection pool (needs psycopg[pool]); pooled
+                # connections stay open across requests, so CONN_MAX_AGE
+                # stays at 0 as Django requires
+                'pool': {
+                    'min_size': int(os.environ.get('POSTGRES_POOL_MIN', 2)),
+                    'max_size': int(os.environ.get('POSTGRES_POOL_MAX', 10)),
+                    'timeout': int(os.environ.get('POSTGRES_POOL_TIMEOUT', 10)),
+                },
+            },
+        }
     }
-}
-
-# That's it! Just these 5 lines replace your entire MySQL configuration
+    # Streaming replicas, one alias per host in POSTGRES_REPLICA_HOSTS
+    for number, host in enumerate(filter(None, os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',')), 1):
+        DATABASES[f'replica{number}'] = dict(
+            DATABASES['default'], HOST=host.strip(), TEST={'MIRROR': 'default'}
+        )
+elif DB_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),  # Database file will be created in backend folder
+            # Keep each thread's connection (and its pragmas) between requests
+            'CONN_MAX_AGE': int(os.environ.get('SQLITE_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Run on every new connection. WAL lets readers work while a
+                # write is in progress; synchronous=NORMAL is durable in WAL
+                # mode except on power loss; writers wait up to 5s for the
+                # lock instead of failing; reads go through a 256 MiB mmap.
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA busy_timeout=5000;'
+                    'PRAGMA mmap_size=268435456;'
+                ),
+                # Take the write lock when a transaction starts, so two
+                # transactions never deadlock upgrading read locks (which
+                # fails at once with "database is locked", ignoring
+                # busy_timeout)
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+    # A local replica file, refreshed from the primary by
+    # `manage.py sync_replica`
+    if os.environ.get('SQLITE_REPLICA_PATH'):
+        DATABASES['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ['SQLITE_REPLICA_PATH'],
+            'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': 'PRAGMA query_only=1;PRAGMA busy_timeout=5000;PRAGMA mmap_size=268435456;',
+            },
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    raise ImproperlyConfigured(f"Unknown DB_PROFILE {DB_PROFILE!r}; use 'sqlite' or 'postgres'")
+
+# Aliases that replica-eligible reads are spread over
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api.db_router.ReplicaRouter']
+
+# Seconds a client that wrote keeps reading from the primary
+REPLICA_PIN_SECONDS = 5
 
 
 # Password validation
@@ -196,8 +298,26 @@ SIMPLE_JWT = {
 
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+
+    # Adds customerId and loyaltyTier claims (see api/tokens.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'api.tokens.CustomerTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'api.tokens.RevocationAwareTokenRefreshSerializer',
 }
 
+# Views authenticated from the token claims alone, without loading the
+# User row (see api/authentication.py)
+JWT_STATELESS_VIEWS = [
+    'api.reservation_views.create_reservation',
+    'api.reservation_views.get_my_reservations',
+    'api.reservation_views.cancel_reservation',
+    'api.order_views.get_my_orders',
+    'api.checkout_views.checkout',
+]
+
+# Seconds each worker reuses its cached set of revoked token ids. The cache
+# is per process, so a logout reaches the other workers within this time.
+REVOKED_TOKENS_CACHE_SECONDS = 10
+
 # Add this to backend/backend/settings.py at the bottom
 
 # ========================================
@@ -221,4 +341,110 @@ SERVER_EMAIL = 'your-email@gmail.com'
 # Restaurant Info for Emails
 RESTAURANT_NAME = "ROYALS Restaurant"
 RESTAURANT_PHONE = "+1234567890"
-RESTAURANT_ADDRESS = "main Shahrah-e-Faisal, Karachi, Pakistan"
\ No newline at end of file
+RESTAURANT_ADDRESS = "main Shahrah-e-Faisal, Karachi, Pakistan"
+
+# ========================================
+# BILLING
+# ========================================
+
+# Tax charged on the discounted subtotal (see api/pricing.py)
+TAX_RATE = '0.18'
+
+# ========================================
+# CACHING
+# ========================================
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'restaurant-default',
+    },
+    # Token buckets (api/throttling.py). LocMem is per process: each worker
+    # then enforces THROTTLE_BUCKETS on its own, so the real limit is the
+    # configured one times the number of workers. Set REDIS_URL to share it.
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'restaurant-throttle',
+    },
+}
+if os.environ.get('REDIS_URL'):
+    CACHES['throttle'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+# Seconds the /api/stats/dashboard/ figures are reused before recomputing
+DASHBOARD_STATS_TTL = 30
+
+# Seconds a rendered menu body is kept; menu edits invalidate it immediately
+MENU_CACHE_TTL = 3600
+
+# Seconds a worker keeps its menu version. Edits bump it only in the worker
+# that handled them (the cache is per process), so this bounds how long
+# another worker can keep serving the old menu
+MENU_VERSION_TTL = 60
+
+# Seconds a worker keeps its table layouts. Table and Branch edits bump
+# the layout version only in the worker that handled them (the cache is
+# per process), so this bounds how long another worker uses the old layout
+TABLES_VERSION_TTL = 60
+
+# Seconds a day's reservation index is kept in the cache. Writes patch it
+# in place, but only in the worker that handled them, so this bounds how
+# stale another worker's availability answers can be
+AVAILABILITY_INDEX_TTL = 60
+
+# ========================================
+# EMAIL OUTBOX
+# ========================================
+
+# Messages sent per batch by `manage.py send_outbox`
+EMAIL_OUTBOX_BATCH_SIZE = 50
+
+# Attempts before a message is marked Failed (dead-lettered)
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+# Retry backoff: base delay doubled per attempt, capped
+EMAIL_OUTBOX_RETRY_SECONDS = 60
+EMAIL_OUTBOX_MAX_RETRY_SECONDS = 60 * 60
+
+# ========================================
+# THROTTLING
+# ========================================
+
+# Token buckets per scope as (refill rate, burst size); see api/throttling.py
+THROTTLE_BUCKETS = {
+    'anon': ('120/min', 60),
+    'user': ('300/min', 100),
+    'register': ('10/hour', 5),
+    'availability': ('60/min', 30),
+}
+
+# URL name -> scope for routes with their own limits; other routes use
+# 'user' or 'anon'. Buckets are still kept per user or IP.
+THROTTLE_ROUTES = {
+    'register': 'register',
+    'available_tables': 'availability',
+    'time_slots': 'availability',
+    'availability': 'availability',
+}
+
+# ========================================
+# METRICS
+# ========================================
+
+# Fraction of requests whose queries and serializer time are measured
+# (all of them when DEBUG is on); see api/instrumentation.py
+REQUEST_METRICS_SAMPLE_RATE = 0.05
+
+# Send the measurements back in a Server-Timing response header; off in
+# production, where it would show every client the DB and serializer times
+REQUEST_METRICS_SERVER_TIMING = DEBUG
+
+# Directory where each worker process keeps its counters for GET /metrics
+# (see api/metrics.py); unset keeps them in process memory, which is
+# enough for a single process. Clear it when restarting all workers.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+
+# /metrics needs `Authorization: Bearer <token>`; unset, it answers 403
+METRICS_BEARER_TOKEN = os.environ.get('METRICS_BEARER_TOKEN')
@@ -6,7 +6,18 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from api.auth_views import register_customer, get_current_user
+from api.auth_views import register_customer, get_current_user, logout
+from api.checkout_views import checkout, quote
+from api.order_views import get_my_orders
+from api.stats_views import get_dashboard_stats, get_request_metrics, prometheus_metrics
+from api.reservation_views import (
+    create_reservation,
+    get_my_reservations,
+    cancel_reservation,
+    get_available_tables,
+    get_available_time_slots,
+    get_availability
+)
 
 # Simple home view
 def home(request):
@@ -14,11 +25,15 @@ def home(request):
         'message': 'Welcome to Restaurant Management System API',
         'endpoints': {
             'admin': '/admin/',
+            'metrics': '/metrics',
             'api': '/api/',
             'login': '/api/token/',
             'refresh': '/api/token/refresh/',
             'register': '/api/register/',
             'me': '/api/me/',
+            'logout': '/api/logout/',
+            'checkout': '/api/checkout/',
+            'quote': '/api/quote/',
             'customers': '/api/customers/',
             'menu_items': '/api/menu-items/',
             'orders': '/api/orders/',
@@ -28,37 +43,38 @@ def home(request):
         'staff_dashboard': 'http://localhost:3000/staff',
     })
 
+# Custom endpoints are listed before the router include so that paths such as
+# /api/reservations/create/ are not swallowed by the router's detail routes.
 urlpatterns = [
     path('', home, name='home'),
     path('admin/', admin.site.urls),
-    path('api/', include('api.urls')),
-    
+    path('metrics', prometheus_metrics, name='metrics'),
+
     # JWT Authentication endpoints
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    
+
     # Custom auth endpoints
     path('api/register/', register_customer, name='register'),
     path('api/me/', get_current_user, name='current_user'),
-]
+    path('api/logout/', logout, name='logout'),
 
-# Add these imports to backend/backend/urls.py
-from api.reservation_views import (
-    create_reservation,
-    get_my_reservations,
-    cancel_reservation,
-    get_available_tables,
-    get_available_time_slots
-)
+    # Checkout and pricing endpoints
+    path('api/checkout/', checkout, name='checkout'),
+    path('api/quote/', quote, name='quote'),
+    path('api/orders/my/', get_my_orders, name='my_orders'),
+
+    # Staff dashboard
+    path('api/stats/dashboard/', get_dashboard_stats, name='dashboard_stats'),
+    path('api/stats/requests/', get_request_metrics, name='request_metrics'),
 
-# Add these to urlpatterns in backend/backend/urls.py
-urlpatterns = [
-    # ... existing patterns ...
-    
     # Reservation endpoints
     path('api/reservations/create/', create_reservation, name='create_reservation'),
     path('api/reservations/my/', get_my_reservations, name='my_reservations'),
     path('api/reservations/<int:reservation_id>/cancel/', cancel_reservation, name='cancel_reservation'),
     path('api/reservations/available-tables/', get_available_tables, name='available_tables'),
     path('api/reservations/time-slots/', get_available_time_slots, name='time_slots'),
-]
\ No newline at end of file
+    path('api/reservations/availability/', get_availability, name='availability'),
+
+    path('api/', include('api.urls')),
+]
@@ -3,18 +3,24 @@ import { billAPI } from '../../services/api';
 
 const Bills = () => {
   const [bills, setBills] = useState([]);
+  const [next, setNext] = useState(null);
   const [loading, setLoading] = useState(true);
 
-  useEffect(() => {
-    billAPI.getAll()
+  const loadPage = (cursor) => {
+    billAPI.getPage(cursor)
       .then(res => {
-        setBills(res.data);
+        setBills(prev => (cursor ? prev.concat(res.data) : res.data));
+        setNext(res.next);
         setLoading(false);
       })
       .catch(err => {
         console.error(err);
         setLoading(false);
       });
+  };
+
+  useEffect(() => {
+    loadPage();
   }, []);
 
   if (loading) return <div className="loading">Loading bills...</div>;
@@ -58,6 +64,9 @@ const Bills = () => {
           </tbody>
         </table>
       )}
+      {next && (
+        <button className="btn-primary" style={{marginTop:'1rem'}} onClick={() => loadPage(next)}>Load more</button>
+      )}
     </div>
   );
 };
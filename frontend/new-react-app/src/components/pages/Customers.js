@@ -3,6 +3,7 @@ import { customerAPI } from '../../services/api';
 
 const Customers = () => {
   const [customers, setCustomers] = useState([]);
+  const [next, setNext] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
@@ -10,11 +11,12 @@ const Customers = () => {
     fetchCustomers();
   }, []);
 
-  const fetchCustomers = async () => {
-    setLoading(true);
+  const fetchCustomers = async (cursor) => {
+    if (!cursor) setLoading(true);
     try {
-      const response = await customerAPI.getAll();
-      setCustomers(response.data);
+      const response = await customerAPI.getPage(cursor);
+      setCustomers(prev => (cursor ? prev.concat(response.data) : response.data));
+      setNext(response.next);
       setLoading(false);
     } catch (err) {
       console.error(err);
@@ -79,6 +81,9 @@ const Customers = () => {
           </tbody>
         </table>
       )}
+      {next && (
+        <button className="btn-primary" style={{marginTop:'1rem'}} onClick={() => fetchCustomers(next)}>Load more</button>
+      )}
     </div>
   );
 };
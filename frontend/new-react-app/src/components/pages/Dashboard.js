@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { customerAPI, orderAPI, menuItemAPI, reservationAPI } from '../../services/api';
+import { statsAPI } from '../../services/api';
 
 const Dashboard = () => {
   const [stats, setStats] = useState({
@@ -7,25 +7,18 @@ const Dashboard = () => {
     totalOrders: 0,
     totalMenuItems: 0,
     totalReservations: 0,
+    openOrders: 0,
+    todayReservations: 0,
+    todayRevenue: '0.00',
+    lowStockCount: 0,
   });
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetchStats = async () => {
       try {
-        const [customers, orders, menuItems, reservations] = await Promise.all([
-          customerAPI.getAll(),
-          orderAPI.getAll(),
-          menuItemAPI.getAll(),
-          reservationAPI.getAll(),
-        ]);
-
-        setStats({
-          totalCustomers: customers.data.length,
-          totalOrders: orders.data.length,
-          totalMenuItems: menuItems.data.length,
-          totalReservations: reservations.data.length,
-        });
+        const response = await statsAPI.dashboard();
+        setStats(response.data.stats);
         setLoading(false);
       } catch (error) {
         console.error('Error fetching stats:', error);
@@ -58,6 +51,22 @@ const Dashboard = () => {
           <h2>{stats.totalReservations}</h2>
           <p>Reservations</p>
         </div>
+        <div className="card" style={{ backgroundColor: '#9b59b6', color: 'white' }}>
+          <h2>${stats.todayRevenue}</h2>
+          <p>Today's Revenue</p>
+        </div>
+        <div className="card" style={{ backgroundColor: '#1abc9c', color: 'white' }}>
+          <h2>{stats.openOrders}</h2>
+          <p>Open Orders</p>
+        </div>
+        <div className="card" style={{ backgroundColor: '#34495e', color: 'white' }}>
+          <h2>{stats.todayReservations}</h2>
+          <p>Today's Reservations</p>
+        </div>
+        <div className="card" style={{ backgroundColor: '#c0392b', color: 'white' }}>
+          <h2>{stats.lowStockCount}</h2>
+          <p>Low-Stock Items</p>
+        </div>
       </div>
       
       <div className="card" style={{ marginTop: '2rem' }}>
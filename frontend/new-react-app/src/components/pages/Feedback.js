@@ -3,18 +3,24 @@ import { feedbackAPI } from '../../services/api';
 
 const Feedback = () => {
   const [feedbacks, setFeedbacks] = useState([]);
+  const [next, setNext] = useState(null);
   const [loading, setLoading] = useState(true);
 
-  useEffect(() => {
-    feedbackAPI.getAll()
+  const loadPage = (cursor) => {
+    feedbackAPI.getPage(cursor)
       .then(res => {
-        setFeedbacks(res.data);
+        setFeedbacks(prev => (cursor ? prev.concat(res.data) : res.data));
+        setNext(res.next);
         setLoading(false);
       })
       .catch(err => {
         console.error(err);
         setLoading(false);
       });
+  };
+
+  useEffect(() => {
+    loadPage();
   }, []);
 
   if (loading) return <div className="loading">Loading feedback...</div>;
@@ -39,6 +45,9 @@ const Feedback = () => {
           ))}
         </div>
       )}
+      {next && (
+        <button className="btn-primary" style={{marginTop:'1rem'}} onClick={() => loadPage(next)}>Load more</button>
+      )}
     </div>
   );
 };
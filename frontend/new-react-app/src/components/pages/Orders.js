@@ -6,18 +6,24 @@ import { orderAPI } from '../../services/api';
 
 const Orders = () => {
   const [orders, setOrders] = useState([]);
+  const [next, setNext] = useState(null);
   const [loading, setLoading] = useState(true);
 
-  useEffect(() => {
-    orderAPI.getAll()
+  const loadPage = (cursor) => {
+    orderAPI.getPage(cursor)
       .then(res => {
-        setOrders(res.data);
+        setOrders(prev => (cursor ? prev.concat(res.data) : res.data));
+        setNext(res.next);
         setLoading(false);
       })
       .catch(err => {
         console.error(err);
         setLoading(false);
       });
+  };
+
+  useEffect(() => {
+    loadPage();
   }, []);
 
   if (loading) return <div className="loading">Loading orders...</div>;
@@ -55,6 +61,9 @@ const Orders = () => {
           </tbody>
         </table>
       )}
+      {next && (
+        <button className="btn-primary" style={{marginTop:'1rem'}} onClick={() => loadPage(next)}>Load more</button>
+      )}
     </div>
   );
 };
@@ -3,18 +3,24 @@ import { reservationAPI } from '../../services/api';
 
 const Reservations = () => {
   const [reservations, setReservations] = useState([]);
+  const [next, setNext] = useState(null);
   const [loading, setLoading] = useState(true);
 
-  useEffect(() => {
-    reservationAPI.getAll()
+  const loadPage = (cursor) => {
+    reservationAPI.getPage(cursor)
       .then(res => {
-        setReservations(res.data);
+        setReservations(prev => (cursor ? prev.concat(res.data) : res.data));
+        setNext(res.next);
         setLoading(false);
       })
       .catch(err => {
         console.error(err);
         setLoading(false);
       });
+  };
+
+  useEffect(() => {
+    loadPage();
   }, []);
 
   if (loading) return <div className="loading">Loading reservations...</div>;
@@ -58,6 +64,9 @@ const Reservations = () => {
           </tbody>
         </table>
       )}
+      {next && (
+        <button className="btn-primary" style={{marginTop:'1rem'}} onClick={() => loadPage(next)}>Load more</button>
+      )}
     </div>
   );
 };
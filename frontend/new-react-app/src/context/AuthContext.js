@@ -84,6 +84,12 @@ export const AuthProvider = ({ children }) => {
   };
 
   const logout = () => {
+    // Revoke the tokens server-side; the local logout does not wait for it
+    if (localStorage.getItem('access_token')) {
+      axios.post('http://127.0.0.1:8000/api/logout/', {
+        refresh: localStorage.getItem('refresh_token')
+      }).catch(() => {});
+    }
     localStorage.removeItem('access_token');
     localStorage.removeItem('refresh_token');
     localStorage.removeItem('user_type');
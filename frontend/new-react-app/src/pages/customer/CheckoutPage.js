@@ -115,103 +115,27 @@ const CheckoutPage = () => {
         }
       };
 
-      // Step 1: Create Order
-      console.log('Step 1: Creating order...');
-      const orderData = {
-        OrderDate: new Date().toISOString(),
-        Status: 'Pending'
-      };
-      
-      const orderResponse = await axios.post(
-        'http://127.0.0.1:8000/api/orders/',
-        orderData,
-        config
-      );
-      const orderId = orderResponse.data.OrderID;
-      console.log('Order created with ID:', orderId);
-
-      // Step 2: Create Order Details
-      console.log('Step 2: Creating order details...');
-      for (const item of cartItems) {
-        const orderDetailData = {
-          OrderID: orderId,
+      // Place the whole order in a single atomic request
+      console.log('Submitting checkout...');
+      const checkoutData = {
+        items: cartItems.map(item => ({
           MenuItemID: item.MenuItemID,
           Quantity: item.quantity
-        };
-        console.log('Creating order detail:', orderDetailData);
-        
-        await axios.post(
-          'http://127.0.0.1:8000/api/order-details/',
-          orderDetailData,
-          config
-        );
-      }
-      console.log('Order details created');
-
-      // Step 3: Link Order to Customer
-      console.log('Step 3: Linking order to customer...');
-      const orderCustomerData = {
-        OrderID: orderId,
-        CustomerID: user.customerId
-      };
-      console.log('Order customer data:', orderCustomerData);
-      
-      await axios.post(
-        'http://127.0.0.1:8000/api/order-customers/',
-        orderCustomerData,
-        config
-      );
-      console.log('Order linked to customer');
-
-      // Step 4: Create Bill
-      console.log('Step 4: Creating bill...');
-      const billData = {
-        OrderID: orderId,
-        TotalBeforeDiscount: calculateSubtotal().toFixed(2),
-        DiscountAmount: calculateDiscount().toFixed(2),
-        TaxAmount: calculateTax().toFixed(2),
+        })),
         PaymentMethod: paymentMethod,
-        PaymentDate: new Date().toISOString()
+        DiscountID: appliedDiscount ? appliedDiscount.DiscountID : null
       };
-      console.log('Bill data:', billData);
-      
-      const billResponse = await axios.post(
-        'http://127.0.0.1:8000/api/bills/',
-        billData,
-        config
-      );
-      const billId = billResponse.data.BillID;
-      console.log('Bill created with ID:', billId);
-
-      // Step 5: Apply discount if exists
-      if (appliedDiscount) {
-        console.log('Step 5: Applying discount...');
-        const appliesData = {
-          BillID: billId,
-          DiscountID: appliedDiscount.DiscountID
-        };
-        
-        await axios.post(
-          'http://127.0.0.1:8000/api/applies/',
-          appliesData,
-          config
-        );
-        console.log('Discount applied to bill');
-      }
+      console.log('Checkout data:', checkoutData);
 
-      // Step 6: Create Bill Computation
-      console.log('Step 6: Creating bill computation...');
-      const billComputationData = {
-        BillID: billId,
-        TotalAmount: calculateTotal().toFixed(2)
-      };
-      
-      await axios.post(
-        'http://127.0.0.1:8000/api/bill-computations/',
-        billComputationData,
+      const checkoutResponse = await axios.post(
+        'http://127.0.0.1:8000/api/checkout/',
+        checkoutData,
         config
       );
-      console.log('Bill computation created');
+      const orderId = checkoutResponse.data.order.OrderID;
+      const billId = checkoutResponse.data.bill.BillID;
+      const total = parseFloat(checkoutResponse.data.total);
+      console.log('Order created with ID:', orderId, 'Bill ID:', billId);
 
       // Success!
       console.log('Order placed successfully!');
@@ -221,7 +145,7 @@ const CheckoutPage = () => {
         state: { 
           orderId, 
           billId,
-          total: calculateTotal() 
+          total
         } 
       });
 
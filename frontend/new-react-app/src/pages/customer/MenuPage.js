@@ -18,9 +18,11 @@ const MenuPage = () => {
 
   const fetchMenuItems = async () => {
     try {
-      const response = await menuItemAPI.getAll();
-      setMenuItems(response.data);
-      setFilteredItems(response.data);
+      // Served from the server-side menu cache in a single request
+      const response = await menuItemAPI.getByCategory();
+      const items = response.data.categories.flatMap(group => group.items);
+      setMenuItems(items);
+      setFilteredItems(items);
       setLoading(false);
     } catch (error) {
       console.error('Error fetching menu:', error);
@@ -9,7 +9,8 @@ const MyOrdersPage = () => {
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
-  const { user, isAuthenticated } = useAuth();
+  const [nextUrl, setNextUrl] = useState(null);
+  const { isAuthenticated } = useAuth();
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -21,60 +22,16 @@ const MyOrdersPage = () => {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [isAuthenticated, navigate]);
 
-  const fetchMyOrders = async () => {
+  const fetchMyOrders = async (url = 'http://127.0.0.1:8000/api/orders/my/', append = false) => {
     try {
-      // Get all order-customer relationships for this customer
-      const orderCustomerRes = await axios.get('http://127.0.0.1:8000/api/order-customers/');
-      const myOrderRels = orderCustomerRes.data.filter(
-        rel => rel.CustomerID === user.customerId
-      );
-
-      // Get full order details for each order
-      const ordersData = await Promise.all(
-        myOrderRels.map(async (rel) => {
-          const orderRes = await axios.get(`http://127.0.0.1:8000/api/orders/${rel.OrderID}/`);
-          const order = orderRes.data;
-
-          // Get order details (items)
-          const orderDetailsRes = await axios.get('http://127.0.0.1:8000/api/order-details/');
-          const orderItems = orderDetailsRes.data.filter(
-            detail => detail.OrderID === order.OrderID
-          );
-
-          // Get menu item details for each order item
-          const itemsWithDetails = await Promise.all(
-            orderItems.map(async (item) => {
-              const menuItemRes = await axios.get(
-                `http://127.0.0.1:8000/api/menu-items/${item.MenuItemID}/`
-              );
-              return {
-                ...item,
-                menuItem: menuItemRes.data
-              };
-            })
-          );
-
-          // Get bill information
-          let bill = null;
-          try {
-            const billsRes = await axios.get('http://127.0.0.1:8000/api/bills/');
-            bill = billsRes.data.find(b => b.OrderID === order.OrderID);
-          } catch (err) {
-            console.error('Error fetching bill:', err);
-          }
-
-          return {
-            ...order,
-            items: itemsWithDetails,
-            bill
-          };
-        })
-      );
-
-      // Sort by date (newest first)
-      ordersData.sort((a, b) => new Date(b.OrderDate) - new Date(a.OrderDate));
-      
-      setOrders(ordersData);
+      // One request returns a page of orders with their items and bill
+      const token = localStorage.getItem('access_token');
+      const response = await axios.get(url, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+
+      setOrders(prev => append ? [...prev, ...response.data.orders] : response.data.orders);
+      setNextUrl(response.data.next);
       setLoading(false);
     } catch (err) {
       console.error('Error fetching orders:', err);
@@ -96,7 +53,7 @@ const MyOrdersPage = () => {
 
   const calculateOrderTotal = (bill) => {
     if (!bill) return 0;
-    return parseFloat(bill.TotalBeforeDiscount) - parseFloat(bill.DiscountAmount) + parseFloat(bill.TaxAmount);
+    return parseFloat(bill.TotalAmount);
   };
 
   if (loading) {
@@ -193,6 +150,11 @@ const MyOrdersPage = () => {
                 </div>
               </div>
             ))}
+            {nextUrl && (
+              <button onClick={() => fetchMyOrders(nextUrl, true)} className="btn-order-now">
+                Load More Orders
+              </button>
+            )}
           </div>
         )}
 
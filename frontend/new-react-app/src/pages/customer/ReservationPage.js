@@ -16,6 +16,7 @@ const ReservationPage = () => {
   const [selectedTable, setSelectedTable] = useState(null);
   const [availableTimeSlots, setAvailableTimeSlots] = useState([]);
   const [availableTables, setAvailableTables] = useState([]);
+  const [tablesBySlot, setTablesBySlot] = useState({});
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [success, setSuccess] = useState('');
@@ -39,8 +40,8 @@ const ReservationPage = () => {
     return maxDate.toISOString().split('T')[0];
   };
 
-  // Fetch available time slots when date is selected
-  const handleDateChange = async (date) => {
+  // Fetch the whole day's availability for the party size when date is selected
+  const handleDateChange = async (date, party = numPeople) => {
     setSelectedDate(date);
     setSelectedTime('');
     setAvailableTables([]);
@@ -48,37 +49,33 @@ const ReservationPage = () => {
     
     if (!date) return;
 
+    setLoading(true);
     try {
       const response = await axios.get(
-        `http://127.0.0.1:8000/api/reservations/time-slots/?date=${date}`
+        `http://127.0.0.1:8000/api/reservations/availability/?date=${date}&party=${party}`
+      );
+      const bySlot = {};
+      response.data.slots.forEach(slot => {
+        bySlot[slot.time] = slot.available_tables;
+      });
+      setTablesBySlot(bySlot);
+      setAvailableTimeSlots(
+        // Bookable also covers large parties seated on merged tables
+        response.data.slots.filter(slot => slot.bookable).map(slot => slot.time)
       );
-      setAvailableTimeSlots(response.data.time_slots);
+      setLoading(false);
     } catch (err) {
-      console.error('Error fetching time slots:', err);
+      console.error('Error fetching availability:', err);
       setError('Failed to load time slots');
+      setLoading(false);
     }
   };
 
-  // Fetch available tables when time is selected
-  const handleTimeChange = async (time) => {
+  // Tables for the chosen time come from the day's availability
+  const handleTimeChange = (time) => {
     setSelectedTime(time);
-    setAvailableTables([]);
     setSelectedTable(null);
-    
-    if (!selectedDate || !time) return;
-
-    setLoading(true);
-    try {
-      const response = await axios.get(
-        `http://127.0.0.1:8000/api/reservations/available-tables/?date=${selectedDate}&time=${time}`
-      );
-      setAvailableTables(response.data.available_tables);
-      setLoading(false);
-    } catch (err) {
-      console.error('Error fetching tables:', err);
-      setError('Failed to load available tables');
-      setLoading(false);
-    }
+    setAvailableTables(tablesBySlot[time] || []);
   };
 
   const handleNextStep = () => {
@@ -95,10 +92,7 @@ const ReservationPage = () => {
       }
       setStep(2);
     } else if (step === 2) {
-      if (!selectedTable) {
-        setError('Please select a table');
-        return;
-      }
+      // No table selected means the restaurant picks the best fit
       setStep(3);
     }
   };
@@ -123,7 +117,7 @@ const ReservationPage = () => {
         {
           ReservationDateTime: reservationDateTime,
           NumPeople: numPeople,
-          TableNumber: selectedTable,
+          ...(selectedTable ? { TableNumber: selectedTable } : {}),
           CustomerID: user.customerId
         },
         {
@@ -196,7 +190,12 @@ const ReservationPage = () => {
               <label>Number of People *</label>
               <select 
                 value={numPeople} 
-                onChange={(e) => setNumPeople(parseInt(e.target.value))}
+                onChange={(e) => {
+                  const party = parseInt(e.target.value);
+                  setNumPeople(party);
+                  // Tables that fit the party differ, so reload the day
+                  if (selectedDate) handleDateChange(selectedDate, party);
+                }}
                 className="form-control"
               >
                 {[1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20].map(num => (
@@ -256,13 +255,16 @@ const ReservationPage = () => {
 
             {loading ? (
               <div className="loading">Loading available tables...</div>
-            ) : availableTables.length === 0 ? (
-              <div className="no-tables">
-                <p>😔 No tables available at this time</p>
-                <p>Please select a different time</p>
-              </div>
             ) : (
               <div className="tables-grid">
+                <div
+                  className={`table-card ${selectedTable === null ? 'selected' : ''}`}
+                  onClick={() => setSelectedTable(null)}
+                >
+                  <div className="table-icon">✨</div>
+                  <div className="table-number">Any table</div>
+                  <div className="table-capacity">Best fit for your party</div>
+                </div>
                 {availableTables.map(tableNum => (
                   <div
                     key={tableNum}
@@ -284,7 +286,6 @@ const ReservationPage = () => {
               <button 
                 className="btn-next" 
                 onClick={handleNextStep}
-                disabled={!selectedTable}
               >
                 Next: Confirm →
               </button>
@@ -336,7 +337,9 @@ const ReservationPage = () => {
                 <span className="detail-icon">🍽️</span>
                 <div>
                   <div className="detail-label">Table</div>
-                  <div className="detail-value">Table {selectedTable}</div>
+                  <div className="detail-value">
+                    {selectedTable ? `Table ${selectedTable}` : 'Assigned automatically'}
+                  </div>
                 </div>
               </div>
 
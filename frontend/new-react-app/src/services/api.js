@@ -11,9 +11,34 @@ const api = axios.create({
   },
 });
 
+// List endpoints are cursor-paginated ({ next, previous, results }).
+// Reference tables are small, so follow the `next` links and return the full
+// list in response.data.
+const getAllPages = async (url) => {
+  const response = await api.get(url);
+  if (!response.data || !Array.isArray(response.data.results)) {
+    return response;
+  }
+  let results = response.data.results;
+  let next = response.data.next;
+  while (next) {
+    const page = await api.get(next);
+    results = results.concat(page.data.results);
+    next = page.data.next;
+  }
+  return { ...response, data: results };
+};
+
+// Orders, order details, bills, reservations, customers and feedback grow
+// without bound, so fetch one page at a time and pass `next` back for more.
+const getPage = async (url) => {
+  const response = await api.get(url);
+  return { ...response, data: response.data.results, next: response.data.next };
+};
+
 // API endpoints for all 21 entities
 export const customerAPI = {
-  getAll: () => api.get('/customers/'),
+  getPage: (next) => getPage(next || '/customers/'),
   getById: (id) => api.get(`/customers/${id}/`),
   create: (data) => api.post('/customers/', data),
   update: (id, data) => api.put(`/customers/${id}/`, data),
@@ -21,7 +46,7 @@ export const customerAPI = {
 };
 
 export const branchAPI = {
-  getAll: () => api.get('/branches/'),
+  getAll: () => getAllPages('/branches/'),
   getById: (id) => api.get(`/branches/${id}/`),
   create: (data) => api.post('/branches/', data),
   update: (id, data) => api.put(`/branches/${id}/`, data),
@@ -29,7 +54,7 @@ export const branchAPI = {
 };
 
 export const staffAPI = {
-  getAll: () => api.get('/staff/'),
+  getAll: () => getAllPages('/staff/'),
   getById: (id) => api.get(`/staff/${id}/`),
   create: (data) => api.post('/staff/', data),
   update: (id, data) => api.put(`/staff/${id}/`, data),
@@ -37,7 +62,8 @@ export const staffAPI = {
 };
 
 export const menuItemAPI = {
-  getAll: () => api.get('/menu-items/'),
+  getAll: () => getAllPages('/menu-items/'),
+  getByCategory: () => api.get('/menu-items/by-category/'),
   getById: (id) => api.get(`/menu-items/${id}/`),
   create: (data) => api.post('/menu-items/', data),
   update: (id, data) => api.put(`/menu-items/${id}/`, data),
@@ -45,7 +71,7 @@ export const menuItemAPI = {
 };
 
 export const orderAPI = {
-  getAll: () => api.get('/orders/'),
+  getPage: (next) => getPage(next || '/orders/'),
   getById: (id) => api.get(`/orders/${id}/`),
   create: (data) => api.post('/orders/', data),
   update: (id, data) => api.put(`/orders/${id}/`, data),
@@ -53,13 +79,13 @@ export const orderAPI = {
 };
 
 export const orderDetailAPI = {
-  getAll: () => api.get('/order-details/'),
+  getPage: (next) => getPage(next || '/order-details/'),
   create: (data) => api.post('/order-details/', data),
   delete: (id) => api.delete(`/order-details/${id}/`),
 };
 
 export const billAPI = {
-  getAll: () => api.get('/bills/'),
+  getPage: (next) => getPage(next || '/bills/'),
   getById: (id) => api.get(`/bills/${id}/`),
   create: (data) => api.post('/bills/', data),
   update: (id, data) => api.put(`/bills/${id}/`, data),
@@ -67,7 +93,7 @@ export const billAPI = {
 };
 
 export const discountAPI = {
-  getAll: () => api.get('/discounts/'),
+  getAll: () => getAllPages('/discounts/'),
   getById: (id) => api.get(`/discounts/${id}/`),
   create: (data) => api.post('/discounts/', data),
   update: (id, data) => api.put(`/discounts/${id}/`, data),
@@ -75,7 +101,7 @@ export const discountAPI = {
 };
 
 export const reservationAPI = {
-  getAll: () => api.get('/reservations/'),
+  getPage: (next) => getPage(next || '/reservations/'),
   getById: (id) => api.get(`/reservations/${id}/`),
   create: (data) => api.post('/reservations/', data),
   update: (id, data) => api.put(`/reservations/${id}/`, data),
@@ -83,7 +109,7 @@ export const reservationAPI = {
 };
 
 export const feedbackAPI = {
-  getAll: () => api.get('/feedbacks/'),
+  getPage: (next) => getPage(next || '/feedbacks/'),
   getById: (id) => api.get(`/feedbacks/${id}/`),
   create: (data) => api.post('/feedbacks/', data),
   update: (id, data) => api.put(`/feedbacks/${id}/`, data),
@@ -91,7 +117,7 @@ export const feedbackAPI = {
 };
 
 export const supplierAPI = {
-  getAll: () => api.get('/suppliers/'),
+  getAll: () => getAllPages('/suppliers/'),
   getById: (id) => api.get(`/suppliers/${id}/`),
   create: (data) => api.post('/suppliers/', data),
   update: (id, data) => api.put(`/suppliers/${id}/`, data),
@@ -99,7 +125,7 @@ export const supplierAPI = {
 };
 
 export const foodChallengeAPI = {
-  getAll: () => api.get('/food-challenges/'),
+  getAll: () => getAllPages('/food-challenges/'),
   getById: (id) => api.get(`/food-challenges/${id}/`),
   create: (data) => api.post('/food-challenges/', data),
   update: (id, data) => api.put(`/food-challenges/${id}/`, data),
@@ -107,11 +133,21 @@ export const foodChallengeAPI = {
 };
 
 export const inventoryAPI = {
-  getAll: () => api.get('/inventory/'),
+  getAll: () => getAllPages('/inventory/'),
   getById: (id) => api.get(`/inventory/${id}/`),
   create: (data) => api.post('/inventory/', data),
   update: (id, data) => api.put(`/inventory/${id}/`, data),
   delete: (id) => api.delete(`/inventory/${id}/`),
 };
 
+// Staff-only endpoints send the stored access token
+const withAuth = () => {
+  const token = localStorage.getItem('access_token');
+  return token ? { headers: { Authorization: `Bearer ${token}` } } : {};
+};
+
+export const statsAPI = {
+  dashboard: () => api.get('/stats/dashboard/', withAuth()),
+};
+
 export default api;
\ No newline at end of file